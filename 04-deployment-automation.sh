@@ -378,6 +378,47 @@ CREATE TABLE IF NOT EXISTS content_videos (
     INDEX idx_created_at (created_at)
 );
 
+-- Content Video Resources Table (measured cost of producing each video; bytes are storage I/O from /proc/<pid>/io)
+CREATE TABLE IF NOT EXISTS content_video_resources (
+    video_id VARCHAR(36) PRIMARY KEY,
+    cpu_user_seconds DECIMAL(10,2) DEFAULT 0.00,
+    cpu_system_seconds DECIMAL(10,2) DEFAULT 0.00,
+    max_rss_kb BIGINT DEFAULT 0,
+    bytes_read BIGINT DEFAULT 0,
+    bytes_written BIGINT DEFAULT 0,
+    processes INT DEFAULT 0,
+    llm_calls INT DEFAULT 0,
+    prompt_tokens INT DEFAULT 0,
+    eval_tokens INT DEFAULT 0,
+    prompt_eval_seconds DECIMAL(10,2) DEFAULT 0.00,
+    eval_seconds DECIMAL(10,2) DEFAULT 0.00,
+    llm_seconds DECIMAL(10,2) DEFAULT 0.00,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (video_id) REFERENCES content_videos(id),
+    INDEX idx_created_at (created_at)
+);
+
+-- Daily production cost per niche and platform
+CREATE OR REPLACE VIEW content_production_costs AS
+SELECT
+    DATE(cv.created_at) AS production_date,
+    cv.niche,
+    cv.platform,
+    COUNT(*) AS videos,
+    SUM(cv.duration) AS video_seconds,
+    SUM(cv.production_time) AS production_seconds,
+    SUM(r.cpu_user_seconds + r.cpu_system_seconds) AS cpu_seconds,
+    MAX(r.max_rss_kb) AS peak_rss_kb,
+    SUM(r.bytes_read) AS bytes_read,
+    SUM(r.bytes_written) AS bytes_written,
+    SUM(r.llm_calls) AS llm_calls,
+    SUM(r.prompt_tokens) AS prompt_tokens,
+    SUM(r.eval_tokens) AS eval_tokens,
+    SUM(r.llm_seconds) AS llm_seconds
+FROM content_videos cv
+JOIN content_video_resources r ON r.video_id = cv.id
+GROUP BY DATE(cv.created_at), cv.niche, cv.platform;
+
 -- Content Analytics Table
 CREATE TABLE IF NOT EXISTS content_analytics (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -606,7 +647,7 @@ Type=simple
 User=www-data
 WorkingDirectory=$PROJECT_DIR
 Environment=PATH=$PROJECT_DIR/venv/bin
-ExecStart=$PROJECT_DIR/venv/bin/python $PROJECT_DIR/scripts/phase1/02-revenue-optimization.py
+ExecStart=$PROJECT_DIR/venv/bin/python $PROJECT_DIR/scripts/phase1/05-pipeline-cli.py optimize
 Restart=always
 RestartSec=10
 StandardOutput=journal
@@ -627,7 +668,9 @@ Type=simple
 User=www-data
 WorkingDirectory=$PROJECT_DIR
 Environment=PATH=$PROJECT_DIR/venv/bin
-ExecStart=$PROJECT_DIR/venv/bin/python $PROJECT_DIR/scripts/phase1/03-content-production-pipeline.py
+# Live status for '05-pipeline-cli.py status' and Prometheus, bound to loopback (127.0.0.1:8101)
+Environment=PHASE1_STATUS=1
+ExecStart=$PROJECT_DIR/venv/bin/python $PROJECT_DIR/scripts/phase1/05-pipeline-cli.py produce
 Restart=always
 RestartSec=10
 StandardOutput=journal
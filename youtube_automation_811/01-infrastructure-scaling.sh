@@ -135,6 +135,7 @@ EOF
         OLLAMA_HOST=localhost:$port ollama pull llama3.1:8b &
         OLLAMA_HOST=localhost:$port ollama pull codellama:7b &
         OLLAMA_HOST=localhost:$port ollama pull mistral:7b &
+        OLLAMA_HOST=localhost:$port ollama pull llama3.2:3b &
     done
     
     wait # Wait for all model downloads to complete
@@ -7,32 +7,27 @@ Timeline: Weeks 3-4
 """
 
 import asyncio
-import aiohttp
 import json
-import mysql.connector
-import psycopg2
-import redis
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 import logging
 import os
 from typing import Dict, List, Optional, Tuple
-import requests
 from dataclasses import dataclass
 import time
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/var/log/phase1-revenue-optimization.log'),
-        logging.StreamHandler()
-    ]
-)
+from pipeline_common import lazy_import, setup_logging
+
+# Database drivers and numpy load on first use; only the commands that query or forecast pay for them
+mysql = lazy_import('mysql.connector')
+psycopg2 = lazy_import('psycopg2')
+redis = lazy_import('redis')
+np = lazy_import('numpy')
+
 logger = logging.getLogger(__name__)
 
+# Passed to setup_logging when run directly or from 05-pipeline-cli.py
+LOG_FILE = '/var/log/phase1-revenue-optimization.log'
+
 @dataclass
 class RevenueTarget:
     daily_target: float = 100000  # $100K daily target
@@ -1061,13 +1056,14 @@ async def main():
         
         print("\n🎉 Phase 1 revenue optimization setup completed!")
         print("💡 Run this script daily to maintain optimization")
-        print("📊 Check /var/log/phase1-revenue-optimization.log for detailed logs")
+        print(f"📊 Check {LOG_FILE} for detailed logs")
         
     except Exception as e:
         logger.error(f"❌ Phase 1 optimization failed: {e}")
         print(f"\n❌ Error: {e}")
-        print("📋 Check logs for details: /var/log/phase1-revenue-optimization.log")
+        print(f"📋 Check logs for details: {LOG_FILE}")
 
 if __name__ == "__main__":
+    setup_logging(LOG_FILE)
     asyncio.run(main())
 
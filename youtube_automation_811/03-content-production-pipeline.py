@@ -6,37 +6,133 @@ Target: Scale to 1,000 videos/day production
 Timeline: Weeks 5-6
 """
 
+from __future__ import annotations
+
 import asyncio
-import aiohttp
-import aiofiles
+import base64
+import contextvars
 import json
 import os
 import subprocess
-import tempfile
+import sys
+import threading
 import time
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
-import mysql.connector
-import redis
-import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 import hashlib
+import re
+import shutil
+import signal
+import sqlite3
 import uuid
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+
+from pipeline_common import lazy_import, setup_logging
+
+# Heavy dependencies load on first use, so bench and report commands start without them
+aiofiles = lazy_import('aiofiles')
+aiohttp = lazy_import('aiohttp')
+mysql = lazy_import('mysql.connector')
+redis = lazy_import('redis')
+np = lazy_import('numpy')
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/var/log/phase1-content-production.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Passed to setup_logging when run directly or from 05-pipeline-cli.py
+LOG_FILE = '/var/log/phase1-content-production.log'
+
+# Span currently open in this task; asyncio tasks inherit it from the code that created them
+CURRENT_SPAN = contextvars.ContextVar('current_span', default=None)
+
+class Span:
+    """One timed operation within a request trace"""
+    
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start', 'end', 'status', 'attributes')
+    
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.end = None
+        self.status = 'ok'
+        self.attributes = attributes
+    
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+    
+    def to_dict(self) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'duration': (self.end or time.time()) - self.start,
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+class Tracer:
+    """Span-based tracing exported to a local JSON-lines file"""
+    
+    def __init__(self, path: Path = Path(os.getenv('PHASE1_TRACE_PATH', '/var/log/phase1-content-traces.jsonl')),
+                 flush_every: int = 200):
+        self.path = path
+        self.enabled = os.getenv('PHASE1_TRACING', '1') != '0'
+        self.flush_every = flush_every
+        self.buffer = []
+    
+    @contextmanager
+    def span(self, name: str, root: bool = False, **attributes):
+        """Time the enclosed block as a child of the current span, or as a new trace when root or unparented"""
+        parent = None if root else CURRENT_SPAN.get()
+        span = Span(name, parent.trace_id if parent else uuid.uuid4().hex, parent.span_id if parent else None, attributes)
+        token = CURRENT_SPAN.set(span)
+        
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'error'
+            span.attributes['error'] = repr(e)[:200]
+            raise
+        finally:
+            span.end = time.time()
+            CURRENT_SPAN.reset(token)
+            self.export(span)
+    
+    def export(self, span: Span):
+        if not self.enabled:
+            return
+        
+        self.buffer.append(span.to_dict())
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+    
+    def flush(self):
+        """Append buffered spans to the trace file"""
+        if not self.buffer:
+            return
+        
+        lines = ''.join(json.dumps(record) + '\n' for record in self.buffer)
+        self.buffer = []
+        
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(lines)
+        except Exception as e:
+            logger.warning(f"Could not write traces to {self.path}: {e}")
+
+tracer = Tracer()
+
+@dataclass(slots=True)
 class ContentRequest:
     niche: str
     platform: str
@@ -46,17 +142,300 @@ class ContentRequest:
     target_audience: str = "general"
     affiliate_products: List[str] = None
     trending_keywords: List[str] = None
+    checkpoint_key: Optional[str] = None  # Assigned when the request is part of a saved daily plan
+    priority: float = 0.0  # Expected revenue per render-second; higher goes first within a deadline
+    publish_deadline: Optional[float] = None  # Unix time the video must be ready by
+    expected_value: float = 0.0  # Expected 30-day revenue
+    estimated_cost: float = 0.0  # Expected render seconds
+
+@dataclass(slots=True)
+class ProductionResult:
+    """Compact outcome of one request; the full script and video dicts are not retained"""
+    niche: str
+    platform: str
+    status: str = 'skipped'  # success, failed or skipped (no usable script or video)
+    script_id: str = ''
+    video_id: str = ''
+    quality_score: float = 0.0
+    production_time: float = 0.0
+    file_size: int = 0
+    resumed: bool = False
+    deadline_met: Optional[bool] = None
+    error: str = ''
+    cpu_seconds: float = 0.0
+    llm_tokens: int = 0
+
+@dataclass(slots=True)
+class ResourceUsage:
+    """Measured resources one video consumed across its child processes and LLM calls"""
+    cpu_user: float = 0.0  # Seconds
+    cpu_system: float = 0.0
+    max_rss_kb: int = 0  # Largest single process
+    bytes_read: int = 0  # Storage I/O from /proc/<pid>/io, so pipes and page-cache hits are not counted
+    bytes_written: int = 0
+    processes: int = 0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    eval_tokens: int = 0
+    prompt_eval_seconds: float = 0.0
+    eval_seconds: float = 0.0
+    llm_seconds: float = 0.0  # Wall time of the generate calls, including queueing on the Ollama side
+    
+    def add_process(self, report: Dict):
+        """Fold in the rusage and I/O counters of one finished child process"""
+        self.cpu_user += report.get('user', 0.0)
+        self.cpu_system += report.get('system', 0.0)
+        self.max_rss_kb = max(self.max_rss_kb, report.get('max_rss_kb', 0))
+        self.bytes_read += report.get('read_bytes', 0)
+        self.bytes_written += report.get('write_bytes', 0)
+        self.processes += 1
+    
+    def add_generation(self, result: Dict, elapsed: float):
+        """Fold in the token counters of one Ollama response (durations are reported in nanoseconds)"""
+        self.llm_calls += 1
+        self.prompt_tokens += result.get('prompt_eval_count', 0)
+        self.eval_tokens += result.get('eval_count', 0)
+        self.prompt_eval_seconds += result.get('prompt_eval_duration', 0) / 1e9
+        self.eval_seconds += result.get('eval_duration', 0) / 1e9
+        self.llm_seconds += elapsed
+    
+    @property
+    def cpu_seconds(self) -> float:
+        return self.cpu_user + self.cpu_system
+    
+    @property
+    def llm_tokens(self) -> int:
+        return self.prompt_tokens + self.eval_tokens
 
-@dataclass
+# Usage record of the video being produced in this task; child tasks share it with the request that created them
+CURRENT_USAGE = contextvars.ContextVar('current_usage', default=None)
+
+@dataclass(slots=True)
 class ProductionMetrics:
     videos_produced: int = 0
     processing_time: float = 0.0
     success_rate: float = 0.0
     average_quality_score: float = 0.0
-    storage_used: float = 0.0
+    storage_used: float = 0.0  # MB
+    videos_resumed: int = 0
+    videos_failed: int = 0
+    videos_skipped: int = 0
+    deadline_missed: int = 0
+    quality_total: float = 0.0
+    cpu_seconds: float = 0.0  # Child-process CPU time of the videos produced
+    llm_tokens: int = 0
+    
+    def record(self, result: ProductionResult):
+        """Fold one result into the running totals"""
+        if result.status == 'success' and result.resumed:
+            self.videos_resumed += 1
+        elif result.status == 'success':
+            self.videos_produced += 1
+            self.processing_time += result.production_time
+            self.quality_total += result.quality_score
+            self.average_quality_score = self.quality_total / self.videos_produced
+            self.storage_used += result.file_size / (1024 * 1024)
+            self.cpu_seconds += result.cpu_seconds
+            self.llm_tokens += result.llm_tokens
+            if result.deadline_met is False:
+                self.deadline_missed += 1
+        elif result.status == 'failed':
+            self.videos_failed += 1
+        else:
+            self.videos_skipped += 1
+        
+        self.update_success_rate()
+    
+    def merge(self, other: 'ProductionMetrics'):
+        """Add another set of totals, e.g. a batch into the day"""
+        self.videos_produced += other.videos_produced
+        self.processing_time += other.processing_time
+        self.storage_used += other.storage_used
+        self.videos_resumed += other.videos_resumed
+        self.videos_failed += other.videos_failed
+        self.videos_skipped += other.videos_skipped
+        self.deadline_missed += other.deadline_missed
+        self.quality_total += other.quality_total
+        self.cpu_seconds += other.cpu_seconds
+        self.llm_tokens += other.llm_tokens
+        if self.videos_produced:
+            self.average_quality_score = self.quality_total / self.videos_produced
+        
+        self.update_success_rate()
+    
+    def update_success_rate(self):
+        attempted = self.videos_produced + self.videos_resumed + self.videos_failed + self.videos_skipped
+        if attempted:
+            self.success_rate = (self.videos_produced + self.videos_resumed) / attempted * 100
+    
+    @property
+    def completed(self) -> int:
+        return self.videos_produced + self.videos_resumed
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit driven by observed latency, timeouts and errors"""
+    
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 target_latency: float = 30.0, latency_tolerance: float = 2.0, backoff: float = 0.7):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency  # Seconds; slower completions trigger a decrease
+        self.latency_tolerance = latency_tolerance  # Allowed ratio of smoothed to baseline latency
+        self.backoff = backoff  # Multiplicative decrease factor
+        
+        self.in_flight = 0
+        self.waiters = deque()
+        self.smoothed_latency = None
+        self.baseline_latency = None
+        self.last_decrease = 0.0
+        
+        self.increases = 0
+        self.decreases = 0
+        self.last_decision = 'none'
+    
+    async def acquire(self):
+        """Wait for a free slot under the current limit"""
+        if self.in_flight < int(self.limit) and not self.waiters:
+            self.in_flight += 1
+            return
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before cancellation; pass it on
+                self.in_flight -= 1
+                self.wake_waiters()
+            else:
+                self.waiters.remove(waiter)
+            raise
+    
+    def release(self, latency: float, success: bool, timed_out: bool = False):
+        """Free a slot and adjust the limit from the call's outcome"""
+        # Only a call that ran with every slot taken says anything about whether more slots would help
+        saturated = self.in_flight >= int(self.limit) or bool(self.waiters)
+        self.in_flight -= 1
+        self.record(latency, success, timed_out, saturated)
+        self.wake_waiters()
+    
+    def wake_waiters(self):
+        while self.waiters and self.in_flight < int(self.limit):
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+    
+    def record(self, latency: float, success: bool, timed_out: bool, saturated: bool = True):
+        if success:
+            self.smoothed_latency = latency if self.smoothed_latency is None else 0.8 * self.smoothed_latency + 0.2 * latency
+            if self.baseline_latency is None or self.smoothed_latency < self.baseline_latency:
+                self.baseline_latency = self.smoothed_latency
+            else:
+                # Let the baseline drift up slowly so a permanently slower cluster is not punished forever
+                self.baseline_latency *= 1.001
+        
+        rising = (
+            self.smoothed_latency is not None
+            and self.smoothed_latency > self.baseline_latency * self.latency_tolerance
+        )
+        
+        if timed_out or not success or latency > self.target_latency or rising:
+            reason = 'timeout' if timed_out else 'error' if not success else 'latency'
+            
+            # Decrease at most once per smoothed round trip so one burst of failures is one signal
+            now = time.time()
+            if now - self.last_decrease >= (self.smoothed_latency or 0.0):
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.last_decrease = now
+                self.decreases += 1
+                self.last_decision = f'decrease:{reason}'
+                logger.info(f"LLM concurrency limit decreased to {self.limit:.1f} ({reason})")
+        elif saturated:
+            # Additive increase of about one slot per limit's worth of good completions at the limit
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self.increases += 1
+            self.last_decision = 'increase'
+        else:
+            # Under-used limit: growing it would only let a later burst overload the cluster
+            self.last_decision = 'hold'
+    
+    def get_metrics(self) -> Dict:
+        """Current limit and decision counters"""
+        return {
+            'limit': round(self.limit, 2),
+            'in_flight': self.in_flight,
+            'waiting': len(self.waiters),
+            'smoothed_latency': self.smoothed_latency or 0.0,
+            'baseline_latency': self.baseline_latency or 0.0,
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'last_decision': self.last_decision
+        }
+
+class RequestPolicy:
+    """Per-request deadline, jittered retries on another backend and hedging at the observed latency quantile"""
+    
+    def __init__(self, deadline: float = 90.0, max_attempts: int = 3, backoff_base: float = 0.5, backoff_cap: float = 8.0,
+                 hedge_quantile: float = 95.0, min_samples: int = 20, default_hedge_delay: float = 30.0,
+                 max_hedge_share: float = 0.1):
+        self.deadline = deadline  # Seconds from first attempt to giving up
+        self.max_attempts = max_attempts  # Rounds, each to a backend not tried yet where possible
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples  # Successful attempts observed before the quantile is trusted
+        self.default_hedge_delay = default_hedge_delay
+        self.max_hedge_share = max_hedge_share  # Hedges per request, so a slow cluster is not doubled in load
+        
+        self.latencies = deque(maxlen=500)
+        self.rng = np.random.default_rng()
+        
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self.failures = 0
+    
+    def hedge_delay(self) -> float:
+        """Seconds to wait on an attempt before duplicating it"""
+        if len(self.latencies) < self.min_samples:
+            return self.default_hedge_delay
+        return float(np.percentile(self.latencies, self.hedge_quantile))
+    
+    def may_hedge(self) -> bool:
+        return self.hedges < self.max_hedge_share * self.requests
+    
+    def backoff(self, retry: int) -> float:
+        """Full-jitter exponential backoff before the given retry"""
+        return float(self.rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** retry)))
+    
+    @staticmethod
+    def retryable(status: int) -> bool:
+        """Transport errors (status 0), throttling and server errors are worth another backend"""
+        return status == 0 or status == 429 or status >= 500
+    
+    def get_metrics(self) -> Dict:
+        """Attempt, retry and hedge counters"""
+        return {
+            'requests': self.requests,
+            'attempts': self.attempts,
+            'retries': self.retries,
+            'retry_rate': self.retries / self.requests if self.requests else 0.0,
+            'hedges': self.hedges,
+            'hedge_rate': self.hedges / self.requests if self.requests else 0.0,
+            'hedge_wins': self.hedge_wins,
+            'deadline_exceeded': self.deadline_exceeded,
+            'failures': self.failures,
+            'hedge_delay': round(self.hedge_delay(), 3)
+        }
 
 class OllamaClusterManager:
-    """Manages load-balanced Ollama cluster for AI content generation"""
+    """Balances AI content generation across the Ollama cluster endpoints directly"""
     
     def __init__(self):
         self.endpoints = [
@@ -65,62 +444,252 @@ class OllamaClusterManager:
             "http://localhost:11436",
             "http://localhost:11437"
         ]
-        self.load_balancer = "http://localhost:11430"  # HAProxy endpoint
         self.current_endpoint = 0
-        self.request_cache = {}
+        self.request_cache = OrderedDict()  # Least recently used first
+        self.cache_size = 256  # Responses kept for callers that opt into the cache
         self.performance_stats = {}
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter()
+        self.request_policy = RequestPolicy()
+        self.keep_alive = "30m"  # Keep models resident between batches instead of reloading them
+    
+    async def generate_content(self, prompt: str, model: str = "llama3.1:8b", system: Optional[str] = None,
+                               num_predict: int = 2048, use_cache: bool = True, deadline: Optional[float] = None,
+                               timing: Optional[Dict] = None) -> str:
+        """Generate content on the Ollama cluster, balanced across its endpoints
+        
+        A timing dict, when given, receives 'seconds': the time the model spent on the call, excluding any
+        wait for a concurrency slot.
+        """
+        with tracer.span('ollama.generate', model=model, prompt_chars=len(prompt) + len(system or ''), num_predict=num_predict) as span:
+            return await self.request_generation(prompt, model, system, num_predict, use_cache, deadline, span, timing)
     
-    async def generate_content(self, prompt: str, model: str = "llama3.1:8b") -> str:
-        """Generate content using load-balanced Ollama cluster"""
+    async def request_generation(self, prompt: str, model: str, system: Optional[str], num_predict: int,
+                                 use_cache: bool, deadline: Optional[float], span: Span,
+                                 timing: Optional[Dict] = None) -> str:
+        """Serve from the cache or call the cluster under the adaptive concurrency limit"""
+        timing = timing if timing is not None else {}
         
         # Check cache first
-        cache_key = hashlib.md5(f"{prompt}:{model}".encode()).hexdigest()
-        if cache_key in self.request_cache:
+        cache_key = self.cache_key(prompt, model, system)
+        if use_cache and cache_key in self.request_cache:
             logger.debug(f"Cache hit for prompt: {prompt[:50]}...")
+            span.set(cached=True)
+            self.request_cache.move_to_end(cache_key)
             return self.request_cache[cache_key]
         
+        with tracer.span('ollama.queue'):
+            await self.concurrency_limiter.acquire()
         start_time = time.time()
+        success = False
+        timed_out = False
         
         try:
-            async with aiohttp.ClientSession() as session:
-                payload = {
-                    "model": model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "max_tokens": 2048,
-                        "frequency_penalty": 0.1
-                    }
+            payload = {
+                "model": model,
+                "prompt": prompt,
+                "stream": False,
+                "keep_alive": self.keep_alive,
+                "options": {
+                    "temperature": 0.7,
+                    "top_p": 0.9,
+                    "num_predict": num_predict,
+                    "repeat_penalty": 1.1
                 }
+            }
+            if system:
+                payload["system"] = system
+            
+            status, result = await self.call_with_policy(payload, deadline or self.request_policy.deadline)
+            timed_out = status == 504
+            if status == 200:
+                content = result.get('response', '')
+                
+                # Cache successful responses, unless the caller wants every call to be a fresh generation
+                if use_cache:
+                    self.request_cache[cache_key] = content
+                    self.request_cache.move_to_end(cache_key)
+                    while len(self.request_cache) > self.cache_size:
+                        self.request_cache.popitem(last=False)
+                
+                # Update performance stats
+                processing_time = time.time() - start_time
+                # Ollama's own total excludes client-side retries, backoff and hedging delays
+                timing['seconds'] = result.get('total_duration', 0) / 1e9 or processing_time
+                self.update_performance_stats(model, processing_time, True)
+                self.update_token_stats(model, result)
+                usage = CURRENT_USAGE.get()
+                if usage:
+                    usage.add_generation(result, processing_time)
+                span.set(
+                    prompt_eval_count=result.get('prompt_eval_count', 0),
+                    eval_count=result.get('eval_count', 0),
+                    response_chars=len(content)
+                )
                 
-                async with session.post(
-                    f"{self.load_balancer}/api/generate",
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result.get('response', '')
-                        
-                        # Cache successful responses
-                        self.request_cache[cache_key] = content
-                        
-                        # Update performance stats
-                        processing_time = time.time() - start_time
-                        self.update_performance_stats(model, processing_time, True)
-                        
-                        logger.debug(f"Generated content in {processing_time:.2f}s")
-                        return content
-                    else:
-                        logger.error(f"Ollama request failed: {response.status}")
-                        return ""
-                        
+                logger.debug(f"Generated content in {processing_time:.2f}s")
+                success = True
+                return content
+            elif timed_out:
+                span.status = 'error'
+                span.set(timed_out=True)
+                logger.error(f"Ollama request missed its deadline after {time.time() - start_time:.1f}s")
+                self.update_performance_stats(model, time.time() - start_time, False)
+                return ""
+            else:
+                logger.error(f"Ollama request failed: {status}")
+                span.status = 'error'
+                span.set(http_status=status)
+                self.update_performance_stats(model, time.time() - start_time, False)
+                return ""
+        
         except Exception as e:
             logger.error(f"Error generating content: {e}")
+            span.status = 'error'
+            span.set(error=str(e)[:200])
             self.update_performance_stats(model, time.time() - start_time, False)
             return ""
+        
+        finally:
+            timing.setdefault('seconds', time.time() - start_time)
+            self.concurrency_limiter.release(time.time() - start_time, success, timed_out)
+    
+    def next_endpoint(self, exclude: List[str]) -> str:
+        """Round-robin over the instances, skipping ones this request has already tried while others remain"""
+        for _ in range(len(self.endpoints)):
+            endpoint = self.endpoints[self.current_endpoint % len(self.endpoints)]
+            self.current_endpoint += 1
+            if endpoint not in exclude:
+                return endpoint
+        return self.endpoints[self.current_endpoint % len(self.endpoints)]
+    
+    async def attempt(self, endpoint: str, payload: Dict, timeout: float, hedge: bool) -> Tuple[int, Dict]:
+        """One generate call to one instance; transport errors come back as status 0"""
+        policy = self.request_policy
+        policy.attempts += 1
+        start_time = time.time()
+        with tracer.span('ollama.attempt', endpoint=endpoint, hedge=hedge) as span:
+            try:
+                status, result = await self.post_generate(f"{endpoint}/api/generate", payload, timeout)
+            except asyncio.CancelledError:
+                span.set(cancelled=True)
+                raise
+            except asyncio.TimeoutError:
+                status, result = 504, {}
+            except Exception as e:
+                logger.debug(f"Ollama attempt on {endpoint} failed: {e}")
+                status, result = 0, {}
+            
+            span.set(http_status=status)
+            if status == 200:
+                policy.latencies.append(time.time() - start_time)
+            else:
+                span.status = 'error'
+            return status, result
+    
+    async def call_with_policy(self, payload: Dict, deadline: float) -> Tuple[int, Dict]:
+        """Retry failed attempts on other instances with jittered backoff, hedging slow ones, until the deadline"""
+        policy = self.request_policy
+        policy.requests += 1
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + deadline
+        tried = []
+        status, result = 0, {}
+        
+        for round_number in range(policy.max_attempts):
+            remaining = give_up_at - loop.time()
+            if remaining <= 0:
+                break
+            if round_number:
+                policy.retries += 1
+            
+            endpoint = self.next_endpoint(tried)
+            tried.append(endpoint)
+            primary = asyncio.ensure_future(self.attempt(endpoint, payload, remaining, False))
+            attempts = {primary}
+            
+            try:
+                done, _ = await asyncio.wait(attempts, timeout=min(policy.hedge_delay(), remaining))
+                if not done and len(self.endpoints) > 1 and policy.may_hedge():
+                    # Duplicate the straggler on another instance; whichever answers first wins
+                    policy.hedges += 1
+                    hedge_endpoint = self.next_endpoint(tried)
+                    tried.append(hedge_endpoint)
+                    attempts.add(asyncio.ensure_future(
+                        self.attempt(hedge_endpoint, payload, give_up_at - loop.time(), True)
+                    ))
+                
+                while attempts:
+                    done, attempts = await asyncio.wait(
+                        attempts, timeout=max(0.0, give_up_at - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        status, result = 504, {}
+                        break
+                    for task in done:
+                        status, result = task.result()
+                        if status == 200:
+                            if task is not primary:
+                                policy.hedge_wins += 1
+                            return status, result
+            finally:
+                for task in attempts:
+                    task.cancel()
+            
+            if not policy.retryable(status):
+                break
+            
+            # Back off before the next round, but never past the deadline
+            await asyncio.sleep(min(policy.backoff(round_number), max(0.0, give_up_at - loop.time())))
+        
+        if loop.time() >= give_up_at:
+            policy.deadline_exceeded += 1
+            status = 504
+        policy.failures += 1
+        return status, result
+    
+    async def post_generate(self, url: str, payload: Dict, timeout: float) -> Tuple[int, Dict]:
+        """POST to an Ollama generate endpoint and return (status, body); simulation mode swaps this out"""
+        async with aiohttp.ClientSession() as session:
+            async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status != 200:
+                    return response.status, {}
+                return response.status, await response.json()
+    
+    async def warm_up(self, models: List[str], system: Optional[str] = None):
+        """Load models on every instance and evaluate the shared system prompt once, ahead of real traffic"""
+        async def warm(endpoint, model):
+            payload = {
+                "model": model,
+                "prompt": "Reply with OK.",
+                "stream": False,
+                "keep_alive": self.keep_alive,
+                "options": {"num_predict": 1}
+            }
+            if system:
+                payload["system"] = system
+            
+            start_time = time.time()
+            try:
+                status, _ = await self.post_generate(f"{endpoint}/api/generate", payload, 300)
+                if status == 200:
+                    logger.info(f"Warmed {model} on {endpoint} in {time.time() - start_time:.1f}s")
+                else:
+                    logger.warning(f"Warm-up of {model} on {endpoint} failed: {status}")
+            except Exception as e:
+                logger.warning(f"Warm-up of {model} on {endpoint} failed: {e}")
+        
+        await asyncio.gather(*[warm(endpoint, model) for endpoint in self.endpoints for model in models])
+    
+    def cache_key(self, prompt: str, model: str, system: Optional[str] = None) -> str:
+        return hashlib.md5(f"{system or ''}:{prompt}:{model}".encode()).hexdigest()
+    
+    def update_token_stats(self, model: str, result: Dict):
+        """Accumulate Ollama's prompt-eval and decode counters (durations are reported in nanoseconds)"""
+        stats = self.performance_stats[model]
+        stats['prompt_tokens'] = stats.get('prompt_tokens', 0) + result.get('prompt_eval_count', 0)
+        stats['prompt_eval_time'] = stats.get('prompt_eval_time', 0.0) + result.get('prompt_eval_duration', 0) / 1e9
+        stats['eval_tokens'] = stats.get('eval_tokens', 0) + result.get('eval_count', 0)
+        stats['eval_time'] = stats.get('eval_time', 0.0) + result.get('eval_duration', 0) / 1e9
     
     def update_performance_stats(self, model: str, processing_time: float, success: bool):
         """Update performance statistics"""
@@ -144,12 +713,300 @@ class OllamaClusterManager:
     def get_performance_stats(self) -> Dict:
         """Get current performance statistics"""
         return self.performance_stats
+    
+    def get_concurrency_metrics(self) -> Dict:
+        """Get the adaptive concurrency limiter's current state"""
+        return self.concurrency_limiter.get_metrics()
+    
+    def get_policy_metrics(self) -> Dict:
+        """Get retry and hedging counters of the request policy"""
+        return self.request_policy.get_metrics()
+
+# Static script instructions, sent as the Ollama system prompt so every request shares the same prefix
+SCRIPT_SYSTEM_PROMPT = """You write viral short-form and long-form video scripts.
+
+PLATFORMS:
+- tiktok: TikTok (vertical, 30-60 seconds, trending sounds, hashtags)
+- youtube: YouTube (horizontal, 8-15 minutes, SEO optimized, engaging)
+- instagram: Instagram Reels (vertical, 30-90 seconds, visual appeal)
+- facebook: Facebook (square/horizontal, 1-3 minutes, shareable)
+
+REQUIREMENTS:
+1. Hook viewers in the first 3 seconds
+2. Provide valuable, actionable information
+3. Include a strong call-to-action
+4. Optimize for the requested platform's algorithm
+5. Make it engaging and shareable
+
+STRUCTURE:
+- Hook (3 seconds): Attention-grabbing opening
+- Content (80% of video): Main value/information
+- CTA (10% of video): Clear call-to-action
+
+Generate a complete script with:
+1. Exact words to say
+2. Visual cues and directions
+3. Text overlays suggestions
+4. Hashtag recommendations
+5. Music/sound suggestions
+
+Make it viral-worthy and optimized for maximum engagement!"""
+
+# Compiled once instead of on every clean_text_for_tts call
+TTS_URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+TTS_HASHTAG_PATTERN = re.compile(r'#\w+')
+TTS_MENTION_PATTERN = re.compile(r'@\w+')
+TTS_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+class ScriptAnalyticsEngine:
+    """Scores and structures scripts, lowercasing and splitting each script only once"""
+    
+    # Keyword sets used by the quality score, matched as substrings of the lowercased script
+    KEYWORD_SETS = {
+        'hook': ['did you know', 'this will', 'secret', 'amazing', 'incredible', 'shocking'],
+        'cta': ['subscribe', 'follow', 'like', 'comment', 'share', 'click', 'visit'],
+        'engagement': ['you', 'your', 'question', 'comment', 'think', 'experience'],
+        'value': ['learn', 'discover', 'find out', 'reveal', 'show', 'teach', 'help']
+    }
+    
+    def __init__(self):
+        self.hook_words = self.KEYWORD_SETS['hook']
+        self.cta_words = self.KEYWORD_SETS['cta']
+        self.engagement_words = self.KEYWORD_SETS['engagement']
+        self.value_words = self.KEYWORD_SETS['value']
+    
+    def keyword_features(self, lowered: str) -> Tuple[bool, bool, int, bool]:
+        """(hook present, CTA present, engagement words present, value words present) for lowercased text"""
+        return (
+            any(word in lowered for word in self.hook_words),
+            any(word in lowered for word in self.cta_words),
+            sum(1 for word in self.engagement_words if word in lowered),
+            any(word in lowered for word in self.value_words)
+        )
+    
+    @staticmethod
+    def length_window(duration: Optional[int] = None) -> Tuple[int, int]:
+        """Spoken word counts that fit the target duration: 100-300 words per minute of video"""
+        minutes = (duration or 60) / 60
+        return round(100 * minutes), round(300 * minutes)
+    
+    def quality_score(self, features: Tuple[bool, bool, int, bool], word_count: int,
+                      duration: Optional[int] = None) -> float:
+        has_hook, has_cta, engagement_count, has_value = features
+        low, high = self.length_window(duration)
+        score = 0.0
+        if has_hook:
+            score += 20
+        if has_cta:
+            score += 20
+        score += min(engagement_count * 5, 20)
+        if low <= word_count <= high:
+            score += 20
+        if has_value:
+            score += 20
+        return min(score, 100.0)
+    
+    def analyze(self, content: str, duration: Optional[int] = None) -> Dict:
+        """Word count, estimated duration, quality score and unmet criteria from a single lowercase and split"""
+        word_count = len(content.split())
+        features = self.keyword_features(content.lower())
+        return {
+            'word_count': word_count,
+            'estimated_duration': int((word_count / 155) * 60),
+            'quality_score': self.quality_score(features, word_count, duration),
+            'quality_gaps': self.quality_gaps(features, word_count, duration)
+        }
+    
+    def quality_gaps(self, features: Tuple[bool, bool, int, bool], word_count: int,
+                     duration: Optional[int] = None) -> List[str]:
+        """Scoring criteria the script misses or only partly meets"""
+        has_hook, has_cta, engagement_count, has_value = features
+        low, high = self.length_window(duration)
+        gaps = []
+        if not has_hook:
+            gaps.append('hook')
+        if not has_cta:
+            gaps.append('cta')
+        if engagement_count < 4:
+            gaps.append('engagement')
+        if not low <= word_count <= high:
+            gaps.append('length')
+        if not has_value:
+            gaps.append('value')
+        return gaps
+    
+    def structure(self, content: str) -> Dict:
+        """Split a generated script into its sections, lowercasing the text once"""
+        script_structure = {
+            'hook': [],
+            'main_content': [],
+            'call_to_action': [],
+            'visual_cues': [],
+            'text_overlays': [],
+            'hashtags': [],
+            'music_suggestions': []
+        }
+        
+        current_section = 'main_content'
+        
+        for line, lowered in zip(content.split('\n'), content.lower().split('\n')):
+            line = line.strip()
+            if not line:
+                continue
+            
+            # Identify sections ('text overlay' is covered by 'overlay')
+            if 'hook' in lowered or 'opening' in lowered:
+                current_section = 'hook'
+            elif 'cta' in lowered or 'call-to-action' in lowered or 'call to action' in lowered:
+                current_section = 'call_to_action'
+            elif 'visual' in lowered:
+                current_section = 'visual_cues'
+            elif 'overlay' in lowered:
+                current_section = 'text_overlays'
+            elif 'hashtag' in lowered:
+                current_section = 'hashtags'
+            elif 'music' in lowered or 'sound' in lowered:
+                current_section = 'music_suggestions'
+            else:
+                script_structure[current_section].append(line)
+        
+        for key in ['hook', 'main_content', 'call_to_action']:
+            script_structure[key] = ' '.join(script_structure[key])
+        
+        return script_structure
+
+class ModelRouter:
+    """Routes each script request to an Ollama model from measured latency and quality per segment"""
+    
+    def __init__(self, redis_client=None, exploration_share: float = 0.1):
+        self.redis_client = redis_client
+        self.stats_key = "model_router:stats"
+        self.exploration_share = exploration_share  # Share of requests sent to a non-best model
+        
+        # Candidate models with prior latency (seconds per script) and quality score (0-100)
+        self.models = {
+            'llama3.2:3b': {'latency': 4.0, 'quality': 60.0},
+            'mistral:7b': {'latency': 8.0, 'quality': 70.0},
+            'llama3.1:8b': {'latency': 10.0, 'quality': 75.0}
+        }
+        self.prior_strength = 5  # Pseudo-observations behind each prior
+        self.decay = 0.99  # Older observations fade so estimates follow model and cluster changes
+        
+        # Quality points one second of latency is worth; short-form scripts favour fast models
+        self.latency_weights = {'short': 3.0, 'long': 0.25}
+        self.short_form_max_duration = 90
+        self.failure_latency = 60.0  # A failed call counts as a full timeout with zero quality
+        
+        self.stats = {}  # "platform:form|model" -> {'weight', 'latency', 'quality'}
+        self.choices = {'routed': 0, 'explored': 0}
+        self.rng = np.random.default_rng()
+        self.load_stats()
+    
+    def segment(self, request: ContentRequest) -> str:
+        form = 'short' if request.duration <= self.short_form_max_duration else 'long'
+        return f"{request.platform}:{form}"
+    
+    def load_stats(self):
+        """Load persisted per-segment model stats"""
+        if self.redis_client is None:
+            return
+        
+        try:
+            stored = self.redis_client.hgetall(self.stats_key) or {}
+            for key, value in stored.items():
+                key = key.decode() if isinstance(key, bytes) else key
+                self.stats[key] = json.loads(value)
+        except Exception as e:
+            logger.warning(f"Could not load model router stats: {e}")
+    
+    def save_stat(self, key: str):
+        if self.redis_client is None:
+            return
+        
+        try:
+            self.redis_client.hset(self.stats_key, key, json.dumps(self.stats[key]))
+        except Exception as e:
+            logger.warning(f"Could not save model router stats: {e}")
+    
+    def estimate(self, segment: str, model: str) -> Tuple[float, float]:
+        """Return (latency, quality) for a model in a segment, blending observations with the prior"""
+        prior = self.models[model]
+        stat = self.stats.get(f"{segment}|{model}")
+        if not stat:
+            return prior['latency'], prior['quality']
+        
+        weight = stat['weight']
+        total = weight + self.prior_strength
+        latency = (weight * stat['latency'] + self.prior_strength * prior['latency']) / total
+        quality = (weight * stat['quality'] + self.prior_strength * prior['quality']) / total
+        return latency, quality
+    
+    def utility(self, segment: str, model: str) -> float:
+        latency, quality = self.estimate(segment, model)
+        return quality - self.latency_weights[segment.split(':')[1]] * latency
+    
+    def rank(self, request: ContentRequest) -> List[str]:
+        """Models ordered from best to worst quality/latency trade-off for the request's segment"""
+        segment = self.segment(request)
+        return sorted(self.models, key=lambda m: self.utility(segment, m), reverse=True)
+    
+    def choose(self, request: ContentRequest) -> str:
+        """Pick the model with the best quality/latency trade-off, exploring alternates occasionally"""
+        ranked = self.rank(request)
+        
+        if len(ranked) > 1 and self.rng.random() < self.exploration_share:
+            self.choices['explored'] += 1
+            return ranked[1 + int(self.rng.integers(len(ranked) - 1))]
+        
+        self.choices['routed'] += 1
+        return ranked[0]
+    
+    def record(self, request: ContentRequest, model: str, latency: float, quality: float, success: bool):
+        """Fold one generation outcome into the model's stats for the request's segment"""
+        if model not in self.models:
+            return
+        
+        if not success:
+            latency, quality = max(latency, self.failure_latency), 0.0
+        
+        key = f"{self.segment(request)}|{model}"
+        stat = self.stats.setdefault(key, {'weight': 0.0, 'latency': 0.0, 'quality': 0.0})
+        stat['weight'] = stat['weight'] * self.decay + 1.0
+        rate = 1.0 / stat['weight']
+        stat['latency'] += rate * (latency - stat['latency'])
+        stat['quality'] += rate * (quality - stat['quality'])
+        
+        self.save_stat(key)
+    
+    def get_stats(self) -> Dict:
+        """Current routing choice per segment with the estimates behind it"""
+        segments = sorted({key.split('|')[0] for key in self.stats})
+        return {
+            'choices': dict(self.choices),
+            'segments': {
+                segment: {
+                    model: dict(zip(('latency', 'quality'), self.estimate(segment, model)))
+                    for model in self.models
+                }
+                for segment in segments
+            }
+        }
 
 class ContentScriptGenerator:
     """Generates video scripts using AI"""
     
-    def __init__(self, ollama_manager: OllamaClusterManager):
+    def __init__(self, ollama_manager: OllamaClusterManager, redis_client=None):
         self.ollama = ollama_manager
+        self.analytics = ScriptAnalyticsEngine()
+        self.router = ModelRouter(redis_client)
+        self.system_prompt = SCRIPT_SYSTEM_PROMPT
+        
+        # Output token budgets: ~150 spoken words per minute, plus visual cues and per-platform extras
+        self.words_per_second = 2.5
+        self.tokens_per_word = 1.3
+        self.direction_overhead = 2.0
+        self.platform_token_overhead = {'tiktok': 120, 'instagram': 120, 'facebook': 150, 'youtube': 300}
+        self.max_script_tokens = 2048
         
         # Script templates for different niches
         self.script_templates = {
@@ -205,7 +1062,7 @@ class ContentScriptGenerator:
             }
         }
     
-    async def generate_script(self, request: ContentRequest) -> Dict:
+    async def generate_script(self, request: ContentRequest, variation: int = 0, feedback: str = "") -> Dict:
         """Generate a video script based on content request"""
         logger.info(f"Generating script for {request.niche} on {request.platform}")
         
@@ -213,17 +1070,29 @@ class ContentScriptGenerator:
         template = self.script_templates.get(request.niche, self.script_templates['ai_technology'])
         
         # Create detailed prompt
-        prompt = self.create_script_prompt(request, template)
+        prompt = self.create_script_prompt(request, template, variation, feedback)
         
-        # Generate script using AI
-        script_content = await self.ollama.generate_content(prompt)
+        # Generate script using the routed model. Requests in the same cell share a prompt, so a cached
+        # response would only hand back a script the similarity index has already seen
+        model = self.router.choose(request)
+        # The router compares models, so it learns from time spent in the model, not in the LLM queue
+        timing = {}
+        script_content = await self.ollama.generate_content(
+            prompt, model, system=self.system_prompt, num_predict=self.token_budget(request), use_cache=False,
+            timing=timing
+        )
+        latency = timing.get('seconds', 0.0)
         
         if not script_content:
+            self.router.record(request, model, latency, 0.0, False)
             logger.error("Failed to generate script content")
             return {}
         
         # Parse and structure the script
-        structured_script = self.structure_script(script_content, request)
+        with tracer.span('script.analyze', chars=len(script_content)):
+            structured_script = self.structure_script(script_content, request)
+            analysis = self.analytics.analyze(script_content, request.duration)
+        self.router.record(request, model, latency, analysis['quality_score'], True)
         
         # Add metadata
         script_data = {
@@ -234,9 +1103,11 @@ class ContentScriptGenerator:
             'duration': request.duration,
             'script': structured_script,
             'metadata': {
-                'word_count': len(script_content.split()),
-                'estimated_duration': self.estimate_duration(script_content),
-                'quality_score': self.calculate_quality_score(script_content),
+                'word_count': analysis['word_count'],
+                'estimated_duration': analysis['estimated_duration'],
+                'quality_score': analysis['quality_score'],
+                'quality_gaps': analysis['quality_gaps'],
+                'model': model,
                 'trending_keywords': request.trending_keywords or [],
                 'affiliate_products': request.affiliate_products or []
             },
@@ -246,140 +1117,943 @@ class ContentScriptGenerator:
         logger.info(f"Generated script: {script_data['id']}")
         return script_data
     
-    def create_script_prompt(self, request: ContentRequest, template: Dict) -> str:
-        """Create detailed prompt for script generation"""
-        
-        platform_specs = {
-            'tiktok': 'TikTok (vertical, 30-60 seconds, trending sounds, hashtags)',
-            'youtube': 'YouTube (horizontal, 8-15 minutes, SEO optimized, engaging)',
-            'instagram': 'Instagram Reels (vertical, 30-90 seconds, visual appeal)',
-            'facebook': 'Facebook (square/horizontal, 1-3 minutes, shareable)'
-        }
+    def create_script_prompt(self, request: ContentRequest, template: Dict, variation: int = 0, feedback: str = "") -> str:
+        """Create the per-request part of the script prompt; static instructions live in SCRIPT_SYSTEM_PROMPT"""
         
         prompt = f"""
 Create a viral {request.platform} video script for the {request.niche} niche.
 
-PLATFORM: {platform_specs.get(request.platform, request.platform)}
+PLATFORM: {request.platform}
 DURATION: {request.duration} seconds
 STYLE: {request.style}
 TARGET AUDIENCE: {request.target_audience}
-
-REQUIREMENTS:
-1. Hook viewers in the first 3 seconds
-2. Provide valuable, actionable information
-3. Include a strong call-to-action
-4. Optimize for {request.platform} algorithm
-5. Make it engaging and shareable
-
-STRUCTURE:
-- Hook (3 seconds): Attention-grabbing opening
-- Content (80% of video): Main value/information
-- CTA (10% of video): Clear call-to-action
-
 TONE: {template['tone']}
 
 {f"TRENDING KEYWORDS TO INCLUDE: {', '.join(request.trending_keywords)}" if request.trending_keywords else ""}
 
 {f"AFFILIATE PRODUCTS TO MENTION: {', '.join(request.affiliate_products)}" if request.affiliate_products else ""}
 
-Generate a complete script with:
-1. Exact words to say
-2. Visual cues and directions
-3. Text overlays suggestions
-4. Hashtag recommendations
-5. Music/sound suggestions
+{f"VARIATION {variation}: Use a different hook, angle and examples than a typical script on this topic." if variation else ""}
 
-Make it viral-worthy and optimized for maximum engagement!
+{f"REVISION NOTES: {feedback}" if feedback else ""}
 """
         
         return prompt
     
+    def token_budget(self, request: ContentRequest) -> int:
+        """num_predict for a script: spoken words for the target duration, cues and platform extras"""
+        spoken_tokens = request.duration * self.words_per_second * self.tokens_per_word
+        budget = spoken_tokens * self.direction_overhead + self.platform_token_overhead.get(request.platform, 150)
+        return int(min(budget, self.max_script_tokens))
+    
     def structure_script(self, content: str, request: ContentRequest) -> Dict:
         """Structure the generated script into components"""
-        
-        # Simple parsing - in production, use more sophisticated NLP
-        lines = content.split('\n')
-        
-        script_structure = {
-            'hook': '',
-            'main_content': '',
-            'call_to_action': '',
-            'visual_cues': [],
-            'text_overlays': [],
-            'hashtags': [],
-            'music_suggestions': []
-        }
-        
-        current_section = 'main_content'
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Identify sections
-            if 'hook' in line.lower() or 'opening' in line.lower():
-                current_section = 'hook'
-            elif 'cta' in line.lower() or 'call-to-action' in line.lower() or 'call to action' in line.lower():
-                current_section = 'call_to_action'
-            elif 'visual' in line.lower():
-                current_section = 'visual_cues'
-            elif 'text overlay' in line.lower() or 'overlay' in line.lower():
-                current_section = 'text_overlays'
-            elif 'hashtag' in line.lower():
-                current_section = 'hashtags'
-            elif 'music' in line.lower() or 'sound' in line.lower():
-                current_section = 'music_suggestions'
-            else:
-                # Add content to current section
-                if current_section in ['hook', 'main_content', 'call_to_action']:
-                    script_structure[current_section] += line + ' '
-                else:
-                    script_structure[current_section].append(line)
-        
-        # Clean up text sections
-        for key in ['hook', 'main_content', 'call_to_action']:
-            script_structure[key] = script_structure[key].strip()
-        
-        return script_structure
+        return self.analytics.structure(content)
     
     def estimate_duration(self, content: str) -> int:
         """Estimate video duration based on script length"""
-        words = len(content.split())
-        # Average speaking rate: 150-160 words per minute
-        estimated_seconds = (words / 155) * 60
-        return int(estimated_seconds)
+        return self.analytics.analyze(content)['estimated_duration']
     
-    def calculate_quality_score(self, content: str) -> float:
+    def calculate_quality_score(self, content: str, duration: Optional[int] = None) -> float:
         """Calculate quality score for the script"""
-        score = 0.0
-        
-        # Check for hook elements
-        hook_words = ['did you know', 'this will', 'secret', 'amazing', 'incredible', 'shocking']
-        if any(word in content.lower() for word in hook_words):
-            score += 20
+        return self.analytics.analyze(content, duration)['quality_score']
+
+class ScriptSimilarityIndex:
+    """SimHash index over recent scripts for near-duplicate detection"""
+    
+    def __init__(self, index_path: Path = Path("/opt/content-storage/index/script_simhash.log"),
+                 capacity: int = 500000, max_distance: int = 3, shingle_size: int = 3):
+        self.index_path = index_path
+        self.capacity = capacity  # Most recent scripts kept in the index
+        self.max_distance = max_distance  # Hamming distance at or below which scripts are near-duplicates
+        self.shingle_size = shingle_size
         
-        # Check for call-to-action
-        cta_words = ['subscribe', 'follow', 'like', 'comment', 'share', 'click', 'visit']
-        if any(word in content.lower() for word in cta_words):
-            score += 20
+        # 64-bit fingerprints split into 16-bit bands: two fingerprints within 3 bits share at least one band
+        self.band_count = 4
+        self.band_bits = 16
+        self.band_tables = [{} for _ in range(self.band_count)]
         
-        # Check for engagement elements
-        engagement_words = ['you', 'your', 'question', 'comment', 'think', 'experience']
-        engagement_count = sum(1 for word in engagement_words if word in content.lower())
-        score += min(engagement_count * 5, 20)
+        self.entries = {}  # sequence -> (fingerprint, script_id)
+        self.order = deque()  # Insertion order for eviction; released sequences are compacted out
+        self.reserved = {}  # script_id -> sequence of scripts indexed in memory but not yet persisted
+        self.next_sequence = 0
+        self.log_file = None
         
-        # Check length appropriateness
-        word_count = len(content.split())
-        if 100 <= word_count <= 300:  # Good length for short-form content
-            score += 20
+        self.load()
+    
+    def fingerprint(self, text: str) -> int:
+        """Compute the 64-bit SimHash of a script's word shingles"""
+        words = re.findall(r'[a-z0-9]+', text.lower())
+        if len(words) < self.shingle_size:
+            shingles = [' '.join(words)] if words else []
+        else:
+            shingles = [' '.join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
         
-        # Check for value proposition
-        value_words = ['learn', 'discover', 'find out', 'reveal', 'show', 'teach', 'help']
-        if any(word in content.lower() for word in value_words):
-            score += 20
+        if not shingles:
+            return 0
         
-        return min(score, 100.0)
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), 'little') for s in shingles],
+            dtype=np.uint64
+        )
+        bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+        votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+        
+        return int.from_bytes(np.packbits(votes > 0, bitorder='little').tobytes(), 'little')
+    
+    def script_text(self, script_data: Dict) -> str:
+        """Text that identifies a script for duplicate purposes"""
+        script = script_data['script']
+        return f"{script['hook']} {script['main_content']} {script['call_to_action']}"
+    
+    def bands(self, fingerprint: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (i * self.band_bits)) & mask for i in range(self.band_count)]
+    
+    def find_near_duplicate(self, fingerprint: int) -> Optional[str]:
+        """Return the script id of an indexed near-duplicate, if any"""
+        for band_table, band in zip(self.band_tables, self.bands(fingerprint)):
+            for sequence in band_table.get(band, ()):
+                candidate, script_id = self.entries[sequence]
+                if bin(candidate ^ fingerprint).count('1') <= self.max_distance:
+                    return script_id
+        return None
+    
+    def add(self, fingerprint: int, script_id: str, persist: bool = True):
+        """Index a fingerprint, evicting the oldest entry beyond capacity"""
+        sequence = self.next_sequence
+        self.next_sequence += 1
+        
+        self.entries[sequence] = (fingerprint, script_id)
+        self.order.append(sequence)
+        for band_table, band in zip(self.band_tables, self.bands(fingerprint)):
+            band_table.setdefault(band, set()).add(sequence)
+        
+        while len(self.entries) > self.capacity:
+            self.remove(self.order.popleft())
+        
+        if persist:
+            self.append_to_log(fingerprint, script_id)
+        return sequence
+    
+    def remove(self, sequence: int):
+        """Drop an entry from the band tables; unknown sequences are ignored"""
+        entry = self.entries.pop(sequence, None)
+        if entry is None:
+            return
+        
+        for band_table, band in zip(self.band_tables, self.bands(entry[0])):
+            bucket = band_table[band]
+            bucket.discard(sequence)
+            if not bucket:
+                del band_table[band]
+    
+    def check_and_reserve(self, script_data: Dict) -> Optional[str]:
+        """Return the id of a near-duplicate script, or reserve this script's fingerprint and return None
+        
+        The reservation blocks concurrent near-duplicates but is only written to the log by commit(),
+        once the video is persisted; release() drops it when rendering or storing fails.
+        """
+        fingerprint = self.fingerprint(self.script_text(script_data))
+        duplicate_of = self.find_near_duplicate(fingerprint)
+        
+        if duplicate_of is None:
+            self.reserved[script_data['id']] = self.add(fingerprint, script_data['id'], persist=False)
+        
+        return duplicate_of
+    
+    def commit(self, script_data: Dict):
+        """Persist a produced script's fingerprint, indexing it first when it was not reserved by this process"""
+        sequence = self.reserved.pop(script_data['id'], None)
+        if sequence in self.entries:
+            self.append_to_log(*self.entries[sequence])
+        else:
+            # Resumed from a checkpoint written by an earlier run, or evicted while rendering
+            self.add(self.fingerprint(self.script_text(script_data)), script_data['id'])
+    
+    def release(self, script_id: str):
+        """Forget the reservation of a script that was never persisted"""
+        sequence = self.reserved.pop(script_id, None)
+        if sequence is not None:
+            self.remove(sequence)
+            
+            # Rebuild the eviction order once released sequences make up half of it
+            if len(self.order) > 2 * len(self.entries):
+                self.order = deque(sequence for sequence in self.order if sequence in self.entries)
+    
+    def load(self):
+        """Rebuild the in-memory index from the on-disk log"""
+        if not self.index_path.exists():
+            return
+        
+        try:
+            with open(self.index_path) as f:
+                lines = deque(f, maxlen=self.capacity)
+            
+            for line in lines:
+                fingerprint, script_id = line.split()
+                self.add(int(fingerprint, 16), script_id, persist=False)
+            
+            # Compact the log so it never grows far beyond the indexed window
+            if len(lines) == self.capacity:
+                temp_path = self.index_path.with_suffix('.tmp')
+                with open(temp_path, 'w') as f:
+                    f.writelines(lines)
+                os.replace(temp_path, self.index_path)
+            
+            logger.info(f"Loaded {len(self.entries)} script fingerprints")
+        
+        except Exception as e:
+            logger.warning(f"Error loading script similarity index: {e}")
+    
+    def append_to_log(self, fingerprint: int, script_id: str):
+        try:
+            if self.log_file is None:
+                self.index_path.parent.mkdir(parents=True, exist_ok=True)
+                self.log_file = open(self.index_path, 'a')
+            
+            self.log_file.write(f"{fingerprint:016x} {script_id}\n")
+            self.log_file.flush()
+        
+        except Exception as e:
+            logger.warning(f"Error persisting script fingerprint: {e}")
+
+class QualityGate:
+    """Holds low-scoring scripts back from rendering, regenerating them within a shared budget"""
+    
+    # Prompt instruction for each unmet scoring criterion
+    REVISIONS = {
+        'hook': "Open with a strong hook such as a surprising question or 'Did you know...'.",
+        'cta': "End with an explicit call to action: subscribe, follow or comment.",
+        'engagement': "Speak to the viewer directly (you, your) and ask them a question about their experience.",
+        'length': "Keep the spoken script between {low} and {high} words.",
+        'value': "Say clearly what the viewer will learn or discover."
+    }
+    
+    def __init__(self, default_threshold: float = 60.0, max_regenerations: int = 2,
+                 budget_share: float = 0.15, min_budget: int = 10):
+        # Minimum script quality score worth rendering, per platform
+        self.thresholds = {'youtube': 80.0, 'tiktok': 60.0, 'instagram': 60.0, 'facebook': 60.0}
+        self.default_threshold = default_threshold
+        self.max_regenerations = max_regenerations  # Per request
+        # Regenerations per reviewed request, so a weak model cannot turn LLM time into the bottleneck
+        self.budget_share = budget_share
+        self.min_budget = min_budget
+        
+        self.reviewed = 0
+        self.passed = 0
+        self.regenerations = 0
+        self.rescued = 0  # Passed after at least one regeneration
+        self.rejected = 0
+        self.budget_denied = 0
+        self.render_seconds_saved = 0.0
+    
+    def threshold(self, platform: str) -> float:
+        return self.thresholds.get(platform, self.default_threshold)
+    
+    def may_regenerate(self) -> bool:
+        return self.regenerations < max(self.min_budget, self.budget_share * self.reviewed)
+    
+    def review(self, request: ContentRequest, script_data: Dict, regenerations: int) -> str:
+        """'pass', 'regenerate' or 'reject' for a script on its attempt after the given regenerations"""
+        if regenerations == 0:
+            self.reviewed += 1
+        
+        if script_data['metadata']['quality_score'] >= self.threshold(request.platform):
+            self.passed += 1
+            if regenerations:
+                self.rescued += 1
+            return 'pass'
+        
+        if regenerations < self.max_regenerations:
+            if self.may_regenerate():
+                self.regenerations += 1
+                return 'regenerate'
+            self.budget_denied += 1
+        
+        # Planned render-seconds when known, else assume a render takes as long as the video runs
+        self.rejected += 1
+        self.render_seconds_saved += request.estimated_cost or request.duration
+        return 'reject'
+    
+    def feedback(self, script_data: Dict) -> str:
+        """Revision instructions for the criteria the previous draft missed"""
+        gaps = script_data['metadata'].get('quality_gaps', [])
+        low, high = ScriptAnalyticsEngine.length_window(script_data.get('duration'))
+        notes = ' '.join(self.REVISIONS[gap].format(low=low, high=high) for gap in gaps if gap in self.REVISIONS)
+        return f"The previous draft scored {script_data['metadata']['quality_score']:.0f}/100. {notes}"
+    
+    def get_metrics(self) -> Dict:
+        """Gate outcomes, regeneration budget use and render time saved"""
+        return {
+            'reviewed': self.reviewed,
+            'passed': self.passed,
+            'regenerations': self.regenerations,
+            'rescued': self.rescued,
+            'rejected': self.rejected,
+            'budget_denied': self.budget_denied,
+            'pass_rate': self.passed / self.reviewed if self.reviewed else 0.0,
+            'first_pass_rate': (self.passed - self.rescued) / self.reviewed if self.reviewed else 0.0,
+            'render_minutes_saved': round(self.render_seconds_saved / 60, 1)
+        }
+
+class RequestCheckpoint:
+    """Completed stages and their artifacts for one content request"""
+    
+    def __init__(self, store: 'ProductionCheckpointStore', path: Path, data: Dict):
+        self.store = store
+        self.path = path
+        self.data = data
+    
+    def get(self, stage: str):
+        """Return the artifact recorded for a stage, or None"""
+        return self.data['stages'].get(stage)
+    
+    def get_path(self, stage: str) -> str:
+        """Return a file artifact only if it is still on disk"""
+        artifact = self.get(stage)
+        if artifact and Path(artifact).exists():
+            return artifact
+        return ""
+    
+    def done(self, stage: str) -> bool:
+        return stage in self.data['stages']
+    
+    def mark(self, stage: str, artifact):
+        """Record a completed stage and persist the checkpoint"""
+        self.data['stages'][stage] = artifact
+        self.data['updated_at'] = datetime.now().isoformat()
+        self.store.write_json(self.path, self.data)
+
+class ProductionCheckpointStore:
+    """Per-request stage checkpoints so interrupted production can resume"""
+    
+    STAGES = ['script', 'voiceover', 'background', 'final_encode', 'stored', 'persisted']
+    
+    def __init__(self, root: Path = Path("/opt/content-storage/checkpoints"), retention_days: int = 7):
+        self.root = root
+        self.retention_days = retention_days
+    
+    def day_dir(self, day: str) -> Path:
+        return self.root / day
+    
+    def request_key(self, request: ContentRequest, index: int, day: str) -> str:
+        """Deterministic key for the index-th request of a day's plan"""
+        payload = json.dumps({'day': day, 'index': index, 'request': asdict(request)}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+    
+    def write_json(self, path: Path, data):
+        """Write JSON atomically so a crash never leaves a half-written checkpoint"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+    
+    def save_plan(self, day: str, requests: List[ContentRequest]):
+        """Persist a day's request plan, assigning each request its checkpoint key"""
+        for index, request in enumerate(requests):
+            request.checkpoint_key = self.request_key(request, index, day)
+        
+        try:
+            self.write_json(self.day_dir(day) / "plan.json", [asdict(r) for r in requests])
+        except Exception as e:
+            logger.error(f"Error saving production plan: {e}")
+        
+        self.prune()
+    
+    def load_plan(self, day: str) -> Optional[List[ContentRequest]]:
+        """Load the request plan saved earlier today, if any"""
+        plan_path = self.day_dir(day) / "plan.json"
+        if not plan_path.exists():
+            return None
+        
+        try:
+            with open(plan_path) as f:
+                return [ContentRequest(**fields) for fields in json.load(f)]
+        except Exception as e:
+            logger.error(f"Error loading production plan: {e}")
+            return None
+    
+    def open(self, day: str, key: str) -> RequestCheckpoint:
+        """Open (or start) the checkpoint for a request"""
+        path = self.day_dir(day) / f"{key}.json"
+        data = {'key': key, 'stages': {}}
+        
+        if path.exists():
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except Exception as e:
+                logger.warning(f"Discarding unreadable checkpoint {path}: {e}")
+        
+        return RequestCheckpoint(self, path, data)
+    
+    def prune(self):
+        """Remove checkpoint directories older than the retention window"""
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+        
+        try:
+            if not self.root.exists():
+                return
+            for day_dir in self.root.iterdir():
+                if day_dir.is_dir() and day_dir.name < cutoff:
+                    shutil.rmtree(day_dir, ignore_errors=True)
+        except Exception as e:
+            logger.warning(f"Error pruning checkpoints: {e}")
+
+class ProcessSupervisor:
+    """Runs child processes in their own process group with stage timeouts, bounded output capture and FFmpeg progress"""
+    
+    def __init__(self, default_timeout: float = 1800, stall_timeout: float = 120, output_limit: int = 64 * 1024):
+        # Seconds a stage may run before its process group is killed; unlisted stages (encodes) get the default
+        self.stage_timeouts = {
+            'espeak': 120,
+            'ffmpeg.thumbnail': 120,
+            'ffmpeg.join': 300,
+            'ffmpeg.chunk_join': 300,
+            'ffmpeg.quality_check': 900,
+            'ffmpeg.archive': 3600
+        }
+        self.default_timeout = default_timeout
+        self.stall_timeout = stall_timeout  # FFmpeg jobs are killed after this long without a progress report
+        self.output_limit = output_limit  # Bytes of stdout and stderr tail kept per process
+        self.poll_interval = 1.0
+        
+        self.active_jobs = {}
+        self.kills = {'timeout': 0, 'stalled': 0, 'cancelled': 0}
+    
+    async def run(self, name: str, cmd: List[str], launcher: List[str] = (), duration: Optional[float] = None,
+                  stdin: Optional[int] = None, stdout: Optional[int] = None,
+                  pass_fds: Tuple[int, ...] = ()) -> Tuple[int, bytes, bytes]:
+        """Run one command to completion or until it is killed; returns (returncode, stdout tail, stderr tail)
+        
+        A pipe end passed as stdin or stdout is handed over to the child and closed here once it has started.
+        launcher is a command prefix that execs the command, such as taskset pinning it to leased CPUs.
+        """
+        progress = Path(cmd[0]).name.startswith("ffmpeg") and stdout is None
+        if progress:
+            # Machine-readable progress blocks on stdout instead of the interactive status line on stderr
+            cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+        cmd = [*launcher, *cmd]
+        timeout = self.stage_timeouts.get(name, self.default_timeout)
+        
+        # Spawned outside asyncio, whose child watcher reaps with waitpid and so never sees the child's rusage
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL if stdin is None else stdin,
+                stdout=subprocess.PIPE if stdout is None else stdout,
+                stderr=subprocess.PIPE,
+                pass_fds=pass_fds,
+                start_new_session=True  # Own process group, so a kill also reaches anything it spawned
+            )
+        finally:
+            # The other end only sees EOF once no process but the child holds this one
+            for fd in (stdin, stdout):
+                if fd is not None:
+                    os.close(fd)
+        
+        loop = asyncio.get_running_loop()
+        exited = loop.create_future()
+        threading.Thread(target=self.reap, args=(process, loop, exited), name=f"reap-{process.pid}", daemon=True).start()
+        
+        started = time.time()
+        job = {
+            'name': name, 'pid': process.pid, 'started': started, 'updated': started, 'duration': duration,
+            'frame': 0, 'fps': 0.0, 'speed': 0.0, 'out_time': 0.0, 'eta': None
+        }
+        self.active_jobs[process.pid] = job
+        stdout_tail, stderr_tail = bytearray(), bytearray()
+        transports = []
+        readers = None
+        
+        reason = None
+        try:
+            streams = [self.capture(await self.open_reader(process.stderr, transports), stderr_tail), exited]
+            if progress:
+                streams.append(self.read_progress(await self.open_reader(process.stdout, transports), job))
+            elif process.stdout:
+                streams.append(self.capture(await self.open_reader(process.stdout, transports), stdout_tail))
+            readers = asyncio.ensure_future(asyncio.gather(*streams))
+            readers.add_done_callback(lambda future: future.cancelled() or future.exception())  # Retrieved when cancelled
+            
+            while not readers.done():
+                await asyncio.wait({readers}, timeout=self.poll_interval)
+                if readers.done():
+                    break
+                
+                now = time.time()
+                if now - started > timeout:
+                    reason = 'timeout'
+                elif progress and now - job['updated'] > self.stall_timeout:
+                    reason = 'stalled'
+                if reason:
+                    logger.warning(f"Killing {name} (pid {process.pid}): {reason} after {now - started:.0f}s")
+                    self.kill(process)
+                    self.kills[reason] += 1
+                    break
+            
+            await readers
+        
+        except asyncio.CancelledError:
+            self.kill(process)
+            self.kills['cancelled'] += 1
+            if readers:
+                readers.cancel()
+            raise
+        
+        finally:
+            for transport in transports:
+                transport.close()
+            self.active_jobs.pop(process.pid, None)
+            if exited.done() and not exited.cancelled():
+                self.charge(exited.result()[1])
+            span = CURRENT_SPAN.get()
+            if span and progress:
+                span.set(frames=job['frame'], fps=job['fps'], speed=job['speed'])
+            if span and reason:
+                span.set(killed=reason)
+        
+        if reason:
+            stderr_tail += f"\n[{name} killed: {reason}]".encode()
+        return exited.result()[0], bytes(stdout_tail), bytes(stderr_tail)
+    
+    @staticmethod
+    async def open_reader(pipe, transports: List) -> asyncio.StreamReader:
+        """Stream reader over one of a child's output pipes; the transport is closed by the caller"""
+        reader = asyncio.StreamReader()
+        transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), pipe
+        )
+        transports.append(transport)
+        return reader
+    
+    @staticmethod
+    def reap(process: subprocess.Popen, loop: asyncio.AbstractEventLoop, exited: asyncio.Future):
+        """Wait for a child on a thread of its own, read its storage I/O while it is a zombie, then reap it for its rusage"""
+        report = {}
+        try:
+            os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+            with open(f"/proc/{process.pid}/io") as f:
+                io = {key: int(value) for key, value in (line.split(": ") for line in f)}
+            # Bytes fetched from and sent to the storage layer; rchar and wchar would also count pipes and page cache
+            report.update(read_bytes=io['read_bytes'], write_bytes=io['write_bytes'])
+        except (AttributeError, OSError, KeyError, ValueError):
+            pass  # No waitid or /proc outside Linux: rusage only
+        
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        report.update(user=usage.ru_utime, system=usage.ru_stime, max_rss_kb=usage.ru_maxrss)
+        try:
+            loop.call_soon_threadsafe(lambda: exited.done() or exited.set_result((process.returncode, report)))
+        except RuntimeError:
+            pass  # The loop closed while the child was still running
+    
+    @staticmethod
+    def charge(report: Dict):
+        """Add a finished child's rusage and I/O counters to the current video's usage and span"""
+        usage = CURRENT_USAGE.get()
+        if usage:
+            usage.add_process(report)
+        span = CURRENT_SPAN.get()
+        if span:
+            span.set(cpu_user=round(report['user'], 3), cpu_system=round(report['system'], 3),
+                     max_rss_kb=report['max_rss_kb'], bytes_written=report.get('write_bytes', 0))
+    
+    @staticmethod
+    def kill(process):
+        """SIGKILL the process group of a child started in its own session"""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    
+    async def capture(self, stream: asyncio.StreamReader, tail: bytearray):
+        """Drain a stream, keeping only its last output_limit bytes"""
+        while chunk := await stream.read(65536):
+            tail += chunk
+            if len(tail) > self.output_limit:
+                del tail[:len(tail) - self.output_limit]
+    
+    async def read_progress(self, stream: asyncio.StreamReader, job: Dict):
+        """Parse FFmpeg's key=value progress blocks into the job's frame, fps, speed and ETA"""
+        while line := await stream.readline():
+            key, _, value = line.decode(errors='replace').strip().partition('=')
+            try:
+                if key == 'frame':
+                    job['frame'] = int(value)
+                elif key == 'fps':
+                    job['fps'] = float(value)
+                elif key in ('out_time_us', 'out_time_ms') and value != 'N/A':
+                    job['out_time'] = int(value) / 1e6  # Both keys are microseconds
+                elif key == 'speed' and value != 'N/A':
+                    job['speed'] = float(value.rstrip('x'))
+            except ValueError:
+                continue
+            
+            if key == 'progress':
+                # One block per report; the last key marks it complete
+                job['updated'] = time.time()
+                if job['duration'] and job['speed'] > 0:
+                    job['eta'] = max(0.0, (job['duration'] - job['out_time']) / job['speed'])
+    
+    def get_active_jobs(self) -> List[Dict]:
+        """Running processes with their progress and ETA"""
+        now = time.time()
+        return [
+            {**job, 'elapsed': round(now - job['started'], 1), 'eta': round(job['eta'], 1) if job['eta'] is not None else None}
+            for job in self.active_jobs.values()
+        ]
+    
+    def get_metrics(self) -> Dict:
+        """Running process count and kills by reason"""
+        return {'active': len(self.active_jobs), 'kills': dict(self.kills)}
+
+class ContentStore:
+    """Content-addressed artifact storage with a SQLite index and hot/archive retention tiers"""
+    
+    def __init__(self, root: Path = Path("/opt/content-storage"), ffmpeg_path: str = "/usr/bin/ffmpeg",
+                 hot_quota_gb: float = 500, archive_quota_gb: float = 2000,
+                 hot_days: int = 30, archive_days: int = 365, supervisor: Optional[ProcessSupervisor] = None):
+        self.root = root
+        self.supervisor = supervisor or ProcessSupervisor()
+        self.ffmpeg_path = ffmpeg_path
+        self.objects_path = root / "objects"
+        self.index_path = root / "index" / "content.db"
+        
+        # Hot items are served as rendered; archived videos are re-encoded smaller, then evicted
+        self.tiers = {
+            'hot': {'quota': hot_quota_gb * 1024 ** 3, 'max_age': hot_days * 86400},
+            'archive': {'quota': archive_quota_gb * 1024 ** 3, 'max_age': archive_days * 86400}
+        }
+        self.archive_crf = 30
+        
+        self.db = None
+    
+    def connect(self) -> sqlite3.Connection:
+        if self.db is None:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(self.index_path, timeout=30)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.executescript("""
+                CREATE TABLE IF NOT EXISTS objects (
+                    hash TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    tier TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_objects_tier ON objects (tier, last_used);
+                CREATE TABLE IF NOT EXISTS refs (
+                    video_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (video_id, kind)
+                );
+                CREATE INDEX IF NOT EXISTS idx_refs_hash ON refs (hash);
+                CREATE TABLE IF NOT EXISTS relocations (
+                    video_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    path TEXT,
+                    moved_at REAL NOT NULL,
+                    PRIMARY KEY (video_id, kind)
+                );
+            """)
+        return self.db
+    
+    def hash_file(self, path: str) -> Tuple[str, int]:
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), size
+    
+    def object_path(self, tier: str, digest: str, suffix: str) -> Path:
+        # One level of fan-out keeps directories small; one file per unique artifact bounds inodes
+        return self.objects_path / tier / digest[:2] / f"{digest}{suffix}"
+    
+    def place(self, source: str, target: Path):
+        """Hardlink the artifact into the store when on the same filesystem, copy otherwise"""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            shutil.copy2(source, temp_path)
+        os.replace(temp_path, target)
+    
+    async def put(self, path: str, video_id: str, kind: str) -> str:
+        """Store an artifact for a video and return its stored path; identical content is kept once"""
+        digest, size = await asyncio.to_thread(self.hash_file, path)
+        db = self.connect()
+        now = time.time()
+        
+        row = db.execute("SELECT path FROM objects WHERE hash = ?", (digest,)).fetchone()
+        if row and Path(row[0]).exists():
+            stored_path = row[0]
+            db.execute("UPDATE objects SET last_used = ? WHERE hash = ?", (now, digest))
+            logger.debug(f"Deduplicated {kind} for {video_id} against {digest[:12]}")
+        else:
+            target = self.object_path('hot', digest, Path(path).suffix)
+            await asyncio.to_thread(self.place, path, target)
+            stored_path = str(target)
+            db.execute(
+                "INSERT OR REPLACE INTO objects (hash, kind, tier, path, size, created_at, last_used) VALUES (?, ?, 'hot', ?, ?, ?, ?)",
+                (digest, kind, stored_path, size, now, now)
+            )
+        
+        db.execute(
+            "INSERT OR REPLACE INTO refs (video_id, kind, hash, created_at) VALUES (?, ?, ?, ?)",
+            (video_id, kind, digest, now)
+        )
+        db.commit()
+        
+        return stored_path
+    
+    def resolve(self, video_id: str, kind: str = 'video') -> Optional[str]:
+        """Current path of a video's artifact, wherever its tier has moved it"""
+        row = self.connect().execute(
+            "SELECT o.path FROM refs r JOIN objects o ON o.hash = r.hash WHERE r.video_id = ? AND r.kind = ?",
+            (video_id, kind)
+        ).fetchone()
+        return row[0] if row else None
+    
+    async def archive(self, digest: str, kind: str, path: str) -> Tuple[str, str, int]:
+        """Move an object to the archive tier, re-encoding videos at a lower bitrate; returns (hash, path, size)
+        
+        A re-encoded video is different content, so it is filed under the hash of its own bytes.
+        """
+        suffix = Path(path).suffix
+        
+        if kind == 'video':
+            temp_path = self.objects_path / 'archive' / f".{digest}.tmp{suffix}"
+            temp_path.parent.mkdir(parents=True, exist_ok=True)
+            cmd = [
+                self.ffmpeg_path, "-y", "-i", path,
+                "-c:v", "libx264", "-preset", "medium", "-crf", str(self.archive_crf),
+                "-c:a", "aac", "-b:a", "64k",
+                str(temp_path)
+            ]
+            returncode, _, _ = await self.supervisor.run("ffmpeg.archive", cmd)
+            
+            if returncode == 0 and temp_path.stat().st_size < Path(path).stat().st_size:
+                new_digest, size = await asyncio.to_thread(self.hash_file, str(temp_path))
+                target = self.object_path('archive', new_digest, suffix)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(temp_path, target)
+                os.remove(path)
+                return new_digest, str(target), size
+            
+            temp_path.unlink(missing_ok=True)
+        
+        target = self.object_path('archive', digest, suffix)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(shutil.move, path, target)
+        return digest, str(target), target.stat().st_size
+    
+    def relocate(self, db: sqlite3.Connection, digest: str, path: Optional[str]):
+        """Queue the new path (None once evicted) of every video artifact referencing an object"""
+        db.execute(
+            "INSERT OR REPLACE INTO relocations (video_id, kind, path, moved_at) SELECT video_id, kind, ?, ? FROM refs WHERE hash = ?",
+            (path, time.time(), digest)
+        )
+    
+    def pending_relocations(self) -> List[Tuple[str, str, Optional[str], float]]:
+        """Moved or evicted artifacts whose new location has not been propagated yet"""
+        return self.connect().execute("SELECT video_id, kind, path, moved_at FROM relocations").fetchall()
+    
+    def clear_relocations(self, relocations: List[Tuple[str, str, Optional[str], float]]):
+        """Drop propagated relocations, keeping any that moved again in the meantime"""
+        db = self.connect()
+        db.executemany(
+            "DELETE FROM relocations WHERE video_id = ? AND kind = ? AND moved_at = ?",
+            [(video_id, kind, moved_at) for video_id, kind, _, moved_at in relocations]
+        )
+        db.commit()
+    
+    def evict(self, digest: str, path: str):
+        Path(path).unlink(missing_ok=True)
+        db = self.connect()
+        self.relocate(db, digest, None)
+        db.execute("DELETE FROM refs WHERE hash = ?", (digest,))
+        db.execute("DELETE FROM objects WHERE hash = ?", (digest,))
+        db.commit()
+    
+    def overdue(self, tier: str) -> List[Tuple[str, str, str, int]]:
+        """Objects past the tier's age limit, then the oldest ones needed to get back under quota"""
+        limits = self.tiers[tier]
+        cutoff = time.time() - limits['max_age']
+        rows = self.connect().execute(
+            "SELECT hash, kind, path, size, last_used FROM objects WHERE tier = ? ORDER BY last_used",
+            (tier,)
+        ).fetchall()
+        
+        total = sum(row[3] for row in rows)
+        selected = []
+        for digest, kind, path, size, last_used in rows:
+            if last_used >= cutoff and total <= limits['quota']:
+                break
+            selected.append((digest, kind, path, size))
+            total -= size
+        
+        return selected
+    
+    async def enforce_retention(self) -> Dict:
+        """Archive aged or over-quota hot objects and evict aged or over-quota archived ones"""
+        archived = evicted = 0
+        
+        try:
+            for digest, kind, path, size in self.overdue('hot'):
+                if not Path(path).exists():
+                    self.evict(digest, path)
+                    continue
+                new_digest, new_path, new_size = await self.archive(digest, kind, path)
+                db = self.connect()
+                db.execute(
+                    "UPDATE OR REPLACE objects SET hash = ?, tier = 'archive', path = ?, size = ? WHERE hash = ?",
+                    (new_digest, new_path, new_size, digest)
+                )
+                db.execute("UPDATE refs SET hash = ? WHERE hash = ?", (new_digest, digest))
+                self.relocate(db, new_digest, new_path)
+                db.commit()
+                archived += 1
+            
+            for digest, kind, path, size in self.overdue('archive'):
+                self.evict(digest, path)
+                evicted += 1
+            
+        except Exception as e:
+            logger.error(f"Error enforcing storage retention: {e}")
+        
+        if archived or evicted:
+            logger.info(f"Storage retention: archived {archived}, evicted {evicted} objects")
+        
+        return {'archived': archived, 'evicted': evicted}
+    
+    def get_stats(self) -> Dict:
+        """Object count and bytes per tier, and how many video references share them"""
+        db = self.connect()
+        stats = {
+            tier: {'objects': count, 'bytes': total or 0}
+            for tier, count, total in db.execute("SELECT tier, COUNT(*), SUM(size) FROM objects GROUP BY tier")
+        }
+        stats['references'] = db.execute("SELECT COUNT(*) FROM refs").fetchone()[0]
+        return stats
+
+class CoreAllocator:
+    """Leases whole physical cores to encoder processes so concurrent jobs never run more threads than CPUs"""
+    
+    def __init__(self, threads_per_job: int = 4, cores: Optional[List[Tuple[int, Tuple[int, ...]]]] = None):
+        self.cores = cores or self.read_topology()
+        self.total_cpus = sum(len(cpus) for _, cpus in self.cores)
+        self.threads_per_job = max(1, min(threads_per_job, self.total_cpus))
+        self.enabled = True
+        # Pinning happens in taskset rather than a preexec_fn, which is unsafe to fork with while threads run
+        self.taskset = shutil.which("taskset")
+        self.free = set(range(len(self.cores)))
+        self.condition = asyncio.Condition()
+        self.leases = 0
+        self.waiting = 0
+        self.wait_time = 0.0
+    
+    @staticmethod
+    def read_topology() -> List[Tuple[int, Tuple[int, ...]]]:
+        """Physical cores as (numa_node, logical_cpus) from sysfs, limited to the CPUs this process may run on"""
+        if hasattr(os, 'sched_getaffinity'):
+            allowed = sorted(os.sched_getaffinity(0))
+        else:
+            allowed = list(range(os.cpu_count() or 1))
+        
+        sysfs = Path("/sys/devices/system/cpu")
+        cores = {}
+        for cpu in allowed:
+            topology = sysfs / f"cpu{cpu}" / "topology"
+            try:
+                package = int((topology / "physical_package_id").read_text())
+                core = int((topology / "core_id").read_text())
+            except (OSError, ValueError):
+                package, core = 0, cpu
+            node = next((int(link.name[4:]) for link in (sysfs / f"cpu{cpu}").glob("node[0-9]*")), 0)
+            # SMT siblings share (package, core_id) and are leased together
+            cores.setdefault((node, package, core), []).append(cpu)
+        
+        return [(node, tuple(cpus)) for (node, _, _), cpus in sorted(cores.items())]
+    
+    def cores_needed(self, threads: int) -> int:
+        """Physical cores covering the requested thread count"""
+        smt = max(1, self.total_cpus // len(self.cores))
+        return max(1, min(len(self.cores), -(-threads // smt)))
+    
+    def pick(self, count: int) -> List[int]:
+        """Free cores for one job, from the single NUMA node that fits best, else spread from the emptiest nodes"""
+        by_node = {}
+        for index in sorted(self.free):
+            by_node.setdefault(self.cores[index][0], []).append(index)
+        
+        fitting = [cores for cores in by_node.values() if len(cores) >= count]
+        if fitting:
+            return min(fitting, key=len)[:count]
+        
+        picked = []
+        for cores in sorted(by_node.values(), key=len, reverse=True):
+            picked.extend(cores[:count - len(picked)])
+        return picked
+    
+    @asynccontextmanager
+    async def lease(self, threads: Optional[int] = None):
+        """Wait for enough free cores and yield their logical CPUs
+        
+        Yields None without waiting when allocation is disabled or the job has no thread budget, so helpers
+        such as a TTS writer never hold a core the encoder they feed is waiting for.
+        """
+        if not self.enabled or not threads:
+            yield None
+            return
+        
+        count = self.cores_needed(threads)
+        start = time.time()
+        self.waiting += 1
+        try:
+            async with self.condition:
+                await self.condition.wait_for(lambda: len(self.free) >= count)
+                picked = self.pick(count)
+                self.free.difference_update(picked)
+                self.leases += 1
+                self.wait_time += time.time() - start
+        finally:
+            self.waiting -= 1
+        
+        try:
+            yield [cpu for index in picked for cpu in self.cores[index][1]]
+        finally:
+            async with self.condition:
+                self.free.update(picked)
+                self.condition.notify_all()
+    
+    def affinity(self, cpus: Optional[List[int]]) -> List[str]:
+        """Command prefix pinning the child process, and every thread it starts, to its leased CPUs"""
+        if not cpus or not self.taskset:
+            return []
+        return [self.taskset, "--cpu-list", ",".join(str(cpu) for cpu in cpus)]
+    
+    def get_metrics(self) -> Dict:
+        """Topology and lease counters"""
+        return {
+            'physical_cores': len(self.cores),
+            'logical_cpus': self.total_cpus,
+            'numa_nodes': len({node for node, _ in self.cores}),
+            'threads_per_job': self.threads_per_job,
+            'free_cores': len(self.free),
+            'waiting': self.waiting,
+            'leases': self.leases,
+            'wait_time': round(self.wait_time, 2)
+        }
 
 class VideoProductionEngine:
     """Handles video production from scripts"""
@@ -389,6 +2063,59 @@ class VideoProductionEngine:
         self.storage_path = Path("/opt/content-storage")
         self.temp_path = Path("/tmp/video_production")
         self.temp_path.mkdir(exist_ok=True)
+        # Every child process runs under one supervisor: timeouts, group kill, bounded output, live progress
+        self.supervisor = ProcessSupervisor()
+        self.content_store = ContentStore(self.storage_path, self.ffmpeg_path, supervisor=self.supervisor)
+        
+        # Branding segments rendered once per platform template and joined to each video by stream copy;
+        # off by default because they add intro and outro seconds to every published video
+        self.segment_render = False
+        self.segment_templates = {
+            'intro': {'duration': 2, 'color': '0x1a1a2e', 'text': 'BookAI Studio', 'fade': 'in',
+                      'style': 'FontSize=28,Alignment=10,PrimaryColour=&Hffffff'},
+            'outro': {'duration': 3, 'color': '0x16213e', 'text': 'Follow for more - link in bio', 'fade': 'out',
+                      'style': 'FontSize=28,Alignment=10,PrimaryColour=&Hffffff'}
+        }
+        self.segment_locks = {}
+        
+        # Fixed audio layout so every segment and video body can be concatenated without re-encoding
+        self.audio_args = ["-c:a", "aac", "-b:a", "128k", "-ar", "44100", "-ac", "2"]
+        
+        # Long renders are split into GOP-aligned chunks encoded by parallel FFmpeg processes
+        self.chunked_encode_threshold = 120  # Seconds of video above which chunking kicks in
+        self.gop_seconds = 2
+        self.chunk_gops = 15  # 30-second chunks
+        self.chunk_workers = max(1, (os.cpu_count() or 1) // 4)
+        
+        # FFmpeg encodes run with a fixed thread budget on leased cores instead of x264's default thread count
+        self.core_allocator = CoreAllocator(threads_per_job=4)
+        
+        # Short videos are assembled in one FFmpeg pass fed by a TTS pipe and in-memory subtitles,
+        # so only the output file is written; anything that cannot stream uses the intermediate-file stages
+        self.stream_assembly = hasattr(os, 'memfd_create') and shutil.which("espeak") is not None
+        self.stream_fallbacks = 0
+        
+        # Per-template encoding: lossless samples of one title are encoded at rising CRFs and the highest one that
+        # stays above the platform's quality floor is used for every video of that template and duration, on the
+        # assumption that generated backgrounds and captions look alike from title to title. Every Nth video
+        # re-probes its own title and the decision keeps the lower CRF, so a harder title tightens it
+        self.per_template_encode = False
+        self.crf_steps = (12, 9, 6, 3)  # CRF increases over the template's, tried highest first
+        self.quality_floors = {
+            'youtube': {'ssim': 0.99, 'psnr': 42.0},  # Mean SSIM, worst-frame PSNR in dB
+            'default': {'ssim': 0.985, 'psnr': 40.0}
+        }
+        self.probe_samples = 3
+        self.probe_seconds = 2
+        self.crf_decision_max_age = 7 * 24 * 3600  # Seconds before a template is probed again
+        self.crf_recheck_every = 25  # Videos per template between sampled re-probes; 0 disables them
+        self.crf_uses = {}
+        self.crf_decisions = None  # Key -> decision, loaded on first use
+        self.crf_locks = {}
+        self.crf_probes = 0
+        self.crf_rechecks = 0
+        
+        self.subtitle_style = "FontSize=24,PrimaryColour=&Hffffff,OutlineColour=&H000000,Outline=2"
         
         # Video templates for different platforms
         self.video_templates = {
@@ -426,7 +2153,65 @@ class VideoProductionEngine:
             }
         }
     
-    async def produce_video(self, script_data: Dict) -> Dict:
+    async def run_command(self, name: str, cmd: List[str], threads: Optional[int] = None,
+                          duration: Optional[float] = None, stdin: Optional[int] = None, stdout: Optional[int] = None,
+                          pass_fds: Tuple[int, ...] = ()) -> Tuple[int, bytes, bytes]:
+        """Run a subprocess inside a tracing span and return (returncode, stdout, stderr)
+        
+        FFmpeg jobs that pass a thread count wait for a core lease, are pinned to it and get a matching -threads.
+        stdin and stdout may be pipe ends connecting it to another command; they are closed here on every path.
+        pass_fds stay open in the child.
+        """
+        with tracer.span(name, program=Path(cmd[0]).name) as span:
+            queued = time.time()
+            handed_off = False
+            try:
+                async with self.core_allocator.lease(threads) as cpus:
+                    if cpus:
+                        # Output options must come right before the output path
+                        cmd = cmd[:-1] + ["-threads", str(len(cpus))] + cmd[-1:]
+                        span.set(cpus=len(cpus), cpu_wait=round(time.time() - queued, 3))
+                    
+                    handed_off = True  # execute() closes the pipe ends from here on
+                    returncode, output, stderr = await self.execute(name, cmd, cpus, duration, stdin, stdout, pass_fds)
+            finally:
+                if not handed_off:
+                    # Cancelled while waiting for cores, so no child ever took the pipe ends
+                    for fd in (stdin, stdout):
+                        if fd is not None:
+                            os.close(fd)
+            
+            span.set(returncode=returncode, stderr_bytes=len(stderr))
+            if returncode != 0:
+                span.status = 'error'
+            return returncode, output, stderr
+    
+    async def execute(self, name: str, cmd: List[str], cpus: Optional[List[int]] = None,
+                      duration: Optional[float] = None, stdin: Optional[int] = None, stdout: Optional[int] = None,
+                      pass_fds: Tuple[int, ...] = ()) -> Tuple[int, bytes, bytes]:
+        """Run the process under supervision, pinned to its leased CPUs; simulation mode swaps this out"""
+        return await self.supervisor.run(
+            name, cmd, self.core_allocator.affinity(cpus), duration, stdin, stdout, pass_fds
+        )
+    
+    async def run_stage(self, checkpoint: Optional[RequestCheckpoint], stage: str, produce) -> str:
+        """Run a file-producing stage, reusing its checkpointed artifact when still on disk"""
+        if checkpoint:
+            artifact = checkpoint.get_path(stage)
+            if artifact:
+                logger.debug(f"Reusing checkpointed {stage}: {artifact}")
+                return artifact
+        
+        with tracer.span(f"stage.{stage}") as span:
+            artifact = await produce()
+            span.set(bytes=self.get_file_size(artifact) if artifact else 0)
+        
+        if checkpoint and artifact:
+            checkpoint.mark(stage, artifact)
+        
+        return artifact
+    
+    async def produce_video(self, script_data: Dict, checkpoint: Optional[RequestCheckpoint] = None) -> Dict:
         """Produce video from script data"""
         logger.info(f"Producing video for script: {script_data['id']}")
         
@@ -438,32 +2223,66 @@ class VideoProductionEngine:
         work_dir = self.temp_path / video_id
         work_dir.mkdir(exist_ok=True)
         
+        audio_path = background_path = subtitle_path = final_video_path = ""
+        streamed = False
+        
+        # Stored by an earlier run whose database write failed: nothing is rendered again
+        stored_video_path = checkpoint.get('stored') if checkpoint else None
+        resumed = bool(stored_video_path) and Path(stored_video_path['video']).exists()
+        
         try:
-            # Step 1: Generate voice-over
-            audio_path = await self.generate_voiceover(script_data, work_dir)
-            
-            # Step 2: Create or select background video
-            background_path = await self.get_background_video(script_data, work_dir)
-            
-            # Step 3: Generate subtitles
-            subtitle_path = await self.generate_subtitles(script_data, work_dir)
-            
-            # Step 4: Add text overlays
-            overlay_paths = await self.create_text_overlays(script_data, work_dir)
-            
-            # Step 5: Combine all elements
-            final_video_path = await self.combine_video_elements(
-                background_path, audio_path, subtitle_path, overlay_paths,
-                work_dir, platform
-            )
-            
-            # Step 6: Generate thumbnail
-            thumbnail_path = await self.generate_thumbnail(final_video_path, work_dir)
-            
-            # Step 7: Move to storage
-            stored_video_path = await self.store_video(final_video_path, thumbnail_path, video_id)
+            if not resumed:
+                if self.per_template_encode and not (checkpoint and checkpoint.get_path('final_encode')):
+                    await self.tune_crf(script_data, work_dir)
+                
+                # Steps 1-4 in a single streamed pass when every stage can stream
+                streamed = self.can_stream(script_data, checkpoint)
+                if streamed:
+                    final_video_path = await self.run_stage(
+                        checkpoint, 'final_encode', lambda: self.assemble_streamed(script_data, work_dir)
+                    )
+                    if not final_video_path:
+                        logger.warning(f"Streamed assembly failed for {video_id}, falling back to intermediate files")
+                        self.stream_fallbacks += 1
+                        streamed = False
+                
+                if not streamed:
+                    # Step 1: Generate voice-over
+                    audio_path = await self.run_stage(
+                        checkpoint, 'voiceover', lambda: self.generate_voiceover(script_data, work_dir)
+                    )
+                    
+                    # Step 2: Create or select background video; chunked encodes render their own windows of it
+                    if not self.renders_chunked(script_data['duration']):
+                        background_path = await self.run_stage(
+                            checkpoint, 'background', lambda: self.get_background_video(script_data, work_dir)
+                        )
+                    
+                    # Step 3: Generate subtitles, with the text overlays as captions
+                    with tracer.span('stage.subtitles'):
+                        subtitle_path = await self.generate_subtitles(script_data, work_dir)
+                    
+                    # Step 4: Combine all elements
+                    final_video_path = await self.run_stage(
+                        checkpoint, 'final_encode', lambda: self.combine_video_elements(
+                            background_path, audio_path, subtitle_path,
+                            work_dir, platform, script_data['duration']
+                        )
+                    )
+                
+                # Step 5: Generate thumbnail
+                with tracer.span('stage.thumbnail'):
+                    thumbnail_path = await self.generate_thumbnail(final_video_path, work_dir)
+                
+                # Step 6: Move to storage
+                with tracer.span('stage.store', bytes=self.get_file_size(final_video_path)):
+                    stored_video_path = await self.store_video(final_video_path, thumbnail_path, video_id)
+                
+                if checkpoint and stored_video_path:
+                    checkpoint.mark('stored', stored_video_path)
             
             production_time = time.time() - start_time
+            quality_score, output_duration = await self.inspect_video(stored_video_path['video'])
             
             video_data = {
                 'id': video_id,
@@ -472,16 +2291,19 @@ class VideoProductionEngine:
                 'niche': script_data['niche'],
                 'video_path': stored_video_path['video'],
                 'thumbnail_path': stored_video_path['thumbnail'],
-                'duration': script_data['duration'],
+                # Joined branding segments lengthen the output beyond the script's duration
+                'duration': round(output_duration) if output_duration else script_data['duration'],
                 'resolution': self.video_templates[platform]['resolution'],
                 'file_size': self.get_file_size(stored_video_path['video']),
                 'production_time': production_time,
-                'quality_score': await self.calculate_video_quality_score(stored_video_path['video']),
+                'quality_score': quality_score,
                 'metadata': {
-                    'audio_generated': bool(audio_path),
-                    'background_used': bool(background_path),
-                    'subtitles_added': bool(subtitle_path),
-                    'overlays_count': len(overlay_paths),
+                    'audio_generated': resumed or streamed or bool(audio_path),
+                    'background_used': resumed or streamed or self.renders_chunked(script_data['duration']) or bool(background_path),
+                    'subtitles_added': resumed or streamed or bool(subtitle_path),
+                    'overlays_count': len(self.overlay_texts(script_data)),
+                    'assembly': 'resumed' if resumed else 'streamed' if streamed else 'files',
+                    'crf': self.encode_template(platform, script_data['duration'])['crf'],
                     'processing_steps': 6
                 },
                 'created_at': datetime.now().isoformat()
@@ -495,39 +2317,20 @@ class VideoProductionEngine:
             
         except Exception as e:
             logger.error(f"Error producing video {video_id}: {e}")
-            await self.cleanup_temp_files(work_dir)
+            # A checkpointed request keeps its finished stages in work_dir for the rerun to reuse
+            if not checkpoint:
+                await self.cleanup_temp_files(work_dir)
             return {}
     
     async def generate_voiceover(self, script_data: Dict, work_dir: Path) -> str:
         """Generate AI voice-over from script"""
         logger.debug(f"Generating voiceover for {script_data['id']}")
         
-        # Extract text for voice-over
-        script = script_data['script']
-        text_content = f"{script['hook']} {script['main_content']} {script['call_to_action']}"
-        
-        # Clean text for TTS
-        clean_text = self.clean_text_for_tts(text_content)
-        
         audio_path = work_dir / "voiceover.wav"
         
-        # Use espeak as a simple TTS solution (can be replaced with better TTS)
         try:
-            cmd = [
-                "espeak",
-                "-s", "160",  # Speed: 160 words per minute
-                "-v", "en+f3",  # Voice: English female
-                "-w", str(audio_path),  # Output file
-                clean_text
-            ]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            await process.communicate()
+            cmd = self.tts_command(script_data, ["-w", str(audio_path)])
+            returncode, stdout, stderr = await self.run_command("espeak", cmd)
             
             if audio_path.exists():
                 logger.debug(f"Voiceover generated: {audio_path}")
@@ -540,22 +2343,28 @@ class VideoProductionEngine:
             logger.error(f"Error generating voiceover: {e}")
             return ""
     
+    def tts_command(self, script_data: Dict, output: List[str]) -> List[str]:
+        """espeak command for the script's voice-over, writing WAV as directed by the output arguments"""
+        # Extract text for voice-over
+        script = script_data['script']
+        text_content = f"{script['hook']} {script['main_content']} {script['call_to_action']}"
+        
+        # Use espeak as a simple TTS solution (can be replaced with better TTS)
+        return [
+            "espeak",
+            "-s", "160",  # Speed: 160 words per minute
+            "-v", "en+f3",  # Voice: English female
+            *output,
+            self.clean_text_for_tts(text_content)
+        ]
+    
     def clean_text_for_tts(self, text: str) -> str:
         """Clean text for text-to-speech"""
-        # Remove special characters and formatting
-        import re
-        
-        # Remove URLs
-        text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-        
-        # Remove hashtags
-        text = re.sub(r'#\w+', '', text)
-        
-        # Remove mentions
-        text = re.sub(r'@\w+', '', text)
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
+        # Remove URLs, hashtags and mentions, then collapse whitespace
+        text = TTS_URL_PATTERN.sub('', text)
+        text = TTS_HASHTAG_PATTERN.sub('', text)
+        text = TTS_MENTION_PATTERN.sub('', text)
+        text = TTS_WHITESPACE_PATTERN.sub(' ', text)
         
         # Limit length for TTS
         words = text.split()
@@ -578,12 +2387,8 @@ class VideoProductionEngine:
         try:
             cmd = [
                 self.ffmpeg_path,
-                "-f", "lavfi",
-                "-i", f"color=c=0x1a1a2e:size={template['resolution']}:duration={duration}:rate={template['fps']}",
-                "-f", "lavfi", 
-                "-i", f"color=c=0x16213e:size=200x200:duration={duration}:rate={template['fps']}",
-                "-filter_complex", 
-                f"[1]scale=200:200[overlay];[0][overlay]overlay=x='if(gte(t,1), -w+t*100, NAN)':y=H/2-h/2:enable='between(t,1,{duration-1})'",
+                *self.background_inputs(template, duration),
+                "-filter_complex", self.background_filter(duration),
                 "-c:v", template['codec'],
                 "-preset", template['preset'],
                 "-crf", str(template['crf']),
@@ -592,13 +2397,7 @@ class VideoProductionEngine:
                 str(background_path)
             ]
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
+            returncode, stdout, stderr = await self.run_command("ffmpeg.background", cmd, threads=self.core_allocator.threads_per_job, duration=duration)
             
             if background_path.exists():
                 logger.debug(f"Background video created: {background_path}")
@@ -611,17 +2410,47 @@ class VideoProductionEngine:
             logger.error(f"Error creating background video: {e}")
             return ""
     
+    def background_inputs(self, template: Dict, duration: float, start: float = 0) -> List[str]:
+        """Generated inputs of the animated background: a base colour and a sliding box
+        
+        A start offset shifts their timestamps so a window of the timeline renders alone; it needs -copyts.
+        """
+        shift = f",setpts=PTS+{start}/TB" if start else ""
+        return [
+            "-f", "lavfi",
+            "-i", f"color=c=0x1a1a2e:size={template['resolution']}:duration={duration}:rate={template['fps']}{shift}",
+            "-f", "lavfi",
+            "-i", f"color=c=0x16213e:size=200x200:duration={duration}:rate={template['fps']}{shift}"
+        ]
+    
+    def background_filter(self, duration: int) -> str:
+        """Filter graph sliding the box across the base colour of background_inputs"""
+        return f"[1]scale=200:200[overlay];[0][overlay]overlay=x='if(gte(t,1), -w+t*100, NAN)':y=H/2-h/2:enable='between(t,1,{duration-1})'"
+    
     async def generate_subtitles(self, script_data: Dict, work_dir: Path) -> str:
         """Generate subtitle file"""
         logger.debug(f"Generating subtitles for {script_data['id']}")
         
-        script = script_data['script']
-        text_content = f"{script['hook']} {script['main_content']} {script['call_to_action']}"
-        
         subtitle_path = work_dir / "subtitles.srt"
         
-        # Simple subtitle generation (can be enhanced with timing analysis)
-        words = text_content.split()
+        try:
+            async with aiofiles.open(subtitle_path, 'w') as f:
+                await f.write(self.subtitle_text(script_data, overlays=True))
+            
+            logger.debug(f"Subtitles generated: {subtitle_path}")
+            return str(subtitle_path)
+            
+        except Exception as e:
+            logger.error(f"Error generating subtitles: {e}")
+            return ""
+    
+    def subtitle_text(self, script_data: Dict, overlays: bool = False) -> str:
+        """SRT for the script, optionally with the text overlays as top-aligned captions"""
+        script = script_data['script']
+        text_content = f"{script['hook']} {script['main_content']} {script['call_to_action']}"
+        
+        # Simple subtitle generation (can be enhanced with timing analysis)
+        words = text_content.split()
         subtitle_content = ""
         
         words_per_subtitle = 5  # 5 words per subtitle
@@ -638,16 +2467,15 @@ class VideoProductionEngine:
             subtitle_content += f"{self.format_srt_time(start_time)} --> {self.format_srt_time(end_time)}\n"
             subtitle_content += f"{subtitle_text}\n\n"
         
-        try:
-            async with aiofiles.open(subtitle_path, 'w') as f:
-                await f.write(subtitle_content)
-            
-            logger.debug(f"Subtitles generated: {subtitle_path}")
-            return str(subtitle_path)
-            
-        except Exception as e:
-            logger.error(f"Error generating subtitles: {e}")
-            return ""
+        if overlays:
+            # Each shown for 5 seconds every 10 seconds
+            first_number = -(-len(words) // words_per_subtitle) + 1
+            for i, overlay_text in enumerate(self.overlay_texts(script_data)):
+                subtitle_content += f"{first_number + i}\n"
+                subtitle_content += f"{self.format_srt_time(i * 10)} --> {self.format_srt_time(i * 10 + 5)}\n"
+                subtitle_content += f"{{\\an8}}{{\\fs28}}{overlay_text}\n\n"
+        
+        return subtitle_content
     
     def format_srt_time(self, seconds: float) -> str:
         """Format time for SRT subtitles"""
@@ -658,259 +2486,1453 @@ class VideoProductionEngine:
         
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{millisecs:03d}"
     
-    async def create_text_overlays(self, script_data: Dict, work_dir: Path) -> List[str]:
-        """Create text overlay images"""
-        logger.debug(f"Creating text overlays for {script_data['id']}")
+    def overlay_texts(self, script_data: Dict) -> List[str]:
+        """Text overlays shown on the video"""
+        return script_data['script'].get('text_overlays', [])[:3]  # Limit to 3 overlays
+    
+    def quality_floor(self, platform: str) -> Dict:
+        return self.quality_floors.get(platform, self.quality_floors['default'])
+    
+    def crf_key(self, platform: str, duration: int) -> str:
+        """Cache key of a CRF decision; template or floor changes make a new key"""
+        digest = hashlib.sha256(json.dumps(
+            [self.video_templates[platform], self.crf_steps, self.quality_floor(platform)], sort_keys=True
+        ).encode()).hexdigest()[:12]
+        return f"{platform}:{duration}:{digest}"
+    
+    def encode_template(self, platform: str, duration: Optional[int] = None) -> Dict:
+        """Platform template with the per-template CRF decided for this duration, when there is one"""
+        template = self.video_templates[platform]
+        if not self.per_template_encode or not duration or not self.crf_decisions:
+            return template
         
-        overlays = script_data['script'].get('text_overlays', [])
-        overlay_paths = []
+        decision = self.crf_decisions.get(self.crf_key(platform, duration))
+        return {**template, 'crf': decision['crf']} if decision else template
+    
+    async def tune_crf(self, script_data: Dict, work_dir: Path) -> int:
+        """CRF for the script's template and duration, probing samples of this title when no fresh decision exists
         
-        for i, overlay_text in enumerate(overlays[:3]):  # Limit to 3 overlays
-            overlay_path = work_dir / f"overlay_{i}.png"
+        A fresh decision is re-checked against every crf_recheck_every-th title and only ever lowered by it.
+        """
+        platform = script_data['platform']
+        key = self.crf_key(platform, script_data['duration'])
+        if self.crf_decisions is None:
+            self.crf_decisions = self.load_crf_decisions()
+        
+        # Videos of the same template wait for one probe instead of each running their own
+        async with self.crf_locks.setdefault(key, asyncio.Lock()):
+            current = self.crf_decisions.get(key)
+            if current and time.time() - current['decided_at'] < self.crf_decision_max_age:
+                self.crf_uses[key] = self.crf_uses.get(key, 0) + 1
+                if not self.crf_recheck_every or self.crf_uses[key] % self.crf_recheck_every:
+                    return current['crf']
+                self.crf_rechecks += 1
+            else:
+                current = None
+            
+            with tracer.span('stage.crf_probe', platform=platform, duration=script_data['duration']) as span:
+                decision = await self.probe_crf(script_data, work_dir)
+                span.set(crf=decision['crf'], probed=decision['probed'], recheck=current is not None)
+            
+            if current:
+                # A re-check can only make the template more conservative; a failed one changes nothing
+                if not decision['probed'] or decision['crf'] >= current['crf']:
+                    return current['crf']
+                decision['decided_at'] = current['decided_at']
+                logger.info(f"Re-check of {script_data['id']} lowers the CRF for {key}: {current['crf']} -> {decision['crf']}")
+            
+            # A failed probe keeps the template's CRF for this run and is retried by the next one
+            self.crf_decisions[key] = decision
+            if decision['probed']:
+                self.save_crf_decisions()
+            
+            logger.info(f"Per-template CRF for {key}: {decision['crf']} (SSIM {decision['ssim']}, PSNR {decision['psnr']} dB)")
+            return decision['crf']
+    
+    async def probe_crf(self, script_data: Dict, work_dir: Path) -> Dict:
+        """Encode lossless samples of the title at each candidate CRF and keep the highest meeting the quality floor"""
+        platform = script_data['platform']
+        duration = script_data['duration']
+        template = self.video_templates[platform]
+        floor = self.quality_floor(platform)
+        decision = {'crf': template['crf'], 'ssim': None, 'psnr': None, 'probed': False, 'decided_at': time.time()}
+        
+        probe_dir = work_dir / "crf_probe"
+        probe_dir.mkdir(exist_ok=True)
+        self.crf_probes += 1
+        
+        try:
+            subtitle_path = probe_dir / "subtitles.srt"
+            async with aiofiles.open(subtitle_path, 'w') as f:
+                await f.write(self.subtitle_text(script_data, overlays=True))
+            
+            # Windows spread over the running time, each rendered on its own from shifted generator timestamps
+            length = min(self.probe_seconds, duration)
+            starts = [round((duration - length) * (i + 0.5) / self.probe_samples, 2) for i in range(self.probe_samples)]
+            sample_paths = []
+            for i, start in enumerate(starts):
+                sample_path = probe_dir / f"sample_{i}.mp4"
+                cmd = [
+                    self.ffmpeg_path,
+                    "-copyts",
+                    *self.background_inputs(template, length, start),
+                    "-filter_complex", f"{self.background_filter(duration)},"
+                                       f"subtitles={subtitle_path}:force_style='{self.subtitle_style}',setpts=PTS-STARTPTS",
+                    # Output rate pinned, or the shifted timestamps make FFmpeg drop frames at the start
+                    "-r", str(template['fps']),
+                    "-c:v", "libx264", "-qp", "0", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+                    "-an", "-y", str(sample_path)
+                ]
+                returncode, stdout, stderr = await self.run_command("ffmpeg.probe", cmd, threads=self.core_allocator.threads_per_job, duration=length)
+                if returncode != 0 or not sample_path.exists():
+                    logger.warning(f"CRF probe sample failed: {stderr.decode(errors='replace')[-500:]}")
+                    return decision
+                sample_paths.append(sample_path)
+            
+            list_path = probe_dir / "samples.txt"
+            async with aiofiles.open(list_path, 'w') as f:
+                await f.write(''.join(f"file '{p.resolve()}'\n" for p in sample_paths))
+            reference_path = probe_dir / "reference.mp4"
+            cmd = [self.ffmpeg_path, "-f", "concat", "-safe", "0", "-i", str(list_path), "-c", "copy", "-y", str(reference_path)]
+            returncode, stdout, stderr = await self.run_command("ffmpeg.probe", cmd)
+            if returncode != 0:
+                logger.warning(f"CRF probe reference failed: {stderr.decode(errors='replace')[-500:]}")
+                return decision
+            
+            for step in self.crf_steps:
+                crf = template['crf'] + step
+                candidate_path = probe_dir / f"crf_{crf}.{template['format']}"
+                cmd = [
+                    self.ffmpeg_path, "-i", str(reference_path),
+                    *self.video_encode_args({**template, 'crf': crf}),
+                    "-an", "-y", str(candidate_path)
+                ]
+                returncode, stdout, stderr = await self.run_command(
+                    "ffmpeg.probe", cmd, threads=self.core_allocator.threads_per_job, duration=length * len(starts)
+                )
+                if returncode != 0:
+                    logger.warning(f"CRF probe encode failed: {stderr.decode(errors='replace')[-500:]}")
+                    return decision
+                
+                # FFmpeg's built-in metrics against the lossless reference
+                cmd = [
+                    self.ffmpeg_path, "-i", str(candidate_path), "-i", str(reference_path),
+                    "-lavfi", "[0][1]ssim;[0][1]psnr", "-f", "null", "-"
+                ]
+                returncode, stdout, stderr = await self.run_command("ffmpeg.probe", cmd, duration=length * len(starts))
+                report = stderr.decode(errors='replace')
+                ssim = re.search(r"SSIM .*All:([\d.]+)", report)
+                psnr = re.search(r"PSNR .*min:([\d.]+|inf)", report)
+                if returncode != 0 or not ssim or not psnr:
+                    logger.warning(f"CRF probe measurement failed: {report[-500:]}")
+                    return decision
+                
+                if float(ssim.group(1)) >= floor['ssim'] and float(psnr.group(1)) >= floor['psnr']:
+                    decision.update(crf=crf, ssim=round(float(ssim.group(1)), 5), psnr=round(float(psnr.group(1)), 2))
+                    break
+            
+            # No candidate met the floor: the template's CRF stands, which is itself a decision worth caching
+            decision['probed'] = True
+            return decision
+        
+        except Exception as e:
+            logger.error(f"Error probing CRF: {e}")
+            return decision
+        
+        finally:
+            shutil.rmtree(probe_dir, ignore_errors=True)
+    
+    def load_crf_decisions(self) -> Dict:
+        """CRF decisions persisted by earlier runs"""
+        path = self.storage_path / "index" / "crf_decisions.json"
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Error loading CRF decisions: {e}")
+            return {}
+    
+    def save_crf_decisions(self):
+        """Persist probed decisions atomically; failed probes are not kept"""
+        path = self.storage_path / "index" / "crf_decisions.json"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix('.tmp')
+            with open(temp_path, 'w') as f:
+                json.dump({key: decision for key, decision in self.crf_decisions.items() if decision['probed']}, f, indent=2)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"Error saving CRF decisions: {e}")
+    
+    def get_crf_metrics(self) -> Dict:
+        """Probe count and the CRF in use per template and duration"""
+        return {
+            'enabled': self.per_template_encode,
+            'probes': self.crf_probes,
+            'rechecks': self.crf_rechecks,
+            'decisions': {key.rsplit(':', 1)[0]: decision['crf'] for key, decision in (self.crf_decisions or {}).items()}
+        }
+    
+    def video_encode_args(self, template: Dict) -> List[str]:
+        """Encoder settings shared by video bodies and cached segments of one platform template"""
+        return [
+            "-c:v", template['codec'],
+            "-preset", template['preset'],
+            "-crf", str(template['crf']),
+            "-s", template['resolution'],
+            "-r", str(template['fps']),
+            "-pix_fmt", "yuv420p",
+            "-video_track_timescale", "90000"
+        ]
+    
+    async def get_segment(self, platform: str, name: str) -> str:
+        """Return the cached branding segment for a platform, rendering it on first use"""
+        template = self.video_templates[platform]
+        segment = self.segment_templates[name]
+        
+        # Keyed by everything that affects the encoded stream, so template changes re-render
+        key = hashlib.sha256(
+            json.dumps([template, segment, self.audio_args], sort_keys=True).encode()
+        ).hexdigest()[:12]
+        segment_path = self.storage_path / "segments" / f"{platform}_{name}_{key}.{template['format']}"
+        
+        lock = self.segment_locks.setdefault(segment_path, asyncio.Lock())
+        async with lock:
+            if segment_path.exists():
+                return str(segment_path)
+            
+            segment_path.parent.mkdir(parents=True, exist_ok=True)
+            card_path = segment_path.with_suffix('.srt')
+            temp_path = segment_path.with_name(f".{segment_path.name}")
+            duration = segment['duration']
             
-            # Create text overlay using ImageMagick (if available) or skip
             try:
+                async with aiofiles.open(card_path, 'w') as f:
+                    await f.write(f"1\n{self.format_srt_time(0)} --> {self.format_srt_time(duration)}\n{segment['text']}\n")
+                
+                fade_start = 0 if segment['fade'] == 'in' else duration - 0.5
                 cmd = [
-                    "convert",
-                    "-size", "800x200",
-                    "-background", "transparent",
-                    "-fill", "white",
-                    "-font", "Arial-Bold",
-                    "-pointsize", "48",
-                    "-gravity", "center",
-                    f"caption:{overlay_text}",
-                    str(overlay_path)
+                    self.ffmpeg_path,
+                    "-f", "lavfi",
+                    "-i", f"color=c={segment['color']}:size={template['resolution']}:duration={duration}:rate={template['fps']}",
+                    "-f", "lavfi",
+                    "-i", "anullsrc=r=44100:cl=stereo",
+                    "-vf", f"subtitles={card_path}:force_style='{segment['style']}',"
+                           f"fade=t={segment['fade']}:st={fade_start}:d=0.5",
+                    *self.video_encode_args(template),
+                    *self.audio_args,
+                    "-t", str(duration),
+                    "-f", template['format'],
+                    "-y", str(temp_path)
                 ]
                 
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
+                returncode, stdout, stderr = await self.run_command("ffmpeg.segment", cmd, threads=self.core_allocator.threads_per_job, duration=duration)
                 
-                await process.communicate()
+                if returncode == 0 and temp_path.exists():
+                    os.replace(temp_path, segment_path)
+                    logger.info(f"Rendered {name} segment for {platform}: {segment_path}")
+                    return str(segment_path)
+                
+                logger.warning(f"{name} segment render failed for {platform}: {stderr.decode()[-500:]}")
+                return ""
                 
-                if overlay_path.exists():
-                    overlay_paths.append(str(overlay_path))
-                    
             except Exception as e:
-                logger.debug(f"Text overlay creation skipped (ImageMagick not available): {e}")
-                continue
+                logger.error(f"Error rendering {name} segment: {e}")
+                return ""
+            
+            finally:
+                card_path.unlink(missing_ok=True)
+                temp_path.unlink(missing_ok=True)
+    
+    async def join_segments(self, platform: str, body_path: Path, final_path: Path) -> str:
+        """Join intro, video body and outro with the concat demuxer, copying streams"""
+        intro_path = await self.get_segment(platform, 'intro')
+        outro_path = await self.get_segment(platform, 'outro')
+        parts = [p for p in (intro_path, str(body_path), outro_path) if p]
+        
+        if len(parts) > 1:
+            list_path = body_path.with_suffix('.txt')
+            async with aiofiles.open(list_path, 'w') as f:
+                await f.write(''.join(f"file '{Path(p).resolve()}'\n" for p in parts))
+            
+            cmd = [
+                self.ffmpeg_path,
+                "-f", "concat",
+                "-safe", "0",
+                "-i", str(list_path),
+                "-c", "copy",
+                "-movflags", "+faststart",
+                "-y", str(final_path)
+            ]
+            
+            returncode, stdout, stderr = await self.run_command("ffmpeg.join", cmd)
+            
+            if returncode == 0 and final_path.exists():
+                logger.debug(f"Final video joined from {len(parts)} segments: {final_path}")
+                return str(final_path)
+            
+            logger.warning(f"Segment join failed, using video body alone: {stderr.decode()[-500:]}")
+        
+        os.replace(body_path, final_path)
+        return str(final_path)
+    
+    def renders_chunked(self, duration: Optional[int]) -> bool:
+        """Whether a video is long enough to be encoded as parallel chunks"""
+        return bool(duration) and duration > self.chunked_encode_threshold
+    
+    async def encode_chunked(self, audio_path: str, filters: List[str],
+                             template: Dict, duration: int, output_path: Path, work_dir: Path) -> bool:
+        """Render and encode the timeline as GOP-aligned chunks in parallel, join them losslessly and mux audio once
+        
+        Every chunk generates its own window of the background, so no serial full-length pass precedes them.
+        """
+        gop = template['fps'] * self.gop_seconds
+        chunk_seconds = self.gop_seconds * self.chunk_gops
+        chunk_dir = work_dir / "chunks"
+        chunk_dir.mkdir(exist_ok=True)
+        semaphore = asyncio.Semaphore(self.chunk_workers)
+        
+        async def encode_chunk(index: int, start: int) -> Optional[Path]:
+            chunk_path = chunk_dir / f"chunk_{index:04d}.mp4"
+            
+            # Generators start on the source timeline so the background and subtitles line up, then the chunk is rebased to zero
+            length = min(chunk_seconds, duration - start)
+            chunk_filters = [self.background_filter(duration), *filters, "setpts=PTS-STARTPTS"]
+            cmd = [
+                self.ffmpeg_path,
+                "-copyts",
+                *self.background_inputs(template, length, start),
+                "-filter_complex", ",".join(chunk_filters),
+                # The output rate pinned by the encode args keeps FFmpeg from dropping frames at the shifted start
+                *self.video_encode_args(template),
+                "-g", str(gop),
+                "-keyint_min", str(gop),
+                "-sc_threshold", "0",
+                "-an",
+                "-y", str(chunk_path)
+            ]
+            
+            async with semaphore:
+                returncode, stdout, stderr = await self.run_command(
+                    "ffmpeg.chunk", cmd, threads=self.core_allocator.threads_per_job, duration=length
+                )
+            
+            if returncode != 0 or not chunk_path.exists():
+                logger.error(f"Chunk {index} encode failed: {stderr.decode()[-500:]}")
+                return None
+            return chunk_path
+        
+        chunk_paths = await asyncio.gather(*[
+            encode_chunk(index, start) for index, start in enumerate(range(0, duration, chunk_seconds))
+        ])
+        if not all(chunk_paths):
+            return False
+        
+        list_path = chunk_dir / "chunks.txt"
+        async with aiofiles.open(list_path, 'w') as f:
+            await f.write(''.join(f"file '{p.resolve()}'\n" for p in chunk_paths))
+        
+        cmd = [self.ffmpeg_path, "-f", "concat", "-safe", "0", "-i", str(list_path)]
+        if audio_path:
+            cmd.extend(["-i", audio_path, "-map", "0:v", "-map", "1:a", "-c:v", "copy", *self.audio_args])
+        elif self.segment_render:
+            cmd.extend([
+                "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo",
+                "-map", "0:v", "-map", "1:a", "-c:v", "copy", *self.audio_args, "-shortest"
+            ])
+        else:
+            cmd.extend(["-c:v", "copy", "-an"])
+        cmd.extend(["-y", str(output_path)])
+        
+        returncode, stdout, stderr = await self.run_command("ffmpeg.chunk_join", cmd)
+        
+        if returncode != 0:
+            logger.error(f"Chunk join failed: {stderr.decode()[-500:]}")
+            return False
+        
+        logger.debug(f"Encoded {len(chunk_paths)} chunks with {self.chunk_workers} workers")
+        return True
+    
+    def can_stream(self, script_data: Dict, checkpoint: Optional[RequestCheckpoint]) -> bool:
+        """Whether the video can be assembled in one streamed pass"""
+        if not self.stream_assembly:
+            return False
+        # Chunked encodes seek into the background and mux the audio file afterwards
+        if script_data['duration'] > self.chunked_encode_threshold:
+            return False
+        # A resumed request reuses its checkpointed intermediate files
+        return not (checkpoint and (checkpoint.get_path('voiceover') or checkpoint.get_path('background')))
+    
+    async def assemble_streamed(self, script_data: Dict, work_dir: Path) -> str:
+        """Encode background, voice-over, subtitles and overlays in one FFmpeg pass without intermediate files
+        
+        espeak writes WAV into a pipe read by FFmpeg, subtitles and overlay captions come from a memory file.
+        """
+        platform = script_data['platform']
+        duration = script_data['duration']
+        template = self.encode_template(platform, duration)
+        final_path = work_dir / f"final_{platform}.{template['format']}"
+        output_path = work_dir / f"body_{platform}.{template['format']}" if self.segment_render else final_path
+        
+        subtitles = os.memfd_create("subtitles.srt")
+        audio_read = audio_write = None
+        try:
+            os.write(subtitles, self.subtitle_text(script_data, overlays=True).encode())
+            tts_cmd = self.tts_command(script_data, ["--stdout"])
+            
+            cmd = [
+                self.ffmpeg_path,
+                *self.background_inputs(template, duration),
+                "-f", "wav", "-i", "pipe:0",
+                "-filter_complex", f"{self.background_filter(duration)},subtitles=/dev/fd/{subtitles}:"
+                                   f"force_style='{self.subtitle_style}'[video]",
+                "-map", "[video]", "-map", "2:a",
+                *self.video_encode_args(template),
+                *self.audio_args,
+                "-y", str(output_path)
+            ]
+            
+            audio_read, audio_write = os.pipe()
+            tts = self.run_command("espeak.stream", tts_cmd, stdout=audio_write)
+            encode = self.run_command(
+                "ffmpeg.encode", cmd, threads=self.core_allocator.threads_per_job, duration=duration,
+                stdin=audio_read, pass_fds=(subtitles,)
+            )
+            audio_read = audio_write = None  # run_command closes them now
+            (tts_returncode, _, tts_stderr), (returncode, _, stderr) = await asyncio.gather(tts, encode)
+        except Exception as e:
+            logger.error(f"Error in streamed assembly: {e}")
+            return ""
+        finally:
+            for fd in (subtitles, audio_read, audio_write):
+                if fd is not None:
+                    os.close(fd)
+        
+        # A TTS failure leaves a silent or truncated audio track, so the output is discarded
+        if tts_returncode != 0 or returncode != 0 or not output_path.exists():
+            logger.warning(f"Streamed assembly failed (tts {tts_returncode}, ffmpeg {returncode}): "
+                           f"{(tts_stderr + stderr).decode(errors='replace')[-500:]}")
+            output_path.unlink(missing_ok=True)
+            return ""
+        
+        if self.segment_render:
+            return await self.join_segments(platform, output_path, final_path)
         
-        return overlay_paths
+        logger.debug(f"Final video streamed: {final_path}")
+        return str(final_path)
     
     async def combine_video_elements(self, background_path: str, audio_path: str, 
-                                   subtitle_path: str, overlay_paths: List[str],
-                                   work_dir: Path, platform: str) -> str:
+                                   subtitle_path: str, work_dir: Path, platform: str, duration: Optional[int] = None) -> str:
         """Combine all video elements into final video"""
         logger.debug(f"Combining video elements for {platform}")
         
-        template = self.video_templates[platform]
+        template = self.encode_template(platform, duration)
         final_path = work_dir / f"final_{platform}.{template['format']}"
         
+        # In segment mode only the variable body is encoded here; branding segments are cached
+        output_path = work_dir / f"body_{platform}.{template['format']}" if self.segment_render else final_path
+        
         # Build FFmpeg command
         cmd = [self.ffmpeg_path]
         
-        # Input files
+        # Input files; without a rendered background its generators feed the encode directly
         if background_path:
             cmd.extend(["-i", background_path])
+        else:
+            cmd.extend(self.background_inputs(template, duration))
         if audio_path:
             cmd.extend(["-i", audio_path])
+        elif self.segment_render:
+            # Silent track so the body's streams match the cached segments
+            cmd.extend(["-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo"])
         
         # Video filters
         filters = []
         
-        # Add subtitles if available
-        if subtitle_path:
-            filters.append(f"subtitles={subtitle_path}:force_style='FontSize=24,PrimaryColour=&Hffffff,OutlineColour=&H000000,Outline=2'")
+        # Add subtitles if available
+        if subtitle_path:
+            filters.append(f"subtitles={subtitle_path}:force_style='{self.subtitle_style}'")
+        
+        # Long videos are encoded in parallel chunks instead of by one process
+        if self.renders_chunked(duration):
+            try:
+                if await self.encode_chunked(audio_path, filters, template, duration, output_path, work_dir):
+                    if self.segment_render:
+                        return await self.join_segments(platform, output_path, final_path)
+                    return str(final_path)
+                logger.warning("Chunked encode failed, falling back to a single encode")
+            except Exception as e:
+                logger.warning(f"Chunked encode failed, falling back to a single encode: {e}")
+        
+        # Apply filters
+        if not background_path:
+            cmd.extend(["-filter_complex", ",".join([self.background_filter(duration), *filters])])
+        elif filters:
+            cmd.extend(["-vf", ",".join(filters)])
+        
+        # Output settings
+        cmd.extend(self.video_encode_args(template))
+        
+        # Audio settings
+        if audio_path:
+            cmd.extend(self.audio_args)
+        elif self.segment_render:
+            cmd.extend(self.audio_args + ["-shortest"])
+        else:
+            cmd.extend(["-an"])  # No audio
+        
+        # Output file
+        cmd.extend(["-y", str(output_path)])
+        
+        try:
+            returncode, stdout, stderr = await self.run_command("ffmpeg.encode", cmd, threads=self.core_allocator.threads_per_job, duration=duration)
+            
+            if not output_path.exists():
+                logger.error(f"Video combination failed: {stderr.decode()}")
+                return ""
+            
+            if self.segment_render:
+                return await self.join_segments(platform, output_path, final_path)
+            
+            logger.debug(f"Final video created: {final_path}")
+            return str(final_path)
+                
+        except Exception as e:
+            logger.error(f"Error combining video elements: {e}")
+            return ""
+    
+    async def generate_thumbnail(self, video_path: str, work_dir: Path) -> str:
+        """Generate thumbnail from video"""
+        if not video_path:
+            return ""
+        
+        thumbnail_path = work_dir / "thumbnail.jpg"
+        
+        try:
+            cmd = [
+                self.ffmpeg_path,
+                "-i", video_path,
+                "-ss", "00:00:03",  # Take frame at 3 seconds
+                "-vframes", "1",
+                "-q:v", "2",  # High quality
+                "-y",
+                str(thumbnail_path)
+            ]
+            
+            returncode, stdout, stderr = await self.run_command("ffmpeg.thumbnail", cmd, threads=1)
+            
+            if thumbnail_path.exists():
+                return str(thumbnail_path)
+            else:
+                return ""
+                
+        except Exception as e:
+            logger.error(f"Error generating thumbnail: {e}")
+            return ""
+    
+    async def store_video(self, video_path: str, thumbnail_path: str, video_id: str) -> Dict:
+        """Store video and thumbnail in content-addressed permanent storage"""
+        if not video_path:
+            return {}
+        
+        try:
+            stored_video_path = await self.content_store.put(video_path, video_id, 'video')
+            
+            stored_thumbnail_path = ""
+            if thumbnail_path and Path(thumbnail_path).exists():
+                stored_thumbnail_path = await self.content_store.put(thumbnail_path, video_id, 'thumbnail')
+            
+            return {
+                'video': stored_video_path,
+                'thumbnail': stored_thumbnail_path
+            }
+            
+        except Exception as e:
+            logger.error(f"Error storing video: {e}")
+            return {}
+    
+    def get_file_size(self, file_path: str) -> int:
+        """Get file size in bytes"""
+        try:
+            return Path(file_path).stat().st_size
+        except:
+            return 0
+    
+    async def inspect_video(self, video_path: str) -> Tuple[float, Optional[float]]:
+        """Calculate video quality score and read the container duration from the same decode pass"""
+        if not video_path or not Path(video_path).exists():
+            return 0.0, None
+        
+        # Simple quality metrics
+        score = 50.0  # Base score
+        duration = None
+        
+        try:
+            # Check file size (larger generally means better quality)
+            file_size = self.get_file_size(video_path)
+            if file_size > 10 * 1024 * 1024:  # > 10MB
+                score += 20
+            elif file_size > 5 * 1024 * 1024:  # > 5MB
+                score += 10
+            
+            # Check if file is playable
+            cmd = [
+                self.ffmpeg_path,
+                "-i", video_path,
+                "-f", "null",
+                "-"
+            ]
+            
+            returncode, stdout, stderr = await self.run_command("ffmpeg.quality_check", cmd, threads=self.core_allocator.threads_per_job)
+            
+            if returncode == 0:
+                score += 30  # Video is playable
+            
+            match = re.search(rb'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)', stderr)
+            if match:
+                hours, minutes, seconds = match.groups()
+                duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+            
+        except Exception as e:
+            logger.debug(f"Quality score calculation error: {e}")
+        
+        return min(score, 100.0), duration
+    
+    async def cleanup_temp_files(self, work_dir: Path):
+        """Clean up temporary files"""
+        try:
+            import shutil
+            if work_dir.exists():
+                shutil.rmtree(work_dir)
+        except Exception as e:
+            logger.warning(f"Error cleaning up temp files: {e}")
+
+class ContentRequestPlanner:
+    """Plans the daily request mix by expected revenue per render-second"""
+    
+    def __init__(self, db_config: Dict, redis_client):
+        self.db_config = db_config
+        self.redis_client = redis_client
+        self.cache_key = "content_planner:cells"
+        
+        self.niches = ['ai_technology', 'business_marketing', 'finance_investing', 'health_fitness', 'lifestyle_travel']
+        self.platforms = ['tiktok', 'youtube', 'instagram', 'facebook']
+        
+        # Priors used until a cell has history of its own
+        self.niche_weights = np.array([0.3, 0.25, 0.2, 0.15, 0.1])
+        self.platform_weights = np.array([0.4, 0.3, 0.2, 0.1])
+        self.platform_durations = np.array([60.0, 300.0, 60.0, 60.0])
+        
+        self.prior_strength = 20.0  # Observations before a cell's data outweighs its prior
+        self.decay = 0.98  # Weight kept by older cost observations on each refresh
+        self.revenue_window_days = 90  # Videos published this recently make up the revenue statistics
+        self.exploration_share = 0.05  # Share of requests spread evenly over all cells
+        self.refresh_interval = 3600  # Seconds between incremental refreshes
+        
+        shape = (len(self.niches), len(self.platforms))
+        self.revenue_weight = np.zeros(shape)
+        self.revenue_mean = np.zeros(shape)
+        self.cost_weight = np.zeros(shape)
+        self.cost_mean = np.zeros(shape)
+        self.watermark = '1970-01-01 00:00:00'
+        self.refreshed_at = 0.0
+        
+        self.load_cache()
+    
+    def load_cache(self):
+        """Load cell statistics cached by a previous run"""
+        try:
+            cached = self.redis_client.get(self.cache_key)
+            if not cached:
+                return
+            
+            data = json.loads(cached)
+            if data.get('niches') != self.niches or data.get('platforms') != self.platforms:
+                logger.info("Planner cache layout changed, rebuilding from scratch")
+                return
+            
+            self.revenue_weight = np.array(data['revenue_weight'])
+            self.revenue_mean = np.array(data['revenue_mean'])
+            self.cost_weight = np.array(data['cost_weight'])
+            self.cost_mean = np.array(data['cost_mean'])
+            self.watermark = data['watermark']
+            self.refreshed_at = data['refreshed_at']
+        
+        except Exception as e:
+            logger.warning(f"Error loading planner cache: {e}")
+    
+    def save_cache(self):
+        """Persist cell statistics for the next run"""
+        data = {
+            'niches': self.niches,
+            'platforms': self.platforms,
+            'revenue_weight': self.revenue_weight.tolist(),
+            'revenue_mean': self.revenue_mean.tolist(),
+            'cost_weight': self.cost_weight.tolist(),
+            'cost_mean': self.cost_mean.tolist(),
+            'watermark': self.watermark,
+            'refreshed_at': self.refreshed_at
+        }
+        
+        try:
+            self.redis_client.set(self.cache_key, json.dumps(data))
+        except Exception as e:
+            logger.warning(f"Error saving planner cache: {e}")
+    
+    def connect_database(self):
+        """Open a MySQL connection; simulation mode swaps this out"""
+        return mysql.connector.connect(**self.db_config)
+    
+    def refresh(self, force: bool = False):
+        """Recompute revenue over the recent window and fold production rows newer than the watermark"""
+        if not force and time.time() - self.refreshed_at < self.refresh_interval:
+            return
+        
+        # Analytics rows are updated in place as revenue accrues, so each video is counted once from its
+        # latest row rather than accumulated every time last_updated moves
+        revenue_query = """
+        SELECT cv.niche, cv.platform, COUNT(*) AS observations, SUM(ca.revenue_30d) AS total
+        FROM content_analytics ca
+        JOIN (
+            SELECT video_id, MAX(id) AS id
+            FROM content_analytics
+            WHERE publish_date >= CURDATE() - INTERVAL %s DAY
+            GROUP BY video_id
+        ) latest ON ca.id = latest.id
+        JOIN content_videos cv ON ca.video_id = cv.id
+        GROUP BY cv.niche, cv.platform
+        """
+        
+        cost_query = """
+        SELECT niche, platform, COUNT(*) AS observations, SUM(production_time) AS total
+        FROM content_videos
+        WHERE created_at > %s AND production_time > 0
+        GROUP BY niche, platform
+        """
+        
+        try:
+            conn = self.connect_database()
+            cursor = conn.cursor(dictionary=True)
+            
+            # Take the new watermark first so rows written during the refresh are picked up next time
+            cursor.execute("SELECT NOW() AS now")
+            new_watermark = cursor.fetchall()[0]['now']
+            
+            cursor.execute(revenue_query, (self.revenue_window_days,))
+            revenue_rows = cursor.fetchall()
+            
+            cursor.execute(cost_query, (self.watermark,))
+            cost_rows = cursor.fetchall()
+            
+            cursor.close()
+            conn.close()
+        
+        except Exception as e:
+            logger.error(f"Error refreshing planner statistics: {e}")
+            return
+        
+        self.revenue_weight = np.zeros_like(self.revenue_weight)
+        self.revenue_mean = np.zeros_like(self.revenue_mean)
+        self.cost_weight *= self.decay
+        self.fold_rows(revenue_rows, self.revenue_weight, self.revenue_mean)
+        self.fold_rows(cost_rows, self.cost_weight, self.cost_mean)
+        
+        self.watermark = str(new_watermark)
+        self.refreshed_at = time.time()
+        self.save_cache()
+        
+        logger.info(f"Planner refreshed with {len(revenue_rows)} revenue and {len(cost_rows)} cost cells")
+    
+    def fold_rows(self, rows: List[Dict], weight: np.ndarray, mean: np.ndarray):
+        """Merge aggregated rows into a decayed running mean, in place"""
+        for row in rows:
+            if row['niche'] not in self.niches or row['platform'] not in self.platforms:
+                continue
+            
+            i = self.niches.index(row['niche'])
+            j = self.platforms.index(row['platform'])
+            observations = float(row['observations'] or 0)
+            total = float(row['total'] or 0)
+            
+            if observations <= 0:
+                continue
+            
+            new_weight = weight[i, j] + observations
+            mean[i, j] = (mean[i, j] * weight[i, j] + total) / new_weight
+            weight[i, j] = new_weight
+    
+    def estimate_cells(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (expected revenue per render-second, expected render seconds) for every cell"""
+        prior_cost = np.broadcast_to(self.platform_durations, self.cost_mean.shape)
+        cost_confidence = self.cost_weight / (self.cost_weight + self.prior_strength)
+        cost = cost_confidence * self.cost_mean + (1 - cost_confidence) * prior_cost
+        cost = np.maximum(cost, 1.0)
+        
+        # Prior value per render-second chosen so that, without data, the mix matches the hardcoded weights;
+        # it is rescaled to observed revenue units once any cell has data
+        prior_value = np.outer(self.niche_weights, self.platform_weights) * prior_cost
+        prior_value = prior_value / prior_value.mean()
+        
+        observed = self.revenue_weight > 0
+        if observed.any():
+            observed_value = self.revenue_mean / cost
+            prior_value = prior_value * observed_value[observed].mean()
+        else:
+            observed_value = np.zeros_like(prior_value)
+        
+        revenue_confidence = self.revenue_weight / (self.revenue_weight + self.prior_strength)
+        value = revenue_confidence * observed_value + (1 - revenue_confidence) * prior_value
+        
+        return np.maximum(value, 0.0), cost
+    
+    def plan(self, count: int, compute_budget: float) -> List[Tuple[str, str]]:
+        """Sample the (niche, platform) mix for up to count requests within the render budget"""
+        self.refresh()
+        
+        value, cost = self.estimate_cells()
+        
+        # Spend render time in proportion to value per render-second, so request odds scale with value / cost
+        odds = (value / cost).ravel()
+        if odds.sum() <= 0:
+            odds = np.ones_like(odds)
+        probabilities = odds / odds.sum()
+        probabilities = (1 - self.exploration_share) * probabilities + self.exploration_share / probabilities.size
+        
+        cells = np.random.default_rng().choice(probabilities.size, size=count, p=probabilities)
+        within_budget = np.cumsum(cost.ravel()[cells]) <= compute_budget
+        cells = cells[within_budget]
+        
+        if len(cells) < count:
+            logger.warning(f"Compute budget of {compute_budget:.0f}s covers {len(cells)}/{count} requests")
+        
+        niche_index, platform_index = np.unravel_index(cells, cost.shape)
+        return [(self.niches[i], self.platforms[j]) for i, j in zip(niche_index, platform_index)]
+    
+    def cell_estimates(self) -> Dict[Tuple[str, str], Tuple[float, float]]:
+        """Return {(niche, platform): (expected revenue, expected render seconds)}"""
+        value, cost = self.estimate_cells()
+        
+        return {
+            (niche, platform): (float(value[i, j] * cost[i, j]), float(cost[i, j]))
+            for i, niche in enumerate(self.niches)
+            for j, platform in enumerate(self.platforms)
+        }
+
+class ProductionScheduler:
+    """Orders requests by publish deadline, then expected revenue per render-second"""
+    
+    def __init__(self, render_slots: int, timezone: str = 'America/New_York',
+                 window_start_hour: int = 19, window_end_hour: int = 21):
+        self.render_slots = render_slots
+        self.timezone = ZoneInfo(timezone)
+        
+        # Peak posting window from the monetization recommendations (7-9 PM EST)
+        self.window_start_hour = window_start_hour
+        self.window_end_hour = window_end_hour
+        self.platform_windows = {}  # platform -> (start hour, end hour) where it differs from the default window
+    
+    def publish_window(self, now: Optional[float] = None, platform: Optional[str] = None) -> Tuple[float, float]:
+        """Return (start, end) Unix times of the platform's next posting window that has not closed yet"""
+        start_hour, end_hour = self.platform_windows.get(platform, (self.window_start_hour, self.window_end_hour))
+        local_now = datetime.fromtimestamp(now if now is not None else time.time(), self.timezone)
+        start = local_now.replace(hour=start_hour, minute=0, second=0, microsecond=0)
+        end = local_now.replace(hour=end_hour, minute=0, second=0, microsecond=0)
+        
+        if local_now >= end:
+            start += timedelta(days=1)
+            end += timedelta(days=1)
+        
+        return start.timestamp(), end.timestamp()
+    
+    def assign(self, request: ContentRequest, expected_value: float, estimated_cost: float):
+        """Attach value, cost and the derived priority to a request"""
+        request.expected_value = expected_value
+        request.estimated_cost = estimated_cost
+        request.priority = expected_value / max(estimated_cost, 1.0)
+    
+    def assign_slots(self, requests: List[ContentRequest], now: Optional[float] = None):
+        """Give every request its own publish slot as deadline, spaced evenly over its platform's window
+        
+        Each platform posts its videos one after another through the window, most valuable first, so a
+        video must be ready by its slot rather than by the window's close.
+        """
+        now = now if now is not None else time.time()
+        by_platform = {}
+        for request in requests:
+            by_platform.setdefault(request.platform, []).append(request)
+        
+        for platform, platform_requests in by_platform.items():
+            start, end = self.publish_window(now, platform)
+            start = max(start, now)
+            spacing = (end - start) / len(platform_requests)
+            platform_requests.sort(key=lambda r: -r.priority)
+            for index, request in enumerate(platform_requests):
+                request.publish_deadline = start + (index + 1) * spacing
+    
+    def order(self, requests: List[ContentRequest], now: Optional[float] = None) -> List[ContentRequest]:
+        """Earliest deadline first, highest value density first within a deadline; hopeless work goes last"""
+        now = now if now is not None else time.time()
+        ranked = sorted(requests, key=lambda r: (r.publish_deadline or float('inf'), -r.priority))
+        
+        # Walk the queue with the render slots' projected finish time; a request that would miss
+        # its window anyway is deferred so it does not push on-time work past its deadline
+        on_time, late = [], []
+        finish = now
+        for request in ranked:
+            eta = finish + request.estimated_cost / self.render_slots
+            if request.publish_deadline is not None and eta > request.publish_deadline:
+                late.append(request)
+            else:
+                on_time.append(request)
+                finish = eta
+        
+        late.sort(key=lambda r: -r.priority)
+        return on_time + late
+
+class PipelineStatus:
+    """Live progress of a running production: stage occupancy, rolling throughput and the projected finish"""
+    
+    STAGES = ('script', 'render.queue', 'render', 'store')
+    
+    def __init__(self, window: float = 600.0, timezone: Optional[ZoneInfo] = None):
+        self.window = window  # Seconds of outcomes the rolling rates are measured over
+        self.timezone = timezone  # Whose midnight ends the production day; host local time when None
+        self.queue_sources = {}  # Queue name -> callable returning its current depth
+        self.job_source = None  # Callable returning the running child processes
+        self.reset()
+    
+    def reset(self):
+        self.started_at = None
+        self.deadline = None  # End of the production day
+        self.target = 0
+        self.planned = 0
+        self.started = 0
+        self.batch = 0
+        self.batches = 0
+        
+        self.produced = 0
+        self.resumed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.in_stage = dict.fromkeys(self.STAGES, 0)
+        self.outcomes = deque()  # (finished_at, status) of fresh outcomes within the window
+    
+    def begin(self, target: int, planned: int, batches: int):
+        """Reset the counters for a new production day"""
+        self.reset()
+        self.started_at = time.time()
+        midnight = datetime.fromtimestamp(self.started_at, self.timezone).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.deadline = (midnight + timedelta(days=1)).timestamp()
+        self.target = target
+        self.planned = planned
+        self.batches = batches
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Count the enclosed block as one video in the named stage"""
+        self.in_stage[name] += 1
+        try:
+            yield
+        finally:
+            self.in_stage[name] -= 1
+    
+    def record(self, result: ProductionResult):
+        """Fold one finished request into the totals and the rolling window"""
+        if result.status == 'success' and result.resumed:
+            # Finished by an earlier run; counts toward the target but not toward this run's throughput
+            self.resumed += 1
+            return
+        
+        if result.status == 'success':
+            self.produced += 1
+        elif result.status == 'failed':
+            self.failed += 1
+        else:
+            self.skipped += 1
+        self.outcomes.append((time.time(), result.status))
+    
+    def rolling(self, now: float) -> Tuple[float, float]:
+        """Videos per minute and failure rate over the last window"""
+        while self.outcomes and self.outcomes[0][0] < now - self.window:
+            self.outcomes.popleft()
+        
+        elapsed = min(self.window, now - self.started_at)
+        if not self.outcomes or elapsed <= 0:
+            return 0.0, 0.0
+        
+        succeeded = sum(1 for _, status in self.outcomes if status == 'success')
+        failed = sum(1 for _, status in self.outcomes if status == 'failed')
+        return succeeded / elapsed * 60, failed / len(self.outcomes)
+    
+    def snapshot(self) -> Dict:
+        """Current state as a JSON-ready dict"""
+        now = time.time()
+        if self.started_at is None:
+            return {'running': False}
+        
+        completed = self.produced + self.resumed
+        remaining = max(0, self.target - completed)
+        rate, failure_rate = self.rolling(now)
+        attempted = self.produced + self.failed + self.skipped
         
-        # Add overlays if available
-        for i, overlay_path in enumerate(overlay_paths):
-            start_time = i * 10  # Show each overlay for 10 seconds
-            filters.append(f"overlay=x=(W-w)/2:y=50:enable='between(t,{start_time},{start_time+5})'")
+        # Straight-line projection at the rolling rate; none until something has finished
+        projected = now if not remaining else now + remaining / rate * 60 if rate else None
+        time_left = self.deadline - now
         
-        # Apply filters
-        if filters:
-            cmd.extend(["-vf", ",".join(filters)])
+        queues = {'requests': self.planned - self.started, 'render': self.in_stage['render.queue']}
+        for name, depth in self.queue_sources.items():
+            queues[name] = depth()
         
-        # Output settings
-        cmd.extend([
-            "-c:v", template['codec'],
-            "-preset", template['preset'],
-            "-crf", str(template['crf']),
-            "-s", template['resolution'],
-            "-r", str(template['fps'])
-        ])
+        return {
+            'running': True,
+            'started_at': self.started_at,
+            'uptime': round(now - self.started_at, 1),
+            'batch': self.batch,
+            'batches': self.batches,
+            'target': self.target,
+            'planned': self.planned,
+            'completed': completed,
+            'produced': self.produced,
+            'resumed': self.resumed,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'in_stage': dict(self.in_stage),
+            'queues': queues,
+            'videos_per_minute': round(rate, 2),
+            'failure_rate': round(failure_rate, 4),
+            'total_failure_rate': round(self.failed / attempted, 4) if attempted else 0.0,
+            'remaining': remaining,
+            'projected_completion': round(projected, 1) if projected is not None else None,
+            'deadline': self.deadline,
+            'required_videos_per_minute': round(remaining / time_left * 60, 2) if time_left > 0 else None,
+            'on_track': projected is not None and projected <= self.deadline,
+            'active_jobs': self.job_source() if self.job_source else []
+        }
+    
+    def to_prometheus(self, snapshot: Dict) -> str:
+        """Render a snapshot in the Prometheus text exposition format"""
+        lines = []
         
-        # Audio settings
-        if audio_path:
-            cmd.extend(["-c:a", "aac", "-b:a", "128k"])
-        else:
-            cmd.extend(["-an"])  # No audio
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP phase1_{name} {help_text}")
+            lines.append(f"# TYPE phase1_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+                lines.append(f"phase1_{name}{{{label_text}}} {value}" if label_text else f"phase1_{name} {value}")
         
-        # Output file
-        cmd.extend(["-y", str(final_path)])
+        metric('up', 'gauge', "Whether a production run is in progress", [({}, int(snapshot['running']))])
+        if snapshot['running']:
+            metric('target_videos', 'gauge', "Daily video target", [({}, snapshot['target'])])
+            metric('planned_videos', 'gauge', "Videos in today's plan", [({}, snapshot['planned'])])
+            metric('videos_total', 'counter', "Finished requests by outcome", [
+                ({'status': status}, snapshot[status]) for status in ('produced', 'resumed', 'failed', 'skipped')
+            ])
+            metric('videos_in_stage', 'gauge', "Videos currently in each stage",
+                   [({'stage': name}, count) for name, count in snapshot['in_stage'].items()])
+            metric('queue_depth', 'gauge', "Work waiting in each queue",
+                   [({'queue': name}, depth) for name, depth in snapshot['queues'].items()])
+            metric('videos_per_minute', 'gauge', "Videos produced per minute over the rolling window",
+                   [({}, snapshot['videos_per_minute'])])
+            metric('failure_ratio', 'gauge', "Share of requests failing over the rolling window",
+                   [({}, snapshot['failure_rate'])])
+            metric('required_videos_per_minute', 'gauge', "Rate needed to reach the target by the end of the day",
+                   [({}, snapshot['required_videos_per_minute'] if snapshot['required_videos_per_minute'] is not None else 'NaN')])
+            metric('projected_completion_timestamp_seconds', 'gauge', "Projected time the target is reached",
+                   [({}, snapshot['projected_completion'] if snapshot['projected_completion'] is not None else 'NaN')])
+            metric('on_track', 'gauge', "Whether the projection reaches the target before the end of the day",
+                   [({}, int(snapshot['on_track']))])
+            metric('active_processes', 'gauge', "Running child processes", [({}, len(snapshot['active_jobs']))])
+        
+        return '\n'.join(lines) + '\n'
+
+class StatusServer:
+    """Embedded HTTP endpoint serving the pipeline status as JSON (/status) and Prometheus text (/metrics)"""
+    
+    def __init__(self, status: PipelineStatus, host: str = os.getenv('PHASE1_STATUS_HOST', '127.0.0.1'),
+                 port: int = int(os.getenv('PHASE1_STATUS_PORT', '8101'))):
+        self.status = status
+        self.host = host
+        self.port = port  # 0 picks a free port
+        self.enabled = os.getenv('PHASE1_STATUS', '0') == '1'  # Opt-in; loopback only unless PHASE1_STATUS_HOST says otherwise
+        self.runner = None
+        self.url = None
+    
+    async def handle_status(self, request):
+        from aiohttp import web
+        return web.json_response(self.status.snapshot())
+    
+    async def handle_metrics(self, request):
+        from aiohttp import web
+        return web.Response(text=self.status.to_prometheus(self.status.snapshot()),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+    
+    async def start(self) -> Optional[str]:
+        """Serve in the background on the running event loop; a busy port only costs the endpoint"""
+        if not self.enabled or self.runner:
+            return self.url
         
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get('/status', self.handle_status)
+        app.router.add_get('/metrics', self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if final_path.exists():
-                logger.debug(f"Final video created: {final_path}")
-                return str(final_path)
-            else:
-                logger.error(f"Video combination failed: {stderr.decode()}")
-                return ""
-                
-        except Exception as e:
-            logger.error(f"Error combining video elements: {e}")
-            return ""
+            await web.TCPSite(self.runner, self.host, self.port).start()
+        except OSError as e:
+            logger.warning(f"Status endpoint unavailable on {self.host}:{self.port}: {e}")
+            await self.stop()
+            return None
+        
+        self.url = f"http://{self.host}:{self.runner.addresses[0][1]}"
+        logger.info(f"📡 Pipeline status at {self.url}/status and {self.url}/metrics")
+        return self.url
     
-    async def generate_thumbnail(self, video_path: str, work_dir: Path) -> str:
-        """Generate thumbnail from video"""
-        if not video_path:
-            return ""
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+        self.runner = None
+        self.url = None
+
+class AffiliateProductIndex:
+    """In-memory view of the active affiliate catalogue, best revenue potential first per niche"""
+    
+    def __init__(self, db_config: Dict, top_k: int = 3):
+        self.db_config = db_config
+        self.top_k = top_k  # Products attached to each request
+        self.refresh_interval = 300  # Seconds between incremental refreshes
+        self.full_refresh_interval = 24 * 3600  # Deleted rows only disappear on a full reload
         
-        thumbnail_path = work_dir / "thumbnail.jpg"
+        self.products = {}  # id -> (niche, revenue_potential, name) of active products
+        self.top = {}  # niche -> top_k product names, rebuilt when one of its products changes
+        self.watermark = None
+        self.refreshed_at = 0.0
+        self.reloaded_at = 0.0
+    
+    def connect_database(self):
+        """Open a MySQL connection; simulation mode swaps this out"""
+        return mysql.connector.connect(**self.db_config)
+    
+    def refresh(self, force: bool = False):
+        """Apply catalogue rows updated since the watermark, or reload everything when a full reload is due"""
+        now = time.time()
+        if not force and now - self.refreshed_at < self.refresh_interval:
+            return
+        
+        full = self.watermark is None or now - self.reloaded_at >= self.full_refresh_interval
+        query = """
+        SELECT id, name, niche, status, revenue_potential
+        FROM affiliate_products
+        """ + ("" if full else "WHERE updated_at >= %s")
         
         try:
-            cmd = [
-                self.ffmpeg_path,
-                "-i", video_path,
-                "-ss", "00:00:03",  # Take frame at 3 seconds
-                "-vframes", "1",
-                "-q:v", "2",  # High quality
-                "-y",
-                str(thumbnail_path)
-            ]
+            conn = self.connect_database()
+            cursor = conn.cursor(dictionary=True)
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            # Take the new watermark first so rows written during the refresh are picked up next time;
+            # rows from the watermark's own second are read twice, which the upsert below absorbs
+            cursor.execute("SELECT NOW() AS now")
+            new_watermark = cursor.fetchall()[0]['now']
             
-            await process.communicate()
+            cursor.execute(query, () if full else (self.watermark,))
+            rows = cursor.fetchall()
             
-            if thumbnail_path.exists():
-                return str(thumbnail_path)
-            else:
-                return ""
-                
+            cursor.close()
+            conn.close()
+        
         except Exception as e:
-            logger.error(f"Error generating thumbnail: {e}")
-            return ""
+            logger.error(f"Error refreshing affiliate products: {e}")
+            self.refreshed_at = now  # Retry on the next interval rather than on every request
+            return
+        
+        if full:
+            changed = set(self.top) | {niche for niche, _, _ in self.products.values()}
+            self.products = {}
+            self.reloaded_at = now
+        else:
+            changed = set()
+        
+        for row in rows:
+            previous = self.products.pop(row['id'], None)
+            if previous:
+                changed.add(previous[0])
+            if row['status'] == 'active':
+                self.products[row['id']] = (row['niche'], float(row['revenue_potential'] or 0), row['name'])
+                changed.add(row['niche'])
+        
+        for niche in changed:
+            self.rebuild(niche)
+        
+        self.watermark = str(new_watermark)
+        self.refreshed_at = now
+        
+        logger.info(f"Affiliate index {'reloaded' if full else 'refreshed'}: {len(rows)} rows, "
+                    f"{len(self.products)} active products in {len(self.top)} niches")
     
-    async def store_video(self, video_path: str, thumbnail_path: str, video_id: str) -> Dict:
-        """Store video and thumbnail in permanent storage"""
-        if not video_path:
-            return {}
+    def rebuild(self, niche: str):
+        """Recompute one niche's top products from the active catalogue"""
+        ranked = sorted(
+            ((potential, name) for product_niche, potential, name in self.products.values() if product_niche == niche),
+            key=lambda item: (-item[0], item[1])
+        )
+        if ranked:
+            self.top[niche] = [name for _, name in ranked[:self.top_k]]
+        else:
+            self.top.pop(niche, None)
+    
+    def lookup(self, niche: str) -> Optional[List[str]]:
+        """Top products for a niche, or None when the catalogue has none; the list is shared, not copied"""
+        return self.top.get(niche)
+
+class TrendingKeywordTracker:
+    """Time-decayed heavy-hitter keywords per niche from what published videos earned, in bounded memory"""
+    
+    STOP_WORDS = frozenset((
+        "is to of in on it an at by or as be we my me up so no do if go us "
+        "the and for with this that your you are was were have has had not but all can will just what when "
+        "who how why out get got one our more most some any into from about than then them they their there "
+        "here its been being also only very like make made know need want way show video today follow "
+        "subscribe comment share link bio hook cta call action main content text overlay hashtags"
+    ).split())
+    
+    def __init__(self, db_config: Dict, redis_client, top_k: int = 5):
+        self.db_config = db_config
+        self.redis_client = redis_client
+        self.cache_key = "content_trends:sketches"
+        self.top_k = top_k  # Keywords attached to each request
+        
+        # Count-Min sketch per niche estimates any keyword's decayed weight; the candidate set keeps the heaviest
+        self.depth = 4
+        self.width = 2048
+        self.capacity = 64  # Candidate keywords tracked per niche
+        self.half_life = 3 * 24 * 3600  # Seconds for a keyword's weight to halve
+        self.history_days = 30  # First refresh reads this far back; older weight has decayed to nothing
+        self.view_weight = 0.001  # Weight per 24h view
+        self.revenue_weight = 1.0  # Weight per dollar of 24h revenue
+        self.refresh_interval = 3600  # Seconds between incremental refreshes
         
-        # Create storage directories
-        video_storage = self.storage_path / "videos" / "processed"
-        thumbnail_storage = self.storage_path / "videos" / "thumbnails"
-        video_storage.mkdir(parents=True, exist_ok=True)
-        thumbnail_storage.mkdir(parents=True, exist_ok=True)
+        # Forward decay: weights are stored scaled up from the landmark, so counters never need aging in place
+        self.decay_rate = np.log(2) / self.half_life
+        self.landmark = time.time()
         
-        # Generate unique filenames
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        video_filename = f"{video_id}_{timestamp}.mp4"
-        thumbnail_filename = f"{video_id}_{timestamp}.jpg"
+        self.sketches = {}  # niche -> depth x width counters
+        self.candidates = {}  # niche -> keyword -> estimated scaled weight
+        self.top = {}  # niche -> top_k keywords, rebuilt after each refresh
+        self.folded = {}  # video_id -> (weight already counted, publish date), kept while inside the history window
+        self.watermark = None
+        self.refreshed_at = 0.0
         
-        stored_video_path = video_storage / video_filename
-        stored_thumbnail_path = thumbnail_storage / thumbnail_filename
+        self.load_cache()
+    
+    def keywords(self, script_data: Dict) -> set:
+        """Distinct words and two-word phrases of a script's spoken text, overlays and hashtags"""
+        script = script_data.get('script', {})
+        phrases = set()
+        for section in ('hook', 'main_content', 'call_to_action', 'text_overlays', 'hashtags'):
+            lines = script.get(section, [])
+            for line in lines if isinstance(lines, list) else [lines]:
+                # Phrases never span lines, so section labels and hashtags do not pair with the text around them
+                words = re.findall(r'[a-z0-9]+', str(line).lower())
+                kept = [len(word) > 1 and word not in self.STOP_WORDS and not word.isdigit() for word in words]
+                phrases.update(word for word, keep in zip(words, kept) if keep)
+                phrases.update(
+                    f"{first} {second}" for first, second, keep_first, keep_second in zip(words, words[1:], kept, kept[1:])
+                    if keep_first and keep_second
+                )
+        return phrases
+    
+    def columns(self, keywords: List[str]) -> np.ndarray:
+        """Counter column of each keyword in every sketch row, by double hashing one stable 128-bit digest"""
+        digests = np.frombuffer(
+            b''.join(hashlib.blake2b(keyword.encode(), digest_size=16).digest() for keyword in keywords), dtype='<u8'
+        ).reshape(-1, 2)
+        first, second = digests[:, :1], digests[:, 1:] | np.uint64(1)
+        return ((first + np.arange(self.depth, dtype=np.uint64) * second) % np.uint64(self.width)).astype(np.intp)
+    
+    def add(self, niche: str, weights: Dict[str, float]):
+        """Count a batch of keyword weights, already scaled to the landmark, and re-rank the niche's candidates"""
+        sketch = self.sketches.get(niche)
+        if sketch is None:
+            sketch = self.sketches[niche] = np.zeros((self.depth, self.width))
+        
+        keywords = list(weights)
+        rows = np.arange(self.depth)
+        columns = self.columns(keywords)
+        
+        # Conservative update: raise each counter only as far as the largest estimate that maps to it
+        targets = sketch[rows, columns].min(axis=1) + np.fromiter(weights.values(), dtype=np.float64, count=len(keywords))
+        np.maximum.at(sketch, (np.broadcast_to(rows, columns.shape), columns), targets[:, None])
+        
+        # Re-estimate the old candidates alongside the new keywords and keep the heaviest
+        candidates = self.candidates.get(niche, {})
+        pool = keywords + [keyword for keyword in candidates if keyword not in weights]
+        if len(pool) > len(keywords):
+            columns = np.vstack([columns, self.columns(pool[len(keywords):])])
+        estimates = sketch[rows, columns].min(axis=1)
+        
+        best = np.argsort(-estimates, kind='stable')[:self.capacity]
+        self.candidates[niche] = {pool[i]: float(estimates[i]) for i in best}
+    
+    def rescale(self, at: float):
+        """Move the landmark forward, shrinking every stored weight by the decay since the old one"""
+        factor = float(np.exp(-self.decay_rate * (at - self.landmark)))
+        for sketch in self.sketches.values():
+            sketch *= factor
+        for candidates in self.candidates.values():
+            for keyword in candidates:
+                candidates[keyword] *= factor
+        self.landmark = at
+    
+    def rebuild_top(self):
+        """Rank each niche's candidates; decay scales them all alike, so the order stays valid until new data"""
+        self.top = {
+            niche: [keyword for keyword, _ in sorted(candidates.items(), key=lambda item: -item[1])[:self.top_k]]
+            for niche, candidates in self.candidates.items() if candidates
+        }
+    
+    def lookup(self, niche: str) -> Optional[List[str]]:
+        """Top keywords for a niche, or None before it has any history; the list is shared, not copied"""
+        return self.top.get(niche)
+    
+    def connect_database(self):
+        """Open a MySQL connection; simulation mode swaps this out"""
+        return mysql.connector.connect(**self.db_config)
+    
+    def refresh(self, force: bool = False):
+        """Fold analytics updated since the watermark into the sketches, weighting each video's keywords by its views and revenue"""
+        if not force and time.time() - self.refreshed_at < self.refresh_interval:
+            return
+        
+        # Videos past the history window are never read again, so their folded weight can be forgotten
+        query = """
+        SELECT ca.video_id, ca.publish_date, cs.niche, cs.script_data, ca.views_24h, ca.revenue_24h, ca.last_updated
+        FROM content_analytics ca
+        JOIN content_videos cv ON ca.video_id = cv.id
+        JOIN content_scripts cs ON cv.script_id = cs.id
+        WHERE ca.last_updated > %s AND ca.publish_date >= %s
+        """
+        cutoff = (datetime.now() - timedelta(days=self.history_days)).strftime('%Y-%m-%d')
+        watermark = self.watermark or f"{cutoff} 00:00:00"
         
         try:
-            # Copy video file
-            import shutil
-            shutil.copy2(video_path, stored_video_path)
+            conn = self.connect_database()
+            cursor = conn.cursor(dictionary=True)
             
-            # Copy thumbnail if available
-            if thumbnail_path and Path(thumbnail_path).exists():
-                shutil.copy2(thumbnail_path, stored_thumbnail_path)
+            # Take the new watermark first so rows written during the refresh are picked up next time
+            cursor.execute("SELECT NOW() AS now")
+            new_watermark = cursor.fetchall()[0]['now']
             
-            return {
-                'video': str(stored_video_path),
-                'thumbnail': str(stored_thumbnail_path) if thumbnail_path else ""
-            }
+            cursor.execute(query, (watermark, cutoff))
+            rows = cursor.fetchall()
             
+            cursor.close()
+            conn.close()
+        
         except Exception as e:
-            logger.error(f"Error storing video: {e}")
-            return {}
-    
-    def get_file_size(self, file_path: str) -> int:
-        """Get file size in bytes"""
-        try:
-            return Path(file_path).stat().st_size
-        except:
-            return 0
-    
-    async def calculate_video_quality_score(self, video_path: str) -> float:
-        """Calculate video quality score"""
-        if not video_path or not Path(video_path).exists():
-            return 0.0
+            logger.error(f"Error refreshing trending keywords: {e}")
+            return
         
-        # Simple quality metrics
-        score = 50.0  # Base score
+        self.folded = {video_id: entry for video_id, entry in self.folded.items() if entry[1] >= cutoff}
         
-        try:
-            # Check file size (larger generally means better quality)
-            file_size = self.get_file_size(video_path)
-            if file_size > 10 * 1024 * 1024:  # > 10MB
-                score += 20
-            elif file_size > 5 * 1024 * 1024:  # > 5MB
-                score += 10
+        now = time.time()
+        if self.decay_rate * (now - self.landmark) > 30:
+            self.rescale(now)
+        
+        # Sum each keyword's weight over the batch first; the sketch then takes every keyword once per refresh
+        totals = {}
+        for row in rows:
+            weight = float(row['views_24h'] or 0) * self.view_weight + float(row['revenue_24h'] or 0) * self.revenue_weight
             
-            # Check if file is playable
-            cmd = [
-                self.ffmpeg_path,
-                "-i", video_path,
-                "-f", "null",
-                "-"
-            ]
+            # Analytics rows are updated in place while counts grow; only the growth since the last fold is new
+            counted = self.folded.get(row['video_id'], (0.0, ''))[0]
+            if weight <= counted:
+                continue
+            self.folded[row['video_id']] = (weight, str(row['publish_date']))
+            weight -= counted
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            try:
+                script_data = json.loads(row['script_data']) if isinstance(row['script_data'], (str, bytes)) else row['script_data']
+            except ValueError:
+                continue
             
-            stdout, stderr = await process.communicate()
+            at = row['last_updated'].timestamp() if isinstance(row['last_updated'], datetime) else now
+            scaled = weight * np.exp(self.decay_rate * (at - self.landmark))
+            niche_totals = totals.setdefault(row['niche'], {})
+            for keyword in self.keywords(script_data):
+                niche_totals[keyword] = niche_totals.get(keyword, 0.0) + scaled
+        
+        for niche, niche_totals in totals.items():
+            self.add(niche, niche_totals)
+        
+        self.rebuild_top()
+        self.watermark = str(new_watermark)
+        self.refreshed_at = time.time()
+        self.save_cache()
+        
+        logger.info(f"Trending keywords refreshed from {len(rows)} analytics rows across {len(self.top)} niches")
+    
+    def load_cache(self):
+        """Load sketches persisted by a previous run"""
+        try:
+            cached = self.redis_client.get(self.cache_key)
+            if not cached:
+                return
             
-            if process.returncode == 0:
-                score += 30  # Video is playable
+            data = json.loads(cached)
+            if (data.get('depth'), data.get('width')) != (self.depth, self.width):
+                logger.info("Trending keyword sketch layout changed, rebuilding from scratch")
+                return
             
-        except Exception as e:
-            logger.debug(f"Quality score calculation error: {e}")
+            self.sketches = {
+                niche: np.frombuffer(base64.b64decode(sketch), dtype=np.float64).reshape(self.depth, self.width).copy()
+                for niche, sketch in data['sketches'].items()
+            }
+            self.candidates = data['candidates']
+            self.folded = {video_id: tuple(entry) for video_id, entry in data.get('folded', {}).items()}
+            self.landmark = data['landmark']
+            self.watermark = data['watermark']
+            self.refreshed_at = data['refreshed_at']
+            self.rebuild_top()
         
-        return min(score, 100.0)
+        except Exception as e:
+            logger.warning(f"Error loading trending keyword cache: {e}")
     
-    async def cleanup_temp_files(self, work_dir: Path):
-        """Clean up temporary files"""
+    def save_cache(self):
+        """Persist sketches for the next run"""
+        data = {
+            'depth': self.depth,
+            'width': self.width,
+            'sketches': {niche: base64.b64encode(sketch.tobytes()).decode() for niche, sketch in self.sketches.items()},
+            'candidates': self.candidates,
+            'folded': self.folded,
+            'landmark': self.landmark,
+            'watermark': self.watermark,
+            'refreshed_at': self.refreshed_at
+        }
+        
         try:
-            import shutil
-            if work_dir.exists():
-                shutil.rmtree(work_dir)
+            self.redis_client.set(self.cache_key, json.dumps(data))
         except Exception as e:
-            logger.warning(f"Error cleaning up temp files: {e}")
+            logger.warning(f"Error saving trending keyword cache: {e}")
 
 class ContentProductionPipeline:
     """Main content production pipeline orchestrator"""
     
-    def __init__(self):
+    def __init__(self, redis_client=None):
         self.ollama_manager = OllamaClusterManager()
-        self.script_generator = ContentScriptGenerator(self.ollama_manager)
+        self.redis_client = redis_client if redis_client is not None else redis.Redis(host='localhost', port=6379, db=0)
+        self.script_generator = ContentScriptGenerator(self.ollama_manager, self.redis_client)
         self.video_engine = VideoProductionEngine()
-        self.redis_client = redis.Redis(host='localhost', port=6379, db=0)
         
         # Production targets
         self.daily_target = 1000  # 1000 videos per day
         self.batch_size = 50  # Process 50 videos at a time
+        self.max_concurrent_productions = 10
+        self.max_in_flight_requests = self.batch_size  # Requests held in memory at once while streaming
+        self.batch_pause = 5  # Seconds between batches
+        self.daily_compute_budget = self.max_concurrent_productions * 24 * 3600  # Render-seconds per day
         
         # Database connection
         self.db_config = {
@@ -919,68 +3941,222 @@ class ContentProductionPipeline:
             'password': os.getenv('MYSQL_PASSWORD', ''),
             'database': 'bookai_analytics'
         }
+        
+        self.request_planner = ContentRequestPlanner(self.db_config, self.redis_client)
+        self.affiliate_index = AffiliateProductIndex(self.db_config)
+        self.trending_keywords = TrendingKeywordTracker(self.db_config, self.redis_client)
+        self.scheduler = ProductionScheduler(self.max_concurrent_productions)
+        
+        # Near-duplicate scripts are regenerated this many times before being rejected
+        self.similarity_index = ScriptSimilarityIndex()
+        self.max_duplicate_regenerations = 1
+        
+        # Scripts below their platform's quality threshold are revised or dropped before any encode time is spent
+        self.quality_gate = QualityGate()
+        
+        self.checkpoints = ProductionCheckpointStore()
+        
+        # Live progress for operators while a run is in progress
+        self.status = PipelineStatus(timezone=self.scheduler.timezone)
+        self.status.queue_sources = {
+            'llm': lambda: len(self.ollama_manager.concurrency_limiter.waiters),
+            'encode_cores': lambda: self.video_engine.core_allocator.waiting
+        }
+        self.status.job_source = lambda: self.video_engine.supervisor.get_active_jobs()
+        self.status_server = StatusServer(self.status)
     
-    async def produce_content_batch(self, requests: List[ContentRequest]) -> List[Dict]:
+    async def produce_request(self, request: ContentRequest, semaphore: asyncio.Semaphore, today: str) -> ProductionResult:
+        """Produce one request end to end as its own trace"""
+        with tracer.span('request', root=True, niche=request.niche, platform=request.platform, duration=request.duration) as span:
+            usage_token = CURRENT_USAGE.set(ResourceUsage())
+            self.status.started += 1
+            try:
+                result = await self.produce_request_stages(request, semaphore, today)
+            finally:
+                CURRENT_USAGE.reset(usage_token)
+            self.status.record(result)
+            
+            span.set(status=result.status, resumed=result.resumed, video_id=result.video_id)
+            if result.status != 'success':
+                span.status = 'error'
+            return result
+    
+    async def produce_request_stages(self, request: ContentRequest, semaphore: asyncio.Semaphore, today: str) -> ProductionResult:
+        """Produce one request end to end and reduce it to a compact result"""
+        result = ProductionResult(niche=request.niche, platform=request.platform)
+        script_data = None
+        
+        try:
+            checkpoint = self.checkpoints.open(today, request.checkpoint_key) if request.checkpoint_key else None
+            
+            # Already produced and persisted by an earlier run today
+            if checkpoint and checkpoint.done('persisted'):
+                video_data = checkpoint.get('persisted')
+                result.status = 'success'
+                result.resumed = True
+                result.script_id = video_data.get('script_id', '')
+                result.video_id = video_data.get('id', '')
+                return result
+            
+            # Generate script
+            script_data = checkpoint.get('script') if checkpoint else None
+            if not script_data:
+                with self.status.stage('script'):
+                    script_data = await self.generate_unique_script(request)
+                if not script_data:
+                    return result
+                if checkpoint:
+                    checkpoint.mark('script', script_data)
+            
+            # Produce video
+            with tracer.span('render.queue'), self.status.stage('render.queue'):
+                await semaphore.acquire()
+            try:
+                with tracer.span('render'), self.status.stage('render'):
+                    video_data = await self.video_engine.produce_video(script_data, checkpoint)
+            finally:
+                semaphore.release()
+            if not video_data:
+                return result
+            
+            # Resources measured in this run; stages reused from a checkpoint were charged to the earlier run
+            usage = CURRENT_USAGE.get()
+            if usage:
+                video_data['resources'] = asdict(usage)
+            
+            # Store in database
+            with tracer.span('mysql.store') as span, self.status.stage('store'):
+                stored = await self.store_content_data(script_data, video_data)
+                if not stored:
+                    span.status = 'error'
+            if not stored:
+                # The video stays on disk and in the checkpoint; a rerun retries only the store
+                result.status = 'failed'
+                result.error = 'content data not stored'
+                return result
+            if checkpoint:
+                checkpoint.mark('persisted', video_data)
+            
+            result.status = 'success'
+            result.script_id = script_data['id']
+            result.video_id = video_data['id']
+            result.quality_score = video_data.get('quality_score', 0.0)
+            result.production_time = video_data.get('production_time', 0.0)
+            result.file_size = video_data.get('file_size', 0)
+            if usage:
+                result.cpu_seconds = usage.cpu_seconds
+                result.llm_tokens = usage.llm_tokens
+            result.deadline_met = request.publish_deadline is None or time.time() <= request.publish_deadline
+        
+        except Exception as e:
+            logger.error(f"Error processing request: {e}")
+            result.status = 'failed'
+            result.error = str(e)
+        
+        finally:
+            # A script only counts as published output once its video is persisted
+            if script_data:
+                if result.status == 'success':
+                    self.similarity_index.commit(script_data)
+                else:
+                    self.similarity_index.release(script_data['id'])
+        
+        return result
+    
+    async def stream_production(self, requests: Iterable[ContentRequest]) -> AsyncIterator[ProductionResult]:
+        """Yield results as requests finish, keeping at most max_in_flight_requests in progress"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_productions)
+        today = datetime.now().strftime('%Y-%m-%d')
+        
+        pending_requests = iter(requests)
+        in_flight = set()
+        
+        try:
+            while True:
+                for request in pending_requests:
+                    in_flight.add(asyncio.ensure_future(self.produce_request(request, semaphore, today)))
+                    if len(in_flight) >= self.max_in_flight_requests:
+                        break
+                
+                if not in_flight:
+                    return
+                
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+    
+    async def produce_content_batch(self, requests: List[ContentRequest]) -> ProductionMetrics:
         """Produce a batch of content"""
         logger.info(f"Producing batch of {len(requests)} content pieces")
         
         start_time = time.time()
-        results = []
         
-        # Process requests in parallel with semaphore for rate limiting
-        semaphore = asyncio.Semaphore(10)  # Max 10 concurrent productions
-        
-        async def process_single_request(request):
-            async with semaphore:
-                try:
-                    # Generate script
-                    script_data = await self.script_generator.generate_script(request)
-                    if not script_data:
-                        return None
-                    
-                    # Produce video
-                    video_data = await self.video_engine.produce_video(script_data)
-                    if not video_data:
-                        return None
-                    
-                    # Store in database
-                    await self.store_content_data(script_data, video_data)
-                    
-                    return {
-                        'script': script_data,
-                        'video': video_data,
-                        'status': 'success'
-                    }
-                    
-                except Exception as e:
-                    logger.error(f"Error processing request: {e}")
-                    return {
-                        'request': request,
-                        'status': 'failed',
-                        'error': str(e)
-                    }
-        
-        # Execute all requests in parallel
-        tasks = [process_single_request(req) for req in requests]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Filter successful results
-        successful_results = [r for r in results if r and r.get('status') == 'success']
-        failed_results = [r for r in results if r and r.get('status') == 'failed']
+        # Script generation is throttled by the LLM's adaptive limiter; rendering by a fixed semaphore.
+        # Results are aggregated as they arrive rather than kept per item
+        metrics = ProductionMetrics()
+        async for result in self.stream_production(requests):
+            metrics.record(result)
         
         production_time = time.time() - start_time
         
-        logger.info(f"Batch completed: {len(successful_results)} successful, {len(failed_results)} failed in {production_time:.2f}s")
+        tracer.flush()
+        
+        logger.info(f"Batch completed: {metrics.completed} successful ({metrics.videos_resumed} already done), {metrics.videos_failed} failed in {production_time:.2f}s")
+        if metrics.deadline_missed:
+            logger.warning(f"{metrics.deadline_missed} videos finished after their publish window")
         
         # Update metrics
-        await self.update_production_metrics(len(successful_results), production_time)
+        await self.update_production_metrics(metrics.videos_produced, production_time, metrics.deadline_missed)
+        
+        return metrics
+    
+    async def generate_unique_script(self, request: ContentRequest) -> Dict:
+        """Generate a script worth rendering, revising low scorers and regenerating near-duplicates of recent output"""
+        variation = regenerations = 0
+        feedback = ""
+        while variation <= self.max_duplicate_regenerations:
+            with tracer.span('script', variation=variation, regeneration=regenerations) as span:
+                script_data = await self.script_generator.generate_script(request, variation, feedback)
+                if script_data:
+                    span.set(model=script_data['metadata']['model'], quality_score=script_data['metadata']['quality_score'])
+            if not script_data:
+                return {}
+            
+            with tracer.span('script.gate') as span:
+                verdict = self.quality_gate.review(request, script_data, regenerations)
+                span.set(verdict=verdict, threshold=self.quality_gate.threshold(request.platform))
+            if verdict == 'regenerate':
+                logger.info(f"Script {script_data['id']} scored {script_data['metadata']['quality_score']:.0f}, revising")
+                feedback = self.quality_gate.feedback(script_data)
+                regenerations += 1
+                continue
+            if verdict == 'reject':
+                logger.warning(f"Rejected low-quality script for {request.niche} on {request.platform} "
+                               f"({script_data['metadata']['quality_score']:.0f}/100)")
+                return {}
+            
+            with tracer.span('script.dedup'):
+                duplicate_of = self.similarity_index.check_and_reserve(script_data)
+            if duplicate_of is None:
+                return script_data
+            
+            logger.info(f"Script {script_data['id']} is a near-duplicate of {duplicate_of}, regenerating")
+            variation += 1
         
-        return successful_results
+        logger.warning(f"Rejected near-duplicate script for {request.niche} on {request.platform}")
+        return {}
+    
+    def connect_database(self):
+        """Open a MySQL connection; simulation mode swaps this out"""
+        return mysql.connector.connect(**self.db_config)
     
-    async def store_content_data(self, script_data: Dict, video_data: Dict):
-        """Store content data in database"""
+    async def store_content_data(self, script_data: Dict, video_data: Dict) -> bool:
+        """Store content data in database; True only once the transaction is committed"""
         try:
-            conn = mysql.connector.connect(**self.db_config)
+            conn = self.connect_database()
             cursor = conn.cursor()
             
             # Store script data
@@ -1026,14 +4202,101 @@ class ContentProductionPipeline:
             
             cursor.execute(video_query, video_params)
             
+            # Store measured resource use
+            resources = video_data.get('resources')
+            if resources:
+                resources_query = """
+                INSERT INTO content_video_resources
+                (video_id, cpu_user_seconds, cpu_system_seconds, max_rss_kb, bytes_read, bytes_written, processes,
+                 llm_calls, prompt_tokens, eval_tokens, prompt_eval_seconds, eval_seconds, llm_seconds)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                
+                resources_params = (
+                    video_data['id'],
+                    resources['cpu_user'],
+                    resources['cpu_system'],
+                    resources['max_rss_kb'],
+                    resources['bytes_read'],
+                    resources['bytes_written'],
+                    resources['processes'],
+                    resources['llm_calls'],
+                    resources['prompt_tokens'],
+                    resources['eval_tokens'],
+                    resources['prompt_eval_seconds'],
+                    resources['eval_seconds'],
+                    resources['llm_seconds']
+                )
+                
+                cursor.execute(resources_query, resources_params)
+            
             conn.commit()
             cursor.close()
             conn.close()
+            return True
             
         except Exception as e:
             logger.error(f"Error storing content data: {e}")
+            return False
+    
+    async def sync_stored_paths(self) -> int:
+        """Point content_videos at artifacts that retention archived or evicted; queued moves survive a failed update"""
+        store = self.video_engine.content_store
+        relocations = store.pending_relocations()
+        if not relocations:
+            return 0
+        
+        columns = {'video': 'video_path', 'thumbnail': 'thumbnail_path'}
+        
+        try:
+            conn = self.connect_database()
+            cursor = conn.cursor()
+            
+            for video_id, kind, path, _ in relocations:
+                if kind not in columns:
+                    continue
+                # video_path is NOT NULL; an evicted video keeps its row with an empty path
+                if path is None and kind == 'video':
+                    path = ''
+                cursor.execute(f"UPDATE content_videos SET {columns[kind]} = %s WHERE id = %s", (path, video_id))
+            
+            conn.commit()
+            cursor.close()
+            conn.close()
+        
+        except Exception as e:
+            logger.error(f"Error updating stored paths: {e}")
+            return 0
+        
+        store.clear_relocations(relocations)
+        return len(relocations)
+    
+    def get_production_costs(self, days: int = 30) -> List[Dict]:
+        """Measured resource use per niche and platform over the last days, most CPU-hungry first"""
+        query = """
+        SELECT niche, platform, SUM(videos) AS videos, SUM(video_seconds) AS video_seconds,
+               SUM(cpu_seconds) AS cpu_seconds, MAX(peak_rss_kb) AS peak_rss_kb, SUM(bytes_written) AS bytes_written,
+               SUM(prompt_tokens) AS prompt_tokens, SUM(eval_tokens) AS eval_tokens, SUM(llm_seconds) AS llm_seconds
+        FROM content_production_costs
+        WHERE production_date >= CURDATE() - INTERVAL %s DAY
+        GROUP BY niche, platform
+        ORDER BY SUM(cpu_seconds) DESC
+        """
+        
+        try:
+            conn = self.connect_database()
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, (days,))
+            rows = cursor.fetchall()
+            cursor.close()
+            conn.close()
+            return rows
+            
+        except Exception as e:
+            logger.error(f"Error loading production costs: {e}")
+            return []
     
-    async def update_production_metrics(self, successful_count: int, production_time: float):
+    async def update_production_metrics(self, successful_count: int, production_time: float, missed_count: int = 0):
         """Update production metrics in Redis"""
         try:
             today = datetime.now().strftime('%Y-%m-%d')
@@ -1041,6 +4304,27 @@ class ContentProductionPipeline:
             # Update daily counters
             self.redis_client.hincrby(f"production_metrics:{today}", "videos_produced", successful_count)
             self.redis_client.hincrbyfloat(f"production_metrics:{today}", "total_time", production_time)
+            self.redis_client.hincrby(f"production_metrics:{today}", "deadline_met", successful_count - missed_count)
+            self.redis_client.hincrby(f"production_metrics:{today}", "deadline_missed", missed_count)
+            
+            # Latest adaptive LLM concurrency state
+            concurrency = self.ollama_manager.get_concurrency_metrics()
+            policy = self.ollama_manager.get_policy_metrics()
+            gate = self.quality_gate.get_metrics()
+            self.redis_client.hset(f"production_metrics:{today}", mapping={
+                'llm_concurrency_limit': concurrency['limit'],
+                'llm_limit_increases': concurrency['increases'],
+                'llm_limit_decreases': concurrency['decreases'],
+                'llm_smoothed_latency': round(concurrency['smoothed_latency'], 3),
+                'llm_retry_rate': round(policy['retry_rate'], 4),
+                'llm_hedge_rate': round(policy['hedge_rate'], 4),
+                'llm_hedge_wins': policy['hedge_wins'],
+                'llm_deadline_exceeded': policy['deadline_exceeded'],
+                'quality_gate_pass_rate': round(gate['pass_rate'], 4),
+                'quality_gate_regenerations': gate['regenerations'],
+                'quality_gate_rejected': gate['rejected'],
+                'render_minutes_saved': gate['render_minutes_saved']
+            })
             
             # Set expiration for metrics (30 days)
             self.redis_client.expire(f"production_metrics:{today}", 30 * 24 * 3600)
@@ -1048,25 +4332,23 @@ class ContentProductionPipeline:
         except Exception as e:
             logger.error(f"Error updating metrics: {e}")
     
-    async def generate_content_requests(self, count: int) -> List[ContentRequest]:
+    async def generate_content_requests(self, count: int, compute_budget: Optional[float] = None) -> List[ContentRequest]:
         """Generate content requests based on optimization data"""
         logger.info(f"Generating {count} content requests")
         
-        # Define content distribution
-        niches = ['ai_technology', 'business_marketing', 'finance_investing', 'health_fitness', 'lifestyle_travel']
-        platforms = ['tiktok', 'youtube', 'instagram', 'facebook']
+        if compute_budget is None:
+            compute_budget = self.daily_compute_budget
         
-        # Weighted distribution based on performance
-        niche_weights = [0.3, 0.25, 0.2, 0.15, 0.1]  # AI tech gets most content
-        platform_weights = [0.4, 0.3, 0.2, 0.1]  # TikTok gets most content
+        # Sample the whole mix at once from revenue per render-second
+        planned_cells = self.request_planner.plan(count, compute_budget)
+        estimates = self.request_planner.cell_estimates()
+        # One catalogue and analytics read per plan instead of one per request
+        self.affiliate_index.refresh()
+        self.trending_keywords.refresh()
         
         requests = []
         
-        for i in range(count):
-            # Select niche and platform based on weights
-            niche = np.random.choice(niches, p=niche_weights)
-            platform = np.random.choice(platforms, p=platform_weights)
-            
+        for niche, platform in planned_cells:
             # Create content request
             request = ContentRequest(
                 niche=niche,
@@ -1079,12 +4361,20 @@ class ContentProductionPipeline:
                 affiliate_products=self.get_affiliate_products(niche)
             )
             
+            expected_value, estimated_cost = estimates[(niche, platform)]
+            self.scheduler.assign(request, expected_value, estimated_cost)
+            
             requests.append(request)
         
+        self.scheduler.assign_slots(requests)
         return requests
     
     def get_trending_keywords(self, niche: str) -> List[str]:
-        """Get trending keywords for niche"""
+        """Get the keywords earning the most lately in niche, falling back to evergreen ones"""
+        keywords = self.trending_keywords.lookup(niche)
+        if keywords:
+            return keywords
+        
         keyword_map = {
             'ai_technology': ['AI', 'ChatGPT', 'automation', 'machine learning', 'artificial intelligence'],
             'business_marketing': ['marketing', 'business', 'entrepreneur', 'sales', 'growth'],
@@ -1096,7 +4386,11 @@ class ContentProductionPipeline:
         return keyword_map.get(niche, [])
     
     def get_affiliate_products(self, niche: str) -> List[str]:
-        """Get affiliate products for niche"""
+        """Get the top active affiliate products for niche, falling back to house products"""
+        products = self.affiliate_index.lookup(niche)
+        if products:
+            return products
+        
         product_map = {
             'ai_technology': ['AI Automation Course', 'ChatGPT Mastery', 'AI Tools Bundle'],
             'business_marketing': ['Marketing Blueprint', 'Business Growth Course', 'Sales Funnel Template'],
@@ -1114,25 +4408,56 @@ class ContentProductionPipeline:
         start_time = time.time()
         total_produced = 0
         
-        # Calculate batches needed
-        batches_needed = self.daily_target // self.batch_size
+        # Plan the whole day's mix up front, then work through it in batches;
+        # a restart picks up today's saved plan and resumes each request from its checkpoint
+        today = datetime.now().strftime('%Y-%m-%d')
+        daily_requests = self.checkpoints.load_plan(today)
         
-        for batch_num in range(batches_needed):
-            logger.info(f"Processing batch {batch_num + 1}/{batches_needed}")
-            
-            # Generate requests for this batch
-            requests = await self.generate_content_requests(self.batch_size)
-            
-            # Produce content batch
-            results = await self.produce_content_batch(requests)
-            
-            successful_count = len(results)
-            total_produced += successful_count
-            
-            logger.info(f"Batch {batch_num + 1} completed: {successful_count}/{self.batch_size} successful")
-            
-            # Small delay between batches to prevent system overload
-            await asyncio.sleep(5)
+        if daily_requests:
+            logger.info(f"Resuming today's plan of {len(daily_requests)} requests")
+        else:
+            daily_requests = await self.generate_content_requests(self.daily_target)
+            self.checkpoints.save_plan(today, daily_requests)
+        
+        # Load the models today's plan routes to, with the shared system prompt already evaluated
+        warm_models = sorted({self.script_generator.router.rank(r)[0] for r in daily_requests})
+        await self.ollama_manager.warm_up(warm_models, self.script_generator.system_prompt)
+        batches_needed = (len(daily_requests) + self.batch_size - 1) // self.batch_size
+        
+        pending = list(daily_requests)
+        daily_metrics = ProductionMetrics()
+        
+        self.status.begin(self.daily_target, len(daily_requests), batches_needed)
+        await self.status_server.start()
+        
+        try:
+            for batch_num in range(batches_needed):
+                logger.info(f"Processing batch {batch_num + 1}/{batches_needed}")
+                self.status.batch = batch_num + 1
+                
+                # Re-rank before every batch: work that can no longer make its window drops to the back
+                pending = self.scheduler.order(pending)
+                requests, pending = pending[:self.batch_size], pending[self.batch_size:]
+                
+                # Produce content batch
+                batch_metrics = await self.produce_content_batch(requests)
+                daily_metrics.merge(batch_metrics)
+                
+                successful_count = batch_metrics.completed
+                total_produced += successful_count
+                
+                logger.info(f"Batch {batch_num + 1} completed: {successful_count}/{len(requests)} successful")
+                
+                # Small delay between batches to prevent system overload
+                await asyncio.sleep(self.batch_pause)
+        finally:
+            await self.status_server.stop()
+        
+        tracer.flush()
+        
+        # Keep storage within its tier quotas now that the day's videos are in
+        retention = await self.video_engine.content_store.enforce_retention()
+        retention['paths_updated'] = await self.sync_stored_paths()
         
         total_time = time.time() - start_time
         
@@ -1140,11 +4465,26 @@ class ContentProductionPipeline:
         report = {
             'date': datetime.now().strftime('%Y-%m-%d'),
             'target': self.daily_target,
+            'planned': len(daily_requests),
             'produced': total_produced,
             'success_rate': (total_produced / self.daily_target) * 100,
             'total_time': total_time,
             'average_time_per_video': total_time / total_produced if total_produced > 0 else 0,
-            'batches_processed': batches_needed
+            'batches_processed': batches_needed,
+            'missed_window': daily_metrics.deadline_missed,
+            'average_quality_score': daily_metrics.average_quality_score,
+            'storage_used_mb': daily_metrics.storage_used,
+            # Resumed videos were charged to the run that produced them
+            'cpu_seconds_per_video': daily_metrics.cpu_seconds / max(1, daily_metrics.videos_produced),
+            'llm_tokens_per_video': daily_metrics.llm_tokens / max(1, daily_metrics.videos_produced),
+            'storage_retention': retention,
+            'llm_concurrency': self.ollama_manager.get_concurrency_metrics(),
+            'llm_requests': self.ollama_manager.get_policy_metrics(),
+            'encode_cores': self.video_engine.core_allocator.get_metrics(),
+            'processes': self.video_engine.supervisor.get_metrics(),
+            'quality_gate': self.quality_gate.get_metrics(),
+            'stream_assembly': {'enabled': self.video_engine.stream_assembly, 'fallbacks': self.video_engine.stream_fallbacks},
+            'per_template_encode': self.video_engine.get_crf_metrics()
         }
         
         self.print_production_report(report)
@@ -1158,11 +4498,33 @@ class ContentProductionPipeline:
         print("="*60)
         print(f"📅 Date: {report['date']}")
         print(f"🎯 Target: {report['target']} videos")
+        print(f"🗓️  Planned: {report['planned']} videos within compute budget")
         print(f"✅ Produced: {report['produced']} videos")
         print(f"📊 Success Rate: {report['success_rate']:.1f}%")
         print(f"⏱️  Total Time: {report['total_time']:.2f} seconds")
         print(f"⚡ Avg Time/Video: {report['average_time_per_video']:.2f} seconds")
         print(f"📦 Batches Processed: {report['batches_processed']}")
+        print(f"⏰ Missed Publish Window: {report['missed_window']} videos")
+        gate = report['quality_gate']
+        print(f"🚦 Quality Gate: {gate['first_pass_rate'] * 100:.1f}% passed first time, {gate['regenerations']} revisions "
+              f"({gate['rescued']} rescued), {gate['rejected']} rejected, {gate['render_minutes_saved']:.0f} render-minutes saved")
+        print(f"💸 Measured Cost/Video: {report['cpu_seconds_per_video']:.1f} CPU-seconds, "
+              f"{report['llm_tokens_per_video']:.0f} LLM tokens")
+        print(f"🧠 LLM Concurrency Limit: {report['llm_concurrency']['limit']:.1f} "
+              f"(+{report['llm_concurrency']['increases']} / -{report['llm_concurrency']['decreases']})")
+        print(f"🔁 LLM Retries/Hedges: {report['llm_requests']['retry_rate'] * 100:.1f}% / "
+              f"{report['llm_requests']['hedge_rate'] * 100:.1f}% ({report['llm_requests']['hedge_wins']} hedge wins, "
+              f"{report['llm_requests']['deadline_exceeded']} past deadline)")
+        print(f"🧮 Encode Cores: {report['encode_cores']['threads_per_job']} threads/job on "
+              f"{report['encode_cores']['physical_cores']} cores, {report['encode_cores']['wait_time']:.0f}s queued")
+        kills = report['processes']['kills']
+        if report['stream_assembly']['enabled']:
+            print(f"🌊 Streamed Assembly: {report['stream_assembly']['fallbacks']} fallbacks to intermediate files")
+        if report['per_template_encode']['enabled']:
+            decisions = report['per_template_encode']['decisions']
+            print(f"🎚️  Per-Template CRF: {', '.join(f'{key} → {crf}' for key, crf in sorted(decisions.items())) or 'no decisions'} "
+                  f"({report['per_template_encode']['probes']} probes, {report['per_template_encode']['rechecks']} re-checks)")
+        print(f"🪓 Killed Processes: {kills['timeout']} timed out, {kills['stalled']} stalled, {kills['cancelled']} cancelled")
         
         if report['success_rate'] >= 90:
             print("🎉 EXCELLENT: Production target achieved!")
@@ -1173,6 +4535,61 @@ class ContentProductionPipeline:
         
         print("="*60 + "\n")
 
+def critical_path(span: Dict, children: Dict[str, List[Dict]], depth: int = 0) -> List[Tuple[int, Dict]]:
+    """Walk back from the child that finished last through the siblings it waited on, recursing into each"""
+    chain = []
+    remaining = sorted(children.get(span['span_id'], []), key=lambda child: child['start'] + child['duration'])
+    cutoff = float('inf')
+    while remaining:
+        child = remaining.pop()
+        if child['start'] + child['duration'] <= cutoff:
+            chain.append(child)
+            cutoff = child['start']
+    
+    path = [(depth, span)]
+    for child in reversed(chain):
+        path.extend(critical_path(child, children, depth + 1))
+    return path
+
+def load_spans(path: Path) -> List[Dict]:
+    """Spans exported by the tracer, or an empty list when there are none"""
+    try:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def trace_report(path: Path = tracer.path, slowest: int = 5):
+    """Per-stage latency percentiles and the critical path of the slowest request traces"""
+    spans = load_spans(path)
+    if not spans:
+        print(f"No traces at {path}")
+        return
+    
+    by_name = {}
+    children = {}
+    roots = []
+    for span in spans:
+        by_name.setdefault(span['name'], []).append(span['duration'])
+        if span['parent_id']:
+            children.setdefault(span['parent_id'], []).append(span)
+        else:
+            roots.append(span)
+    
+    print(f"{len(spans)} spans in {len(roots)} traces from {path}\n")
+    print(f"{'stage':<24}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name, durations in sorted(by_name.items(), key=lambda item: -sum(item[1])):
+        p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+        print(f"{name:<24}{len(durations):>8}{p50:>10.3f}{p95:>10.3f}{p99:>10.3f}{max(durations):>10.3f}")
+    
+    for root in sorted(roots, key=lambda span: -span['duration'])[:slowest]:
+        attributes = root['attributes']
+        print(f"\nTrace {root['trace_id']} ({attributes.get('platform', '')} {attributes.get('niche', '')}, "
+              f"{attributes.get('video_id', '')}): {root['duration']:.2f}s, {root['status']}")
+        for depth, span in critical_path(root, children):
+            offset = span['start'] - root['start']
+            print(f"  {'  ' * depth}{span['name']:<24} +{offset:8.2f}s {span['duration']:8.2f}s {span['status']}")
+
 async def main():
     """Main function to run Phase 1 content production"""
     print("🎬 Starting Phase 1: Content Production Pipeline")
@@ -1187,13 +4604,17 @@ async def main():
         
         print("\n🎉 Phase 1 content production completed!")
         print("💡 Run this script daily to maintain production targets")
-        print("📊 Check /var/log/phase1-content-production.log for detailed logs")
+        print(f"📊 Check {LOG_FILE} for detailed logs")
         
     except Exception as e:
         logger.error(f"❌ Phase 1 content production failed: {e}")
         print(f"\n❌ Error: {e}")
-        print("📋 Check logs for details: /var/log/phase1-content-production.log")
+        print(f"📋 Check logs for details: {LOG_FILE}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    setup_logging(LOG_FILE)
+    if len(sys.argv) > 1 and sys.argv[1] == 'trace-report':
+        trace_report(Path(sys.argv[2]) if len(sys.argv) > 2 else tracer.path)
+    else:
+        asyncio.run(main())
 
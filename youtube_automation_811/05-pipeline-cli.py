@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+"""
+Phase 1: Pipeline Command Line
+Single entry point for content production, revenue optimization, forecasting, cost reports, live status, simulation and benchmarks
+Each subcommand loads only the pipeline script it needs; heavy libraries load on first use
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+from typing import List, Tuple
+
+from pipeline_common import setup_logging
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Pipeline scripts by short name; their file names are not importable module names
+PIPELINE_SCRIPTS = {
+    'content': '03-content-production-pipeline.py',
+    'revenue': '02-revenue-optimization.py',
+    'simulation': '06-pipeline-simulation.py'
+}
+
+# Libraries whose load time dominates startup when imported eagerly
+HEAVY_MODULES = ('numpy', 'pandas', 'redis', 'aiohttp', 'mysql.connector', 'psycopg2', 'requests')
+
+def load_pipeline(name: str):
+    """Import a pipeline script by its short name"""
+    if name in sys.modules:
+        return sys.modules[name]
+    
+    spec = importlib.util.spec_from_file_location(name, SCRIPT_DIR / PIPELINE_SCRIPTS[name])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # Dataclasses resolve their module while the script executes
+    spec.loader.exec_module(module)
+    return module
+
+def loaded_heavy_modules() -> List[str]:
+    """Heavy libraries actually executed so far, ignoring lazy placeholders"""
+    return [name for name in HEAVY_MODULES if type(sys.modules.get(name)) is types.ModuleType]
+
+def command_produce(args) -> int:
+    """Run the daily content production"""
+    content = load_pipeline('content')
+    setup_logging(content.LOG_FILE)
+    asyncio.run(content.main())
+    return 0
+
+def command_optimize(args) -> int:
+    """Run the daily revenue optimization"""
+    revenue = load_pipeline('revenue')
+    setup_logging(revenue.LOG_FILE)
+    asyncio.run(revenue.main())
+    return 0
+
+def command_forecast(args) -> int:
+    """Print the revenue forecast from recent daily revenue"""
+    revenue = load_pipeline('revenue')
+    setup_logging(revenue.LOG_FILE)
+    tracker = revenue.RevenueTracker(revenue.DatabaseManager())
+    forecast = asyncio.run(tracker.generate_revenue_forecast(args.days))
+    
+    if args.json:
+        print(json.dumps(forecast, default=str, indent=2))
+        return 0
+    
+    print(f"🔮 {args.days}-day revenue forecast")
+    print(f"   Current daily average: ${forecast['current_daily_avg']:,.2f}")
+    print(f"   Projected total: ${forecast['total_projected']:,.2f}")
+    print(f"   Daily average: ${forecast['average_daily']:,.2f}")
+    print(f"   Growth rate: {forecast['growth_rate']:.2f}% daily")
+    if forecast['days_to_target']:
+        print(f"   Days to $100K target: {forecast['days_to_target']} ({forecast['target_date']})")
+    return 0
+
+def command_bench(args) -> int:
+    """Run the named content pipeline benchmarks"""
+    simulation = load_pipeline('simulation')
+    setup_logging(simulation.LOG_FILE)
+    asyncio.run(simulation.run_benchmarks(args.names))
+    return 0
+
+def command_trace_report(args) -> int:
+    """Summarize exported production traces"""
+    content = load_pipeline('content')
+    content.trace_report(Path(args.path) if args.path else content.tracer.path, args.slowest)
+    return 0
+
+def command_simulate(args) -> int:
+    """Run the daily production against simulated backends"""
+    simulation = load_pipeline('simulation')
+    setup_logging(simulation.LOG_FILE, level=logging.INFO if args.verbose else logging.WARNING)
+    asyncio.run(simulation.run_simulation(
+        args.videos, args.time_scale, args.render_slots, args.cpus, args.seed, args.mysql, args.redis
+    ))
+    return 0
+
+def command_costs(args) -> int:
+    """Print measured production cost per video by niche and platform"""
+    content = load_pipeline('content')
+    setup_logging(content.LOG_FILE, level=logging.WARNING)
+    rows = content.ContentProductionPipeline().get_production_costs(args.days)
+    
+    if args.json:
+        print(json.dumps(rows, default=str, indent=2))
+        return 0
+    
+    print(f"💸 Production cost per video, last {args.days} days")
+    print(f"   {'niche':<22} {'platform':<10} {'videos':>7} {'CPU s':>8} {'CPU s/min':>9} "
+          f"{'peak MB':>8} {'MB out':>7} {'tokens':>7} {'LLM s':>7}")
+    for row in rows:
+        videos = int(row['videos']) or 1
+        minutes = float(row['video_seconds'] or 0) / 60 or 1
+        print(f"   {row['niche']:<22} {row['platform']:<10} {int(row['videos']):>7} "
+              f"{float(row['cpu_seconds']) / videos:>8.1f} {float(row['cpu_seconds']) / minutes:>9.1f} "
+              f"{int(row['peak_rss_kb']) / 1024:>8.0f} {int(row['bytes_written']) / videos / 1e6:>7.1f} "
+              f"{(int(row['prompt_tokens']) + int(row['eval_tokens'])) / videos:>7.0f} "
+              f"{float(row['llm_seconds']) / videos:>7.1f}")
+    return 0
+
+def command_status(args) -> int:
+    """Print the live status of a running production"""
+    import urllib.request
+    
+    try:
+        with urllib.request.urlopen(f"{args.url.rstrip('/')}/status", timeout=5) as response:
+            status = json.load(response)
+    except OSError as e:
+        print(f"❌ No pipeline status at {args.url}: {e}")
+        return 1
+    
+    if args.json:
+        print(json.dumps(status, indent=2))
+        return 0
+    
+    if not status['running']:
+        print("💤 No production run in progress")
+        return 0
+    
+    projected = status['projected_completion']
+    print(f"📡 Batch {status['batch']}/{status['batches']}, {status['uptime'] / 60:.0f} min in")
+    print(f"   Completed: {status['completed']}/{status['target']} ({status['resumed']} resumed), "
+          f"{status['failed']} failed, {status['skipped']} skipped")
+    print(f"   In stage: {', '.join(f'{name} {count}' for name, count in status['in_stage'].items())}")
+    print(f"   Queued: {', '.join(f'{name} {depth}' for name, depth in status['queues'].items())}")
+    print(f"   Throughput: {status['videos_per_minute']:.1f} videos/min "
+          f"(need {status['required_videos_per_minute'] or 0:.1f}), {status['failure_rate'] * 100:.1f}% failing")
+    print(f"   {'✅ On track' if status['on_track'] else '⚠️  Behind'}: target reached "
+          f"{time.strftime('%H:%M', time.localtime(projected)) if projected else 'unknown'}, "
+          f"day ends {time.strftime('%H:%M', time.localtime(status['deadline']))}")
+    return 0
+
+def parse_importtime(stderr: str, top: int) -> List[Tuple[str, float]]:
+    """Top-level imports by cumulative time from `python -X importtime` output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line[len("import time:"):].split("|")
+        # Nested imports are indented under their parent
+        if package.startswith("  "):
+            continue
+        imports.append((package.strip(), int(cumulative) / 1e6))
+    
+    return sorted(imports, key=lambda item: -item[1])[:top]
+
+def command_startup(args) -> int:
+    """Measure cold-start time per pipeline script in fresh interpreters and check it against a budget"""
+    if args.probe:
+        start = time.perf_counter()
+        load_pipeline(args.probe)
+        print(json.dumps({'load_time': time.perf_counter() - start, 'heavy_modules': loaded_heavy_modules()}))
+        return 0
+    
+    over_budget = False
+    for name in PIPELINE_SCRIPTS:
+        walls = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", __file__, "startup", "--probe", name],
+                capture_output=True, text=True
+            )
+            walls.append(time.perf_counter() - start)
+            if result.returncode != 0:
+                print(f"❌ {name}: probe failed\n{result.stderr[-2000:]}")
+                return 1
+        
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        wall = statistics.median(walls)
+        within = wall <= args.budget
+        over_budget = over_budget or not within
+        
+        print(f"{'✅' if within else '❌'} {name} ({PIPELINE_SCRIPTS[name]}): {wall * 1000:.0f} ms cold start, "
+              f"{probe['load_time'] * 1000:.0f} ms loading the script (budget {args.budget * 1000:.0f} ms)")
+        print(f"   Heavy libraries loaded at startup: {', '.join(probe['heavy_modules']) or 'none'}")
+        for package, seconds in parse_importtime(result.stderr, args.top):
+            print(f"   {seconds * 1000:8.1f} ms  {package}")
+    
+    return 1 if over_budget else 0
+
+def build_parser() -> argparse.ArgumentParser:
+    """Subcommands and their options"""
+    parser = argparse.ArgumentParser(description="Phase 1 pipeline commands")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    
+    produce = subcommands.add_parser('produce', help="Run the daily content production")
+    produce.set_defaults(handler=command_produce)
+    
+    optimize = subcommands.add_parser('optimize', help="Run the daily revenue optimization")
+    optimize.set_defaults(handler=command_optimize)
+    
+    forecast = subcommands.add_parser('forecast', help="Print the revenue forecast")
+    forecast.add_argument('--days', type=int, default=30)
+    forecast.add_argument('--json', action='store_true', help="Print the full forecast as JSON")
+    forecast.set_defaults(handler=command_forecast)
+    
+    bench = subcommands.add_parser('bench', help="Run content pipeline benchmarks, or list them")
+    bench.add_argument('names', nargs='*')
+    bench.set_defaults(handler=command_bench)
+    
+    trace_report = subcommands.add_parser('trace-report', help="Summarize exported production traces")
+    trace_report.add_argument('path', nargs='?')
+    trace_report.add_argument('--slowest', type=int, default=5)
+    trace_report.set_defaults(handler=command_trace_report)
+    
+    simulate = subcommands.add_parser('simulate', help="Run the daily production against simulated LLM, TTS and FFmpeg")
+    simulate.add_argument('--videos', type=int, default=10000)
+    simulate.add_argument('--time-scale', type=float, default=0.01, help="Fraction of modelled stage latency actually waited")
+    simulate.add_argument('--render-slots', type=int, help="Concurrent renders (default: the pipeline's own)")
+    simulate.add_argument('--cpus', type=int, default=32, help="CPUs of the simulated render host")
+    simulate.add_argument('--seed', type=int)
+    simulate.add_argument('--mysql', action='store_true', help="Write to the real MySQL instead of an in-memory fake")
+    simulate.add_argument('--redis', action='store_true', help="Use the real Redis instead of an in-memory fake")
+    simulate.add_argument('--verbose', action='store_true', help="Log at INFO like a real run")
+    simulate.set_defaults(handler=command_simulate)
+    
+    costs = subcommands.add_parser('costs', help="Print measured production cost per niche and platform")
+    costs.add_argument('--days', type=int, default=30)
+    costs.add_argument('--json', action='store_true', help="Print the raw totals as JSON")
+    costs.set_defaults(handler=command_costs)
+    
+    status = subcommands.add_parser('status', help="Print the live status of a running production")
+    status.add_argument('--url', default='http://127.0.0.1:8101', help="Status endpoint of the running pipeline (started with PHASE1_STATUS=1)")
+    status.add_argument('--json', action='store_true', help="Print the raw status as JSON")
+    status.set_defaults(handler=command_status)
+    
+    startup = subcommands.add_parser('startup', help="Measure cold-start import time against a budget")
+    startup.add_argument('--budget', type=float, default=0.5, help="Maximum median cold start in seconds")
+    startup.add_argument('--runs', type=int, default=3)
+    startup.add_argument('--top', type=int, default=8, help="Slowest top-level imports to list")
+    startup.add_argument('--probe', choices=sorted(PIPELINE_SCRIPTS), help=argparse.SUPPRESS)
+    startup.set_defaults(handler=command_startup)
+    
+    return parser
+
+def main() -> int:
+    """Dispatch to the chosen subcommand and return its exit status"""
+    args = build_parser().parse_args()
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
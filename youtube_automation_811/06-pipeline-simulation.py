@@ -0,0 +1,1006 @@
+#!/usr/bin/env python3
+
+"""
+Phase 1: Pipeline Simulation and Benchmarks
+Simulated LLM, TTS, FFmpeg, MySQL and Redis backends for the content production pipeline, and its benchmarks
+Kept out of the production script; loads it as the 'content' module, sharing it with 05-pipeline-cli.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+def load_content():
+    """The content production script under the module name the CLI gives it, loading it if needed"""
+    if 'content' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('content', SCRIPT_DIR / '03-content-production-pipeline.py')
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['content'] = module  # Dataclasses resolve their module while the script executes
+        spec.loader.exec_module(module)
+    return sys.modules['content']
+
+load_content()
+
+from content import (
+    CURRENT_USAGE, LOG_FILE, AdaptiveConcurrencyLimiter, ContentProductionPipeline, ContentRequest,
+    ContentScriptGenerator, ContentStore, CoreAllocator, OllamaClusterManager, ProductionCheckpointStore,
+    ProductionMetrics, ProductionScheduler, RequestPolicy, ScriptAnalyticsEngine, ScriptSimilarityIndex,
+    VideoProductionEngine, load_spans, np, tracer
+)
+from pipeline_common import setup_logging
+
+# Simulated backends, run with: python3 05-pipeline-cli.py simulate
+@dataclass(slots=True)
+class LatencyProfile:
+    """Lognormal latency and failure rate of one simulated backend call"""
+    median: float  # Seconds at full scale
+    spread: float = 0.3  # Standard deviation of the log-latency
+    failure_rate: float = 0.0
+
+class SimulatedWorkload:
+    """Fake Ollama, TTS and FFmpeg backends with configurable latency and failure distributions"""
+    
+    def __init__(self, profiles: Optional[Dict[str, LatencyProfile]] = None, time_scale: float = 0.01,
+                 seed: Optional[int] = None, output_bytes: int = 64 * 1024):
+        # Keyed by span name; a missing profile means an instant, always successful call
+        self.profiles = {
+            'ollama.generate': LatencyProfile(12.0, 0.4, 0.01),
+            'espeak': LatencyProfile(2.0, 0.3, 0.005),
+            'espeak.stream': LatencyProfile(2.0, 0.3, 0.005),
+            'ffmpeg.background': LatencyProfile(6.0, 0.3, 0.002),
+            'ffmpeg.segment': LatencyProfile(3.0, 0.2),
+            'ffmpeg.join': LatencyProfile(0.4, 0.2),
+            'ffmpeg.chunk': LatencyProfile(10.0, 0.3, 0.002),
+            'ffmpeg.chunk_join': LatencyProfile(1.0, 0.2),
+            'ffmpeg.encode': LatencyProfile(25.0, 0.4, 0.01),
+            'ffmpeg.thumbnail': LatencyProfile(0.8, 0.2),
+            'ffmpeg.quality_check': LatencyProfile(3.0, 0.3),
+            'mysql': LatencyProfile(0.003, 0.5)
+        }
+        self.profiles.update(profiles or {})
+        self.time_scale = time_scale  # Fraction of the modelled latency actually waited
+        self.output_bytes = output_bytes
+        self.rng = np.random.default_rng(seed)
+        self.vocabulary = (
+            "the a to and of in is it for on with this that your you AI tools money business growth "
+            "market video content create people time work best way new make get secret amazing learn "
+            "discover help show follow subscribe comment share think question experience likely shows"
+        ).split()
+        # Share of first drafts that miss the hook, CTA and value criteria; revised drafts always meet them
+        self.weak_script_rate = 0.1
+        self.weak_vocabulary = [
+            word for word in self.vocabulary
+            if not any(keyword in word.lower() for keywords in ScriptAnalyticsEngine.KEYWORD_SETS.values() for keyword in keywords)
+        ]
+        self.calls = {}
+        self.failures = {}
+    
+    def sample(self, name: str) -> Tuple[float, bool]:
+        """Draw (full-scale latency, failed) for one call"""
+        self.calls[name] = self.calls.get(name, 0) + 1
+        profile = self.profiles.get(name)
+        if profile is None:
+            return 0.0, False
+        
+        latency = float(self.rng.lognormal(np.log(profile.median), profile.spread))
+        failed = bool(self.rng.random() < profile.failure_rate)
+        if failed:
+            self.failures[name] = self.failures.get(name, 0) + 1
+        return latency, failed
+    
+    def script_text(self, words: int, weak: bool = False) -> str:
+        """Random script in the section layout the analytics engine parses, distinct enough to pass dedup"""
+        vocabulary = self.weak_vocabulary if weak else self.vocabulary
+        sections = []
+        for header, share in (('Hook', 0.1), ('Main Content', 0.7), ('CTA', 0.1), ('Hashtags', 0.05), ('Music', 0.05)):
+            body = ' '.join(self.rng.choice(vocabulary, size=max(3, int(words * share))))
+            sections.append(f"**{header}:** {body.capitalize()}.")
+        return '\n\n'.join(sections)
+    
+    async def post_generate(self, url: str, payload: Dict, timeout: float) -> Tuple[int, Dict]:
+        """Stand-in for OllamaClusterManager.post_generate"""
+        latency, failed = self.sample('ollama.generate')
+        if latency > timeout:
+            await asyncio.sleep(timeout * self.time_scale)
+            raise asyncio.TimeoutError()
+        
+        await asyncio.sleep(latency * self.time_scale)
+        if failed:
+            return 500, {}
+        
+        eval_count = payload.get('options', {}).get('num_predict', 512)
+        return 200, {
+            'model': payload['model'],
+            'response': self.script_text(
+                int(eval_count * 0.7),
+                weak="REVISION NOTES" not in payload['prompt'] and self.rng.random() < self.weak_script_rate
+            ),
+            'prompt_eval_count': len(payload['prompt'].split()),
+            'eval_count': eval_count,
+            'eval_duration': int(latency * 1e9),
+            'total_duration': int(latency * 1e9)
+        }
+    
+    async def execute(self, name: str, cmd: List[str], cpus: Optional[List[int]] = None,
+                      duration: Optional[float] = None, stdin: Optional[int] = None, stdout: Optional[int] = None,
+                      pass_fds: Tuple[int, ...] = ()) -> Tuple[int, bytes, bytes]:
+        """Stand-in for VideoProductionEngine.execute: waits out the stage and writes a unique placeholder output"""
+        # Nothing reads or writes the pipe ends of streamed commands here
+        for fd in (stdin, stdout):
+            if fd is not None:
+                os.close(fd)
+        
+        latency, failed = self.sample(name)
+        await asyncio.sleep(latency * self.time_scale)
+        if failed:
+            return 1, b"", f"Simulated {name} failure".encode()
+        
+        output = cmd[cmd.index("-w") + 1] if "-w" in cmd else cmd[-1]
+        if output != "-" and stdout is None:
+            # Unique content so the content store does not collapse every video into one object
+            Path(output).write_bytes(f"{name} {output}\n".encode().ljust(self.output_bytes, b"\0"))
+        
+        # Charge the modelled stage as if it had kept its CPUs busy
+        usage = CURRENT_USAGE.get()
+        if usage:
+            usage.add_process({'user': latency * max(1, len(cpus or ())), 'write_bytes': self.output_bytes})
+        return 0, b"", b""
+
+class InMemoryDatabase:
+    """MySQL stand-in that counts inserted rows and blocks for its latency like the synchronous driver does"""
+    
+    def __init__(self, workload: SimulatedWorkload):
+        self.workload = workload
+        self.rows = {}
+        self.result = []
+    
+    # One object plays connection and cursor; calls never interleave because none of them await
+    def connect(self):
+        return self
+    
+    def cursor(self, dictionary: bool = False):
+        return self
+    
+    def execute(self, query: str, params: Optional[Tuple] = None):
+        latency, failed = self.workload.sample('mysql')
+        time.sleep(latency * self.workload.time_scale)
+        if failed:
+            raise RuntimeError("Simulated MySQL failure")
+        
+        table = re.match(r"\s*INSERT INTO (\w+)", query)
+        if table:
+            self.rows[table.group(1)] = self.rows.get(table.group(1), 0) + 1
+        # The planner's watermark query is the only read that expects a row back
+        self.result = [{'now': datetime.now()}] if "NOW()" in query else []
+    
+    def fetchall(self) -> List[Dict]:
+        return self.result
+    
+    def commit(self):
+        pass
+    
+    def close(self):
+        pass
+
+class InMemoryRedis:
+    """Redis stand-in for the string and hash commands the pipeline uses"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def get(self, key: str):
+        return self.data.get(key)
+    
+    def set(self, key: str, value, *args, **kwargs) -> bool:
+        self.data[key] = value
+        return True
+    
+    def hgetall(self, key: str) -> Dict:
+        return dict(self.data.get(key, {}))
+    
+    def hset(self, key: str, field: Optional[str] = None, value=None, mapping: Optional[Dict] = None) -> int:
+        fields = self.data.setdefault(key, {})
+        added = {field: value} if field is not None else {}
+        added.update(mapping or {})
+        new = len(added.keys() - fields.keys())
+        fields.update(added)
+        return new
+    
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        fields = self.data.setdefault(key, {})
+        fields[field] = int(fields.get(field, 0)) + amount
+        return fields[field]
+    
+    def hincrbyfloat(self, key: str, field: str, amount: float = 1.0) -> float:
+        fields = self.data.setdefault(key, {})
+        fields[field] = float(fields.get(field, 0)) + amount
+        return fields[field]
+    
+    def expire(self, key: str, seconds: int) -> bool:
+        return key in self.data
+
+class EventLoopLagMonitor:
+    """Measures how late the event loop wakes a periodic timer, i.e. how long callbacks hold it"""
+    
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples = []
+        self.task = None
+    
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+    
+    def start(self):
+        self.task = asyncio.ensure_future(self.run())
+    
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+    
+    def get_metrics(self) -> Dict:
+        """Lag percentiles in milliseconds"""
+        if not self.samples:
+            return {'samples': 0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        p50, p99 = np.percentile(self.samples, [50, 99]) * 1000
+        return {'samples': len(self.samples), 'p50': float(p50), 'p99': float(p99), 'max': max(self.samples) * 1000}
+
+async def run_simulation(videos: int = 10000, time_scale: float = 0.01, render_slots: Optional[int] = None,
+                         cpus: int = 32, seed: Optional[int] = None, use_mysql: bool = False, use_redis: bool = False,
+                         profiles: Optional[Dict[str, LatencyProfile]] = None) -> Dict:
+    """Run the real daily production against simulated LLM, TTS and FFmpeg backends and report what it sustains"""
+    work_dir = Path(tempfile.mkdtemp(prefix="phase1_simulation_"))
+    workload = SimulatedWorkload(profiles, time_scale, seed)
+    database = InMemoryDatabase(workload)
+    
+    pipeline = ContentProductionPipeline(None if use_redis else InMemoryRedis())
+    pipeline.ollama_manager.post_generate = workload.post_generate
+    if not use_mysql:
+        pipeline.connect_database = database.connect
+        pipeline.request_planner.connect_database = database.connect
+        pipeline.affiliate_index.connect_database = database.connect
+        pipeline.trending_keywords.connect_database = database.connect
+    
+    pipeline.daily_target = videos
+    pipeline.batch_pause *= time_scale
+    if render_slots:
+        pipeline.max_concurrent_productions = render_slots
+        pipeline.daily_compute_budget = render_slots * 24 * 3600
+        pipeline.scheduler = ProductionScheduler(render_slots)
+    pipeline.checkpoints = ProductionCheckpointStore(work_dir / "checkpoints")
+    pipeline.similarity_index = ScriptSimilarityIndex(work_dir / "script_simhash.log")
+    # A free port unless one is asked for, so a simulation never takes a live run's endpoint
+    pipeline.status_server.port = int(os.getenv('PHASE1_STATUS_PORT', '0'))
+    
+    engine = pipeline.video_engine
+    engine.execute = workload.execute
+    engine.core_allocator = CoreAllocator(cores=[(0, (cpu,)) for cpu in range(cpus)])
+    engine.temp_path = work_dir / "tmp"
+    engine.temp_path.mkdir()
+    engine.storage_path = work_dir / "storage"
+    engine.content_store = ContentStore(engine.storage_path, engine.ffmpeg_path)
+    
+    # Queue waits come from the real spans
+    trace_settings = (tracer.enabled, tracer.path)
+    tracer.enabled, tracer.path = True, work_dir / "traces.jsonl"
+    
+    monitor = EventLoopLagMonitor()
+    monitor.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    try:
+        report = await pipeline.run_daily_production()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        await monitor.stop()
+        
+        waits = {}
+        for span in load_spans(tracer.path):
+            if span['name'] in ('ollama.queue', 'render.queue'):
+                waits.setdefault(span['name'], []).append(span['duration'])
+            if 'cpu_wait' in span['attributes']:
+                waits.setdefault('cpu lease', []).append(span['attributes']['cpu_wait'])
+    finally:
+        if not monitor.task.done():
+            await monitor.stop()
+        tracer.enabled, tracer.path = trace_settings
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    produced = report['produced']
+    summary = {
+        'videos': videos,
+        'planned': report['planned'],
+        'produced': produced,
+        'time_scale': time_scale,
+        'wall_time': wall,
+        'loop_busy': cpu / wall if wall else 0.0,
+        'cpu_per_video': cpu / produced if produced else 0.0,
+        'videos_per_hour': produced / wall * 3600 if wall else 0.0,
+        # Stage latencies were compressed by time_scale; orchestration overhead was not
+        'videos_per_day_at_full_scale': produced / wall * 86400 * time_scale if wall else 0.0,
+        'orchestration_ceiling_per_day': 86400 / (cpu / produced) if produced and cpu else 0.0,
+        'queue_waits': {
+            name: {'p50': float(np.percentile(values, 50)), 'p95': float(np.percentile(values, 95)), 'max': max(values)}
+            for name, values in waits.items()
+        },
+        'event_loop_lag_ms': monitor.get_metrics(),
+        'backend_calls': workload.calls,
+        'backend_failures': workload.failures,
+        'rows_written': database.rows
+    }
+    
+    print_simulation_report(summary)
+    return summary
+
+def print_simulation_report(summary: Dict):
+    """Print the orchestration throughput, queue waits and event-loop lag of a simulated run"""
+    print("\n" + "="*60)
+    print("🧪 SIMULATED PRODUCTION RUN")
+    print("="*60)
+    print(f"🎯 Target: {summary['videos']} videos, {summary['planned']} planned, {summary['produced']} produced")
+    print(f"⏱️  Wall Time: {summary['wall_time']:.1f}s at time scale {summary['time_scale']}")
+    print(f"🧠 Event Loop Busy: {summary['loop_busy'] * 100:.0f}% ({summary['cpu_per_video'] * 1000:.1f} ms CPU per video)")
+    print(f"🚀 Sustained: {summary['videos_per_hour']:,.0f} videos/hour wall, "
+          f"{summary['videos_per_day_at_full_scale']:,.0f} videos/day at full-scale stage latencies")
+    print(f"🧮 Orchestration Ceiling: {summary['orchestration_ceiling_per_day']:,.0f} videos/day on one event loop")
+    
+    print("\n⏳ QUEUE WAITS (p50 / p95 / max, wall seconds):")
+    for name, wait in summary['queue_waits'].items():
+        print(f"   {name}: {wait['p50']:.3f} / {wait['p95']:.3f} / {wait['max']:.3f}")
+    
+    lag = summary['event_loop_lag_ms']
+    print(f"\n🐢 Event Loop Lag: p50 {lag['p50']:.1f} ms, p99 {lag['p99']:.1f} ms, max {lag['max']:.1f} ms ({lag['samples']} samples)")
+    failures = ', '.join(f"{name} {count}" for name, count in summary['backend_failures'].items()) or 'none'
+    print(f"💥 Injected Failures: {failures}")
+    print("="*60 + "\n")
+
+# Benchmarks, run with: python3 05-pipeline-cli.py bench [name ...]
+BENCHMARKS = {}
+
+def benchmark(name: str):
+    """Register an async benchmark under a name"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+def reference_quality_score(content: str) -> float:
+    """Original per-keyword quality score, kept as the benchmark baseline"""
+    score = 0.0
+    
+    hook_words = ['did you know', 'this will', 'secret', 'amazing', 'incredible', 'shocking']
+    if any(word in content.lower() for word in hook_words):
+        score += 20
+    
+    cta_words = ['subscribe', 'follow', 'like', 'comment', 'share', 'click', 'visit']
+    if any(word in content.lower() for word in cta_words):
+        score += 20
+    
+    engagement_words = ['you', 'your', 'question', 'comment', 'think', 'experience']
+    engagement_count = sum(1 for word in engagement_words if word in content.lower())
+    score += min(engagement_count * 5, 20)
+    
+    word_count = len(content.split())
+    if 100 <= word_count <= 300:
+        score += 20
+    
+    value_words = ['learn', 'discover', 'find out', 'reveal', 'show', 'teach', 'help']
+    if any(word in content.lower() for word in value_words):
+        score += 20
+    
+    return min(score, 100.0)
+
+def reference_structure_script(content: str) -> Dict:
+    """Original line-by-line script structuring, kept as the benchmark baseline"""
+    script_structure = {
+        'hook': '',
+        'main_content': '',
+        'call_to_action': '',
+        'visual_cues': [],
+        'text_overlays': [],
+        'hashtags': [],
+        'music_suggestions': []
+    }
+    
+    current_section = 'main_content'
+    
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        
+        if 'hook' in line.lower() or 'opening' in line.lower():
+            current_section = 'hook'
+        elif 'cta' in line.lower() or 'call-to-action' in line.lower() or 'call to action' in line.lower():
+            current_section = 'call_to_action'
+        elif 'visual' in line.lower():
+            current_section = 'visual_cues'
+        elif 'text overlay' in line.lower() or 'overlay' in line.lower():
+            current_section = 'text_overlays'
+        elif 'hashtag' in line.lower():
+            current_section = 'hashtags'
+        elif 'music' in line.lower() or 'sound' in line.lower():
+            current_section = 'music_suggestions'
+        else:
+            if current_section in ['hook', 'main_content', 'call_to_action']:
+                script_structure[current_section] += line + ' '
+            else:
+                script_structure[current_section].append(line)
+    
+    for key in ['hook', 'main_content', 'call_to_action']:
+        script_structure[key] = script_structure[key].strip()
+    
+    return script_structure
+
+def synthetic_scripts(count: int, seed: int = 7) -> List[str]:
+    """Template-like scripts with a realistic mix of keywords and section headers"""
+    rng = np.random.default_rng(seed)
+    vocabulary = (
+        "the a to and of in is it for on with this that your you AI tools money business growth "
+        "market video content create people time work best way new make get secret amazing learn "
+        "discover help show follow subscribe comment share think question experience likely shows"
+    ).split()
+    headers = ['Hook:', 'Main Content:', 'CTA:', 'Visual cues:', 'Text overlay:', 'Hashtags:', 'Music:']
+    
+    scripts = []
+    for _ in range(count):
+        lines = []
+        for header in headers:
+            lines.append(f"**{header}**")
+            for _ in range(int(rng.integers(1, 6))):
+                words = rng.choice(vocabulary, size=int(rng.integers(5, 25)))
+                lines.append(' '.join(words).capitalize() + '.')
+            lines.append('')
+        scripts.append('\n'.join(lines))
+    return scripts
+
+@benchmark('script-analytics')
+async def bench_script_analytics(count: int = 5000):
+    """Compare the original per-keyword script analytics with ScriptAnalyticsEngine"""
+    scripts = synthetic_scripts(count)
+    engine = ScriptAnalyticsEngine()
+    
+    # What generate_script used to compute per script: structure, word count, duration and score
+    start = time.perf_counter()
+    reference = [
+        (
+            reference_structure_script(s),
+            len(s.split()),
+            int((len(s.split()) / 155) * 60),
+            reference_quality_score(s)
+        )
+        for s in scripts
+    ]
+    reference_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    analyses = [engine.analyze(s) for s in scripts]
+    single = [
+        (engine.structure(s), a['word_count'], a['estimated_duration'], a['quality_score'])
+        for s, a in zip(scripts, analyses)
+    ]
+    single_time = time.perf_counter() - start
+    
+    identical = reference == single
+    
+    print(f"Scripts: {count}")
+    print(f"Reference: {count / reference_time:,.0f} scripts/s")
+    print(f"Engine: {count / single_time:,.0f} scripts/s ({reference_time / single_time:.2f}x)")
+    print(f"Identical results: {identical}")
+    
+    return identical
+
+class StubOllamaServer:
+    """Single-slot Ollama stand-in with a prompt-prefix cache, keep_alive residency and num_predict"""
+    
+    def __init__(self, time_scale: float = 0.01):
+        self.time_scale = time_scale  # Fraction of simulated time actually slept
+        self.prompt_eval_rate = 2000.0  # Tokens per second
+        self.decode_rate = 50.0  # Tokens per second
+        self.load_time = 8.0  # Seconds to load a model that is not resident
+        self.natural_length = 1400  # Tokens an unconstrained script runs to
+        self.default_keep_alive = 300.0
+        
+        self.resident = {}  # model -> (expires_at, cached system prompt)
+        self.lock = asyncio.Lock()
+        self.runner = None
+        self.url = None
+    
+    def tokens(self, text: str) -> int:
+        return int(len(text.split()) * 1.3)
+    
+    def keep_alive_seconds(self, value) -> float:
+        if isinstance(value, str) and value.endswith('m'):
+            return float(value[:-1]) * 60
+        return float(value) if value is not None else self.default_keep_alive
+    
+    async def handle_generate(self, request):
+        from aiohttp import web
+        payload = await request.json()
+        model = payload['model']
+        system = payload.get('system', '')
+        num_predict = payload.get('options', {}).get('num_predict', -1)
+        
+        async with self.lock:
+            now = time.time()
+            expires_at, cached_system = self.resident.get(model, (0.0, None))
+            
+            # Only the part of the prompt after the cached prefix is evaluated again
+            load = self.load_time if expires_at < now else 0.0
+            prompt_tokens = self.tokens(payload['prompt']) + (self.tokens(system) if system != cached_system or load else 0)
+            eval_count = self.natural_length if num_predict is None or num_predict < 0 else min(num_predict, self.natural_length)
+            prompt_eval = prompt_tokens / self.prompt_eval_rate
+            decode = eval_count / self.decode_rate
+            
+            await asyncio.sleep((load + prompt_eval + decode) * self.time_scale)
+            self.resident[model] = (time.time() + self.keep_alive_seconds(payload.get('keep_alive')), system)
+        
+        return web.json_response({
+            'model': model,
+            'response': 'Hook: a stub script. ' + 'word ' * eval_count,
+            'load_duration': int(load * 1e9),
+            'prompt_eval_count': prompt_tokens,
+            'prompt_eval_duration': int(prompt_eval * 1e9),
+            'eval_count': eval_count,
+            'eval_duration': int(decode * 1e9),
+            'total_duration': int((load + prompt_eval + decode) * 1e9)
+        })
+    
+    async def start(self):
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_post('/api/generate', self.handle_generate)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+    
+    async def stop(self):
+        await self.runner.cleanup()
+
+@benchmark('ollama-prompt')
+async def bench_ollama_prompt(count: int = 12):
+    """Compare inline prompts without budgets against the system prompt, keep_alive and num_predict"""
+    server = StubOllamaServer()
+    url = await server.start()
+    
+    generator = ContentScriptGenerator(OllamaClusterManager())
+    requests = [
+        ContentRequest(niche=niche, platform=platform, duration=60 if platform != 'youtube' else 300)
+        for niche, platform in zip(
+            list(generator.script_templates) * count,
+            ['tiktok', 'instagram', 'youtube', 'facebook'] * count
+        )
+    ][:count]
+    model = 'llama3.1:8b'
+    
+    async def run(label, manager, build):
+        manager.endpoints = [url]
+        start = time.perf_counter()
+        for request in requests:
+            template = generator.script_templates[request.niche]
+            prompt, system, num_predict = build(request, generator.create_script_prompt(request, template))
+            await manager.generate_content(prompt, model, system=system, num_predict=num_predict)
+        wall = (time.perf_counter() - start) / server.time_scale
+        
+        stats = manager.get_performance_stats()[model]
+        print(f"{label}: prompt-eval {stats['prompt_eval_time'] / count:.3f}s "
+              f"({stats['prompt_tokens'] / count:.0f} tokens), decode {stats['eval_time'] / count:.2f}s "
+              f"({stats['eval_tokens'] / count:.0f} tokens), ~{wall / count:.2f}s per script simulated")
+        return stats
+    
+    try:
+        # Previous behaviour: instructions inline after the request-specific lines, no output budget
+        legacy = await run(
+            "Inline prompt, unbounded",
+            OllamaClusterManager(),
+            lambda r, p: (p + "\n" + generator.system_prompt, None, -1)
+        )
+        
+        server.resident.clear()
+        manager = OllamaClusterManager()
+        manager.endpoints = [url]
+        await manager.warm_up([model], generator.system_prompt)
+        current = await run(
+            "System prompt, warmed, num_predict",
+            manager,
+            lambda r, p: (p, generator.system_prompt, generator.token_budget(r))
+        )
+    finally:
+        await server.stop()
+    
+    print(f"Prompt-eval time: {legacy['prompt_eval_time'] / max(current['prompt_eval_time'], 1e-9):.1f}x less")
+    print(f"Decode time: {legacy['eval_time'] / max(current['eval_time'], 1e-9):.1f}x less")
+    
+    return current['prompt_eval_time'] < legacy['prompt_eval_time'] and current['eval_time'] < legacy['eval_time']
+
+@benchmark('ollama-hedging')
+async def bench_ollama_hedging(count: int = 300, workers: int = 16, time_scale: float = 0.01):
+    """Generation latency and losses with one degraded instance: single attempt vs retries and hedging"""
+    rng = np.random.default_rng(11)
+    
+    async def degraded_cluster(url: str, payload: Dict, timeout: float) -> Tuple[int, Dict]:
+        latency = float(rng.lognormal(np.log(8.0), 0.25))
+        if url.startswith("http://localhost:11437") and rng.random() < 0.3:
+            latency *= 15  # One instance stalls on a share of its requests
+        if rng.random() < 0.03:
+            await asyncio.sleep(latency * 0.1 * time_scale)
+            return 503, {}
+        if latency * time_scale > timeout:
+            await asyncio.sleep(timeout)
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(latency * time_scale)
+        return 200, {'response': 'Hook: ok', 'eval_count': 1}
+    
+    async def run(policy: RequestPolicy) -> Dict:
+        manager = OllamaClusterManager()
+        manager.request_policy = policy
+        # Limit pinned at the worker count so latencies are the calls' own, not queueing
+        manager.concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=workers, min_limit=workers, max_limit=workers)
+        manager.post_generate = degraded_cluster
+        
+        results = []
+        
+        async def worker(worker_id: int):
+            # Steady stream of requests, so the policy learns its hedge delay as production would
+            for i in range(worker_id, count, workers):
+                start = time.perf_counter()
+                content = await manager.generate_content(f"prompt {i}", use_cache=False)
+                results.append(((time.perf_counter() - start) / time_scale, bool(content)))
+        
+        await asyncio.gather(*(worker(w) for w in range(workers)))
+        latencies = [latency for latency, _ in results]
+        return {
+            'lost': sum(1 for _, ok in results if not ok),
+            'p50': float(np.percentile(latencies, 50)),
+            'p95': float(np.percentile(latencies, 95)),
+            'p99': float(np.percentile(latencies, 99)),
+            'max': max(latencies),
+            **policy.get_metrics()
+        }
+    
+    # Same scaled deadline for both; the baseline mirrors the old single 60-second attempt
+    single = RequestPolicy(deadline=60.0 * time_scale, max_attempts=1, max_hedge_share=0.0)
+    hedged = RequestPolicy(deadline=60.0 * time_scale, backoff_base=0.5 * time_scale, backoff_cap=8.0 * time_scale,
+                           default_hedge_delay=30.0 * time_scale)
+    
+    logging.disable(logging.ERROR)
+    try:
+        for label, policy in (('Single attempt', single), ('Retries + hedging', hedged)):
+            stats = await run(policy)
+            print(f"{label}: p50 {stats['p50']:.1f}s, p95 {stats['p95']:.1f}s, p99 {stats['p99']:.1f}s, max {stats['max']:.1f}s (incl. failures), "
+                  f"lost {stats['lost']}/{count}, retry rate {stats['retry_rate'] * 100:.1f}%, "
+                  f"hedge rate {stats['hedge_rate'] * 100:.1f}% ({stats['hedge_wins']} wins)")
+    finally:
+        logging.disable(logging.NOTSET)
+
+@benchmark('pipeline-memory')
+async def bench_pipeline_memory(targets: Tuple[int, ...] = (1000, 10000)):
+    """Peak Python heap while streaming a day's production through stubbed script, render and storage steps"""
+    import tracemalloc
+    
+    pipeline = ContentProductionPipeline()
+    pipeline.similarity_index = ScriptSimilarityIndex(Path(tempfile.mkdtemp(prefix="memory_bench_")) / "script_simhash.log")
+    scripts = synthetic_scripts(64)
+    
+    async def fake_script(request):
+        await asyncio.sleep(0)
+        content = scripts[hash(request.niche) % len(scripts)] * 4
+        return {
+            'id': str(uuid.uuid4()),
+            'niche': request.niche,
+            'platform': request.platform,
+            'duration': request.duration,
+            'script': {'hook': content[:200], 'main_content': content, 'call_to_action': content[-200:]},
+            'metadata': {'quality_score': 80.0, 'word_count': len(content.split())}
+        }
+    
+    async def fake_video(script_data, checkpoint=None):
+        await asyncio.sleep(0)
+        return {
+            'id': str(uuid.uuid4()),
+            'script_id': script_data['id'],
+            'video_path': f"/tmp/{script_data['id']}.mp4",
+            'file_size': 25 * 1024 * 1024,
+            'production_time': 120.0,
+            'quality_score': 85.0,
+            'metadata': {'subtitles_added': True}
+        }
+    
+    async def fake_store(script_data, video_data):
+        await asyncio.sleep(0)
+        return True
+    
+    async def no_metrics(*args):
+        pass
+    
+    pipeline.generate_unique_script = fake_script
+    pipeline.video_engine.produce_video = fake_video
+    pipeline.store_content_data = fake_store
+    pipeline.update_production_metrics = no_metrics
+    logging.disable(logging.INFO)
+    
+    try:
+        for target in targets:
+            tracemalloc.start()
+            requests = await pipeline.generate_content_requests(target, float('inf'))
+            plan_size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            
+            daily_metrics = ProductionMetrics()
+            pending = list(requests)
+            while pending:
+                pending = pipeline.scheduler.order(pending)
+                batch, pending = pending[:pipeline.batch_size], pending[pipeline.batch_size:]
+                daily_metrics.merge(await pipeline.produce_content_batch(batch))
+            
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{target:>6} videos: produced {daily_metrics.completed}, plan {plan_size / 1024 / 1024:.1f} MB, "
+                  f"peak working set above plan {(peak - plan_size) / 1024 / 1024:.2f} MB")
+    finally:
+        logging.disable(logging.NOTSET)
+
+@benchmark('segment-render')
+async def bench_segment_render(count: int = 2, duration: int = 10, platform: str = 'tiktok'):
+    """Encode time per video with branding re-encoded every time vs cached segments joined by stream copy"""
+    engine = VideoProductionEngine()
+    engine.storage_path = Path(tempfile.mkdtemp(prefix="segment_bench_"))
+    branding = sum(segment['duration'] for segment in engine.segment_templates.values())
+    
+    async def render(segment_render: bool, body_duration: int) -> float:
+        engine.segment_render = segment_render
+        elapsed = 0.0
+        for i in range(count):
+            work_dir = Path(tempfile.mkdtemp(prefix="segment_bench_", dir=engine.temp_path))
+            script_data = {
+                'id': f"bench_{i}", 'platform': platform, 'duration': body_duration, 'niche': 'ai_technology',
+                'script': {'hook': 'Did you know', 'main_content': ' '.join(['word'] * 40), 'call_to_action': 'Subscribe'}
+            }
+            background_path = await engine.get_background_video(script_data, work_dir)
+            subtitle_path = await engine.generate_subtitles(script_data, work_dir)
+            
+            start = time.perf_counter()
+            await engine.combine_video_elements(background_path, "", subtitle_path, work_dir, platform)
+            elapsed += time.perf_counter() - start
+            
+            await engine.cleanup_temp_files(work_dir)
+        return elapsed / count
+    
+    try:
+        # Previously branding would be part of every encode, i.e. an encode of the full running time
+        full = await render(False, duration + branding)
+        
+        start = time.perf_counter()
+        for name in engine.segment_templates:
+            await engine.get_segment(platform, name)
+        segments_time = time.perf_counter() - start
+        
+        segmented = await render(True, duration)
+    finally:
+        shutil.rmtree(engine.storage_path, ignore_errors=True)
+    
+    print(f"{platform}, {duration}s body + {branding}s branding, {count} videos")
+    print(f"Full re-encode: {full:.2f}s per video")
+    print(f"Cached segments + stream-copy join: {segmented:.2f}s per video ({full / segmented:.2f}x), "
+          f"one-off segment render {segments_time:.2f}s")
+
+@benchmark('chunked-encode')
+async def bench_chunked_encode(duration: int = 300, platform: str = 'youtube'):
+    """One long render as a background pass plus a single encode vs chunks rendered straight from the generators
+    
+    Stage times are recorded so the wall time with one core per chunk can be projected on hosts with fewer cores.
+    """
+    engine = VideoProductionEngine()
+    engine.segment_render = False
+    work_dir = Path(tempfile.mkdtemp(prefix="chunk_bench_", dir=engine.temp_path))
+    script_data = {
+        'id': 'bench', 'platform': platform, 'duration': duration, 'niche': 'ai_technology',
+        'script': {'hook': 'Did you know', 'main_content': ' '.join(['word'] * 600), 'call_to_action': 'Subscribe'}
+    }
+    
+    stage_times = []
+    run_command = engine.run_command
+    
+    async def timed_command(name, cmd, **kwargs):
+        start = time.perf_counter()
+        result = await run_command(name, cmd, **kwargs)
+        stage_times.append((name, time.perf_counter() - start))
+        return result
+    
+    engine.run_command = timed_command
+    
+    try:
+        subtitle_path = await engine.generate_subtitles(script_data, work_dir)
+        
+        # Previous long-video path: the full background is encoded first, then encoded again with subtitles
+        engine.chunked_encode_threshold = duration + 1
+        start = time.perf_counter()
+        background_path = await engine.get_background_video(script_data, work_dir)
+        await engine.combine_video_elements(background_path, "", subtitle_path, work_dir, platform, duration)
+        single = time.perf_counter() - start
+        
+        engine.chunked_encode_threshold = 0
+        stage_times.clear()
+        start = time.perf_counter()
+        await engine.combine_video_elements("", "", subtitle_path, work_dir, platform, duration)
+        chunked = time.perf_counter() - start
+    finally:
+        await engine.cleanup_temp_files(work_dir)
+    
+    chunks = [elapsed for name, elapsed in stage_times if name == 'ffmpeg.chunk']
+    serial = sum(elapsed for name, elapsed in stage_times if name != 'ffmpeg.chunk')
+    projected = serial + max(chunks)
+    
+    print(f"{platform}, {duration}s, {os.cpu_count()} CPUs, {engine.chunk_workers} chunk workers, "
+          f"{engine.core_allocator.threads_per_job} threads per encode")
+    print(f"Background pass + single encode: {single:.2f}s")
+    print(f"Chunks from generators: {chunked:.2f}s ({single / chunked:.2f}x), "
+          f"{len(chunks)} chunks of {min(chunks):.2f}-{max(chunks):.2f}s, {serial:.2f}s serial join")
+    print(f"Projected with {len(chunks)} chunk workers on their own cores: {projected:.2f}s ({single / projected:.2f}x)")
+
+@benchmark('encode-placement')
+async def bench_encode_placement(count: int = 10, duration: int = 20, platform: str = 'tiktok'):
+    """Aggregate videos/hour for concurrent renders with x264's default threads vs leased cores and thread caps"""
+    engine = VideoProductionEngine()
+    engine.segment_render = False
+    work_dir = Path(tempfile.mkdtemp(prefix="placement_bench_", dir=engine.temp_path))
+    script_data = {
+        'id': 'bench', 'platform': platform, 'duration': duration, 'niche': 'ai_technology',
+        'script': {'hook': 'Did you know', 'main_content': ' '.join(['word'] * 60), 'call_to_action': 'Subscribe'}
+    }
+    
+    async def render(index: int):
+        video_dir = work_dir / str(index)
+        video_dir.mkdir(exist_ok=True)
+        await engine.combine_video_elements(background_path, "", subtitle_path, video_dir, platform, duration)
+    
+    try:
+        background_path = await engine.get_background_video(script_data, work_dir)
+        subtitle_path = await engine.generate_subtitles(script_data, work_dir)
+        
+        throughput = {}
+        for label, enabled in (('unmanaged', False), ('managed', True)):
+            engine.core_allocator.enabled = enabled
+            start = time.perf_counter()
+            await asyncio.gather(*(render(i) for i in range(count)))
+            throughput[label] = count / (time.perf_counter() - start) * 3600
+    finally:
+        await engine.cleanup_temp_files(work_dir)
+    
+    metrics = engine.core_allocator.get_metrics()
+    print(f"{platform}, {duration}s, {count} concurrent renders, {metrics['logical_cpus']} CPUs on "
+          f"{metrics['physical_cores']} cores / {metrics['numa_nodes']} NUMA nodes, {metrics['threads_per_job']} threads per job")
+    print(f"Unmanaged: {throughput['unmanaged']:.0f} videos/hour")
+    print(f"Leased cores: {throughput['managed']:.0f} videos/hour ({throughput['managed'] / throughput['unmanaged']:.2f}x)")
+
+@benchmark('stream-assembly')
+async def bench_stream_assembly(count: int = 3, duration: int = 15, platform: str = 'tiktok'):
+    """Assembly time and intermediate bytes written per video: file-based stages vs one streamed pass"""
+    engine = VideoProductionEngine()
+    engine.segment_render = False
+    if not engine.stream_assembly:
+        print("Streamed assembly needs espeak and memfd_create")
+        return
+    
+    script_data = {
+        'id': 'bench', 'platform': platform, 'duration': duration, 'niche': 'ai_technology',
+        'script': {'hook': 'Did you know', 'main_content': ' '.join(['word'] * 40), 'call_to_action': 'Subscribe',
+                   'text_overlays': ['AI tools', 'Save hours']}
+    }
+    
+    async def assemble(streamed: bool) -> Tuple[float, int]:
+        elapsed, intermediate = 0.0, 0
+        for _ in range(count):
+            work_dir = Path(tempfile.mkdtemp(prefix="stream_bench_", dir=engine.temp_path))
+            start = time.perf_counter()
+            if streamed:
+                final_path = await engine.assemble_streamed(script_data, work_dir)
+            else:
+                audio_path = await engine.generate_voiceover(script_data, work_dir)
+                background_path = await engine.get_background_video(script_data, work_dir)
+                subtitle_path = await engine.generate_subtitles(script_data, work_dir)
+                final_path = await engine.combine_video_elements(
+                    background_path, audio_path, subtitle_path, work_dir, platform, duration
+                )
+            elapsed += time.perf_counter() - start
+            
+            if not final_path:
+                raise RuntimeError(f"{'Streamed' if streamed else 'File-based'} assembly failed")
+            intermediate += sum(path.stat().st_size for path in work_dir.iterdir() if str(path) != final_path)
+            await engine.cleanup_temp_files(work_dir)
+        return elapsed / count, intermediate // count
+    
+    files_time, files_bytes = await assemble(False)
+    streamed_time, streamed_bytes = await assemble(True)
+    
+    print(f"{platform}, {duration}s, {count} videos")
+    print(f"Intermediate files: {files_time:.2f}s per video, {files_bytes / 1024:.0f} KB written besides the output")
+    print(f"Streamed: {streamed_time:.2f}s per video ({files_time / streamed_time:.2f}x), "
+          f"{streamed_bytes / 1024:.0f} KB written besides the output")
+
+@benchmark('per-template-encode')
+async def bench_per_template_encode(duration: int = 30, platform: str = 'tiktok'):
+    """Output size of the template's fixed CRF vs the probed per-template CRF, with the probe's one-off cost"""
+    engine = VideoProductionEngine()
+    engine.segment_render = False
+    engine.storage_path = Path(tempfile.mkdtemp(prefix="crf_bench_"))
+    work_dir = Path(tempfile.mkdtemp(prefix="crf_bench_", dir=engine.temp_path))
+    script_data = {
+        'id': 'bench', 'platform': platform, 'duration': duration, 'niche': 'ai_technology',
+        'script': {'hook': 'Did you know', 'main_content': ' '.join(['word'] * 60), 'call_to_action': 'Subscribe',
+                   'text_overlays': ['AI tools', 'Save hours']}
+    }
+    
+    try:
+        background_path = await engine.get_background_video(script_data, work_dir)
+        subtitle_path = await engine.generate_subtitles(script_data, work_dir)
+        
+        sizes = {}
+        for probed in (False, True):
+            engine.per_template_encode = probed
+            if probed:
+                start = time.perf_counter()
+                await engine.tune_crf(script_data, work_dir)
+                probe_time = time.perf_counter() - start
+            final_path = await engine.combine_video_elements(
+                background_path, "", subtitle_path, work_dir, platform, duration
+            )
+            if not final_path:
+                raise RuntimeError("Encode failed")
+            sizes[probed] = Path(final_path).stat().st_size
+    finally:
+        await engine.cleanup_temp_files(work_dir)
+        shutil.rmtree(engine.storage_path, ignore_errors=True)
+    
+    decision = next(iter(engine.crf_decisions.values()))
+    print(f"{platform}, {duration}s, floor {engine.quality_floor(platform)}")
+    print(f"Template CRF {engine.video_templates[platform]['crf']}: {sizes[False] / 1024:.0f} KB")
+    print(f"Per-template CRF {decision['crf']}: {sizes[True] / 1024:.0f} KB ({1 - sizes[True] / sizes[False]:.0%} smaller), "
+          f"SSIM {decision['ssim']}, worst-frame PSNR {decision['psnr']} dB, one-off probe {probe_time:.1f}s")
+
+async def run_benchmarks(names: List[str]):
+    """Run the named benchmarks, or list them when no name is given"""
+    if not names:
+        print("Available benchmarks: " + ", ".join(sorted(BENCHMARKS)))
+        return
+    
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name}")
+            continue
+        print(f"\n=== {name} ===")
+        await BENCHMARKS[name]()
+
+if __name__ == "__main__":
+    setup_logging(LOG_FILE)
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        asyncio.run(run_benchmarks(sys.argv[2:]))
+    elif len(sys.argv) > 1 and sys.argv[1] == 'simulate':
+        asyncio.run(run_simulation(int(sys.argv[2]) if len(sys.argv) > 2 else 10000))
+    else:
+        print("Usage: python3 06-pipeline-simulation.py bench [name ...] | simulate [videos]")
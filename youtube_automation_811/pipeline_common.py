@@ -0,0 +1,37 @@
+"""
+Phase 1: Shared Pipeline Helpers
+Deferred imports and logging setup used by the revenue and content pipelines and their command line
+Imports only the standard library, so loading it never adds to startup time
+"""
+
+import importlib.util
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+def lazy_import(name: str):
+    """Bind a module like `import name` does, but defer loading it until an attribute is first used"""
+    if name not in sys.modules:
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+        spec.loader = importlib.util.LazyLoader(spec.loader)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        parent, _, child = name.rpartition('.')
+        if parent:
+            setattr(sys.modules[parent], child, module)
+    return sys.modules[name.partition('.')[0]]
+
+def setup_logging(log_file: str, level: int = logging.INFO):
+    """Configure logging once per process instead of as an import side effect"""
+    handlers = [logging.StreamHandler()]
+    try:
+        handlers.append(logging.FileHandler(log_file))
+    except OSError as e:
+        log_file = f"unavailable ({e})"
+
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s', handlers=handlers)
+    logger.debug(f"Logging to stderr and {log_file}")
@@ -0,0 +1,64 @@
+"""Shared fixtures: the content pipeline script loaded as a module, and fakes for its Redis and MySQL clients"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SCRIPT_DIR))  # The pipeline scripts import pipeline_common from their directory
+
+def load_content():
+    """The content production script under the module name the CLI gives it"""
+    if 'content' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('content', SCRIPT_DIR / '03-content-production-pipeline.py')
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['content'] = module  # Dataclasses resolve their module while the script executes
+        spec.loader.exec_module(module)
+    return sys.modules['content']
+
+class FakeRedis:
+    """The get/set subset the planner and keyword tracker caches use"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, *args, **kwargs):
+        self.data[key] = value
+        return True
+
+class FakeDatabase:
+    """MySQL stand-in answering each query from a callable; records the queries it was sent"""
+
+    def __init__(self, answer):
+        self.answer = answer  # (query, params) -> rows
+        self.queries = []
+        self.result = []
+
+    def connect(self):
+        return self
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+        self.result = self.answer(query, params)
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+@pytest.fixture(scope='session')
+def content():
+    return load_content()
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
@@ -0,0 +1,108 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+def plan(content):
+    return [content.ContentRequest(niche='ai_technology', platform='tiktok'),
+            content.ContentRequest(niche='finance_investing', platform='youtube', duration=300)]
+
+def test_plan_round_trip_assigns_stable_keys(content, tmp_path):
+    store = content.ProductionCheckpointStore(tmp_path)
+    requests = plan(content)
+    store.save_plan('2026-10-19', requests)
+
+    loaded = store.load_plan('2026-10-19')
+    assert loaded == requests
+    assert len({request.checkpoint_key for request in loaded}) == 2
+
+    replanned = plan(content)
+    store.save_plan('2026-10-19', replanned)
+    assert [r.checkpoint_key for r in replanned] == [r.checkpoint_key for r in requests]
+    assert store.load_plan('2026-10-20') is None
+
+def test_marked_stages_survive_reopen(content, tmp_path):
+    store = content.ProductionCheckpointStore(tmp_path)
+    artifact = tmp_path / "voiceover.wav"
+    artifact.write_bytes(b"RIFF")
+
+    checkpoint = store.open('2026-10-19', 'key')
+    checkpoint.mark('script', {'id': 'script-1'})
+    checkpoint.mark('voiceover', str(artifact))
+
+    reopened = store.open('2026-10-19', 'key')
+    assert reopened.done('script')
+    assert reopened.get('script') == {'id': 'script-1'}
+    assert reopened.get_path('voiceover') == str(artifact)
+
+    artifact.unlink()
+    assert reopened.get_path('voiceover') == ""
+    assert not reopened.done('stored')
+
+def test_unreadable_checkpoint_starts_over(content, tmp_path):
+    store = content.ProductionCheckpointStore(tmp_path)
+    path = tmp_path / '2026-10-19' / 'key.json'
+    path.parent.mkdir()
+    path.write_text('{"key": "key", "stages": {')
+
+    assert store.open('2026-10-19', 'key').data == {'key': 'key', 'stages': {}}
+
+def test_prune_removes_days_past_retention(content, tmp_path):
+    store = content.ProductionCheckpointStore(tmp_path, retention_days=7)
+    old = (datetime.now() - timedelta(days=8)).strftime('%Y-%m-%d')
+    today = datetime.now().strftime('%Y-%m-%d')
+    for day in (old, today):
+        store.write_json(store.day_dir(day) / 'plan.json', [])
+
+    store.prune()
+
+    assert not store.day_dir(old).exists()
+    assert json.loads((store.day_dir(today) / 'plan.json').read_text()) == []
+
+def test_stored_video_is_not_rendered_again(content, tmp_path):
+    engine = content.VideoProductionEngine()
+    engine.temp_path = tmp_path / "work"
+    engine.temp_path.mkdir()
+    video = tmp_path / "stored.mp4"
+    video.write_bytes(b"video")
+
+    async def no_commands(*args, **kwargs):
+        raise AssertionError("nothing should be rendered")
+
+    async def inspect(path):
+        return 90.0, 61.0
+
+    engine.run_command = no_commands
+    engine.inspect_video = inspect
+    checkpoint = content.ProductionCheckpointStore(tmp_path / "checkpoints").open('2026-10-19', 'key')
+    checkpoint.mark('stored', {'video': str(video), 'thumbnail': None})
+    script_data = {'id': 'v1', 'platform': 'tiktok', 'niche': 'ai_technology', 'duration': 60,
+                   'script': {'hook': '', 'main_content': '', 'call_to_action': ''}}
+
+    video_data = asyncio.run(engine.produce_video(script_data, checkpoint))
+
+    assert video_data['video_path'] == str(video)
+    assert video_data['duration'] == 61
+    assert video_data['metadata']['assembly'] == 'resumed'
+
+def test_failed_render_keeps_checkpointed_stages(content, tmp_path):
+    engine = content.VideoProductionEngine()
+    engine.temp_path = tmp_path / "work"
+    engine.temp_path.mkdir()
+    engine.stream_assembly = False
+
+    async def voiceover(script_data, work_dir):
+        path = work_dir / "voiceover.wav"
+        path.write_bytes(b"RIFF")
+        return str(path)
+
+    async def no_background(script_data, work_dir):
+        raise RuntimeError("background failed")
+
+    engine.generate_voiceover = voiceover
+    engine.get_background_video = no_background
+    checkpoint = content.ProductionCheckpointStore(tmp_path / "checkpoints").open('2026-10-19', 'key')
+    script_data = {'id': 'v1', 'platform': 'tiktok', 'niche': 'ai_technology', 'duration': 60,
+                   'script': {'hook': '', 'main_content': '', 'call_to_action': ''}}
+
+    assert asyncio.run(engine.produce_video(script_data, checkpoint)) == {}
+    assert checkpoint.get_path('voiceover') == str(engine.temp_path / "v1" / "voiceover.wav")
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+def test_limiter_queues_beyond_limit_and_hands_over_on_release(content):
+    limiter = content.AdaptiveConcurrencyLimiter(initial_limit=2)
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done() and len(limiter.waiters) == 1
+
+        limiter.release(1.0, True)
+        await asyncio.sleep(0)
+        assert waiter.done()
+        assert limiter.in_flight == 2
+
+    asyncio.run(scenario())
+
+def test_limiter_drops_cancelled_waiter(content):
+    limiter = content.AdaptiveConcurrencyLimiter(initial_limit=1)
+
+    async def scenario():
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert not limiter.waiters
+        assert limiter.in_flight == 1
+
+    asyncio.run(scenario())
+
+def test_limiter_grows_only_when_saturated(content):
+    limiter = content.AdaptiveConcurrencyLimiter(initial_limit=4)
+
+    limiter.in_flight = 1
+    limiter.release(1.0, True)
+    assert limiter.limit == 4.0
+    assert limiter.last_decision == 'hold'
+
+    limiter.in_flight = 4
+    limiter.release(1.0, True)
+    assert limiter.limit == 4.25
+    assert limiter.last_decision == 'increase'
+
+def test_limiter_backs_off_once_per_round_trip(content):
+    limiter = content.AdaptiveConcurrencyLimiter(initial_limit=10, backoff=0.5)
+    limiter.record(20.0, True, False, saturated=False)  # Smoothed latency of 20s spaces out decreases
+
+    limiter.record(1.0, False, True)
+    limiter.record(1.0, False, True)
+    assert limiter.limit == 5.0
+    assert limiter.decreases == 1
+    assert limiter.last_decision == 'decrease:timeout'
+
+def test_limiter_respects_min_limit(content):
+    limiter = content.AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1, backoff=0.5)
+    limiter.record(1.0, False, False)
+    assert limiter.limit == 1
+
+def allocator(content):
+    # Two NUMA nodes with two SMT threads per core: node 0 has two cores, node 1 three
+    cores = [(0, (0, 1)), (0, (2, 3)), (1, (4, 5)), (1, (6, 7)), (1, (8, 9))]
+    return content.CoreAllocator(threads_per_job=4, cores=cores)
+
+def test_core_allocator_counts_smt_siblings(content):
+    cores = allocator(content)
+    assert cores.cores_needed(4) == 2
+    assert cores.cores_needed(3) == 2
+    assert cores.cores_needed(64) == 5
+
+def test_core_allocator_prefers_tightest_single_node(content):
+    cores = allocator(content)
+    assert cores.pick(2) == [0, 1]
+    assert cores.pick(3) == [2, 3, 4]
+
+    cores.free = {0, 2, 3, 4}
+    assert cores.pick(2) == [2, 3]
+
+def test_core_allocator_spreads_from_emptiest_nodes(content):
+    cores = allocator(content)
+    assert cores.pick(4) == [2, 3, 4, 0]
+
+def test_core_allocator_lease_returns_cores(content):
+    cores = allocator(content)
+
+    async def scenario():
+        async with cores.lease(4) as cpus:
+            assert cpus == [0, 1, 2, 3]
+            assert cores.free == {2, 3, 4}
+        assert cores.free == {0, 1, 2, 3, 4}
+
+        async with cores.lease(None) as cpus:
+            assert cpus is None
+
+    asyncio.run(scenario())
+
+def test_core_allocator_pins_through_taskset_prefix(content):
+    cores = allocator(content)
+    cores.taskset = "/usr/bin/taskset"
+    assert cores.affinity([0, 1, 4]) == ["/usr/bin/taskset", "--cpu-list", "0,1,4"]
+    assert cores.affinity(None) == []
+
+    cores.taskset = None
+    assert cores.affinity([0, 1]) == []
+
+def test_supervisor_runs_command_under_launcher(content):
+    supervisor = content.ProcessSupervisor()
+    launcher = content.CoreAllocator().affinity([0])
+    if not launcher:
+        pytest.skip("taskset is not installed")
+
+    returncode, stdout, _ = asyncio.run(
+        supervisor.run("pinned", ["sh", "-c", "grep Cpus_allowed_list /proc/self/status"], launcher)
+    )
+    assert returncode == 0
+    assert stdout.split()[-1] == b"0"
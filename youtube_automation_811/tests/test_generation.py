@@ -0,0 +1,71 @@
+import asyncio
+
+def ollama(content, responses):
+    manager = content.OllamaClusterManager()
+    calls = []
+
+    async def call_with_policy(payload, deadline):
+        calls.append(payload['prompt'])
+        return 200, {'response': responses(payload['prompt'])}
+
+    manager.call_with_policy = call_with_policy
+    return manager, calls
+
+def test_uncached_generations_are_not_retained(content):
+    manager, calls = ollama(content, lambda prompt: f"script for {prompt}")
+
+    async def scenario():
+        for i in range(3):
+            await manager.generate_content(f"prompt {i}", use_cache=False)
+        await manager.generate_content("prompt 0", use_cache=False)
+
+    asyncio.run(scenario())
+    assert len(calls) == 4
+    assert not manager.request_cache
+
+def test_response_cache_is_bounded_lru(content):
+    manager, calls = ollama(content, lambda prompt: prompt.upper())
+    manager.cache_size = 2
+
+    async def scenario():
+        await manager.generate_content("a")
+        await manager.generate_content("b")
+        assert await manager.generate_content("a") == "A"  # Hit, now most recently used
+        await manager.generate_content("c")  # Evicts b
+        await manager.generate_content("b")
+
+    asyncio.run(scenario())
+    assert calls == ["a", "b", "c", "b"]
+    assert len(manager.request_cache) == 2
+
+def long_form_script(words):
+    opening = "Did you know your savings could grow faster? You will learn three habits. "
+    closing = " Think about it and subscribe for more."
+    filler = ' '.join(['budget'] * (words - len((opening + closing).split())))
+    return opening + filler + closing
+
+def test_length_window_follows_target_duration(content):
+    analytics = content.ScriptAnalyticsEngine()
+    assert analytics.length_window(60) == (100, 300)
+    assert analytics.length_window(300) == (500, 1500)
+
+    analysis = analytics.analyze(long_form_script(750), 300)
+    assert 'length' not in analysis['quality_gaps']
+    assert 'length' in analytics.analyze(long_form_script(750), 60)['quality_gaps']
+
+def test_long_form_script_passes_youtube_gate(content):
+    analytics = content.ScriptAnalyticsEngine()
+    gate = content.QualityGate()
+    request = content.ContentRequest(niche='finance_investing', platform='youtube', duration=300)
+
+    # Three of four engagement words: passing needs the length points
+    analysis = analytics.analyze(long_form_script(750), request.duration)
+    assert analysis['quality_gaps'] == ['engagement']
+    script_data = {'duration': 300, 'metadata': analysis}
+
+    assert gate.review(request, script_data, 0) == 'pass'
+
+def test_length_feedback_names_the_duration_window(content):
+    gate = content.QualityGate()
+    script_data = {'duration': 300, 'metadata': {'quality_score': 60.0, 'quality_gaps': ['length']}}
+    assert "between 500 and 1500 words" in gate.feedback(script_data)
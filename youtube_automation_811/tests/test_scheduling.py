@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+
+def at(hour, minute=0, day=19):
+    return datetime(2026, 10, day, hour, minute, tzinfo=timezone.utc).timestamp()
+
+def requests(content, platform, priorities):
+    made = []
+    for priority in priorities:
+        request = content.ContentRequest(niche='ai_technology', platform=platform)
+        request.priority = priority
+        made.append(request)
+    return made
+
+def test_publish_window_rolls_over_after_close(content):
+    scheduler = content.ProductionScheduler(render_slots=2, timezone='UTC')
+    assert scheduler.publish_window(at(12)) == (at(19), at(21))
+    assert scheduler.publish_window(at(20)) == (at(19), at(21))
+    assert scheduler.publish_window(at(22)) == (at(19, day=20), at(21, day=20))
+
+def test_assign_slots_spaces_deadlines_by_priority(content):
+    scheduler = content.ProductionScheduler(render_slots=2, timezone='UTC')
+    tiktok = requests(content, 'tiktok', [1.0, 4.0, 2.0, 3.0])
+
+    scheduler.assign_slots(tiktok, at(12))
+
+    by_priority = sorted(tiktok, key=lambda r: -r.priority)
+    assert [r.publish_deadline for r in by_priority] == [at(19, 30), at(20), at(20, 30), at(21)]
+
+def test_assign_slots_uses_platform_window_and_remaining_time(content):
+    scheduler = content.ProductionScheduler(render_slots=2, timezone='UTC')
+    scheduler.platform_windows['youtube'] = (15, 17)
+    youtube = requests(content, 'youtube', [2.0, 1.0])
+    tiktok = requests(content, 'tiktok', [1.0])
+
+    scheduler.assign_slots(youtube + tiktok, at(16))
+
+    assert [r.publish_deadline for r in youtube] == [at(16, 30), at(17)]
+    assert tiktok[0].publish_deadline == at(21)
+
+def test_order_is_earliest_deadline_then_value(content):
+    scheduler = content.ProductionScheduler(render_slots=1, timezone='UTC')
+    early_low, early_high, late = requests(content, 'tiktok', [1.0, 5.0, 9.0])
+    early_low.publish_deadline = early_high.publish_deadline = at(13)
+    late.publish_deadline = at(14)
+    for request in (early_low, early_high, late):
+        request.estimated_cost = 60
+
+    assert scheduler.order([late, early_low, early_high], at(12)) == [early_high, early_low, late]
+
+def test_order_defers_requests_that_would_miss_their_deadline(content):
+    scheduler = content.ProductionScheduler(render_slots=1, timezone='UTC')
+    hopeless, on_time, undated = requests(content, 'tiktok', [9.0, 1.0, 5.0])
+    hopeless.publish_deadline = at(12, 10)
+    hopeless.estimated_cost = 3600
+    on_time.publish_deadline = at(13)
+    on_time.estimated_cost = 600
+    undated.estimated_cost = 600
+
+    assert scheduler.order([hopeless, on_time, undated], at(12)) == [on_time, undated, hopeless]
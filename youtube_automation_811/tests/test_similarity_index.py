@@ -0,0 +1,58 @@
+def script(script_id, topic):
+    words = ' '.join(f"{topic}{i}" for i in range(40))
+    return {'id': script_id, 'script': {'hook': f"{topic} hook", 'main_content': words, 'call_to_action': 'follow'}}
+
+def test_reservation_blocks_near_duplicates_until_released(content, tmp_path):
+    index = content.ScriptSimilarityIndex(tmp_path / "simhash.log")
+
+    assert index.check_and_reserve(script('a', 'alpha')) is None
+    assert index.check_and_reserve(script('b', 'alpha')) == 'a'
+    assert index.check_and_reserve(script('c', 'beta')) is None
+
+    index.release('a')
+    assert index.check_and_reserve(script('b', 'alpha')) is None
+
+def test_only_committed_scripts_are_persisted(content, tmp_path):
+    path = tmp_path / "simhash.log"
+    index = content.ScriptSimilarityIndex(path)
+    index.check_and_reserve(script('a', 'alpha'))
+    index.check_and_reserve(script('b', 'beta'))
+    index.commit(script('a', 'alpha'))
+    index.log_file.close()
+
+    reloaded = content.ScriptSimilarityIndex(path)
+    assert reloaded.check_and_reserve(script('x', 'alpha')) == 'a'
+    assert reloaded.check_and_reserve(script('y', 'beta')) is None
+
+def test_commit_without_reservation_indexes_the_script(content, tmp_path):
+    index = content.ScriptSimilarityIndex(tmp_path / "simhash.log")
+    index.commit(script('resumed', 'alpha'))
+
+    assert index.check_and_reserve(script('b', 'alpha')) == 'resumed'
+    assert len(index.entries) == 1
+
+def test_capacity_evicts_oldest(content, tmp_path):
+    index = content.ScriptSimilarityIndex(tmp_path / "simhash.log", capacity=2)
+    for script_id, topic in (('a', 'alpha'), ('b', 'beta'), ('c', 'gamma')):
+        assert index.check_and_reserve(script(script_id, topic)) is None
+
+    assert len(index.entries) == 2
+    assert index.check_and_reserve(script('x', 'alpha')) is None
+    assert index.check_and_reserve(script('y', 'gamma')) == 'c'
+    assert all(index.band_tables)  # Evicted bands are dropped, live ones kept
+
+def test_released_reservations_leave_the_eviction_order(content, tmp_path):
+    index = content.ScriptSimilarityIndex(tmp_path / "simhash.log", capacity=3)
+    assert index.check_and_reserve(script('kept', 'alpha')) is None
+    for i in range(50):
+        assert index.check_and_reserve(script(f"failed{i}", f"topic{i}")) is None
+        index.release(f"failed{i}")
+
+    assert len(index.order) <= 2 * len(index.entries)
+    assert index.check_and_reserve(script('b', 'beta')) is None
+    assert index.check_and_reserve(script('c', 'gamma')) is None
+    assert index.check_and_reserve(script('x', 'alpha')) == 'kept'  # Still inside the window of three
+
+    assert index.check_and_reserve(script('d', 'delta')) is None
+    assert index.check_and_reserve(script('y', 'alpha')) is None
+    assert list(index.order) == [index.reserved[script_id] for script_id in ('c', 'd', 'y')]
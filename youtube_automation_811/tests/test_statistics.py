@@ -0,0 +1,109 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import FakeDatabase
+
+def planner_database(revenue_rows, cost_rows):
+    def answer(query, params):
+        if 'NOW()' in query:
+            return [{'now': datetime.now()}]
+        return revenue_rows if 'content_analytics' in query else cost_rows
+    return FakeDatabase(answer)
+
+def test_planner_recomputes_revenue_instead_of_accumulating(content, fake_redis):
+    planner = content.ContentRequestPlanner({}, fake_redis)
+    planner.connect_database = planner_database(
+        [{'niche': 'ai_technology', 'platform': 'tiktok', 'observations': 4, 'total': 40.0}], []
+    ).connect
+
+    planner.refresh(force=True)
+    planner.refresh(force=True)
+
+    assert planner.revenue_weight[0, 0] == 4
+    assert planner.revenue_mean[0, 0] == 10.0
+    assert planner.revenue_weight.sum() == 4
+
+def test_planner_folds_new_costs_into_decayed_mean(content, fake_redis):
+    planner = content.ContentRequestPlanner({}, fake_redis)
+    rows = [{'niche': 'health_fitness', 'platform': 'youtube', 'observations': 10, 'total': 600.0}]
+    database = planner_database([], rows)
+    planner.connect_database = database.connect
+
+    planner.refresh(force=True)
+    rows[0] = {'niche': 'health_fitness', 'platform': 'youtube', 'observations': 10, 'total': 1200.0}
+    planner.refresh(force=True)
+
+    i, j = planner.niches.index('health_fitness'), planner.platforms.index('youtube')
+    assert planner.cost_weight[i, j] == pytest.approx(19.8)
+    assert planner.cost_mean[i, j] == pytest.approx((60.0 * 9.8 + 1200.0) / 19.8)
+
+    # Only production rows newer than the previous refresh are read
+    cost_params = [params for query, params in database.queries if 'production_time' in query]
+    assert cost_params[0] == ('1970-01-01 00:00:00',)
+    assert cost_params[1] != cost_params[0]
+
+def test_planner_refresh_waits_for_interval_and_survives_restart(content, fake_redis):
+    planner = content.ContentRequestPlanner({}, fake_redis)
+    database = planner_database([{'niche': 'ai_technology', 'platform': 'tiktok', 'observations': 2, 'total': 5.0}], [])
+    planner.connect_database = database.connect
+
+    planner.refresh(force=True)
+    queries = len(database.queries)
+    planner.refresh()
+    assert len(database.queries) == queries
+
+    restarted = content.ContentRequestPlanner({}, fake_redis)
+    assert restarted.revenue_weight.tolist() == planner.revenue_weight.tolist()
+    assert restarted.watermark == planner.watermark
+
+def analytics_row(video_id, revenue, publish_date=None):
+    return {
+        'video_id': video_id,
+        'publish_date': publish_date or datetime.now().strftime('%Y-%m-%d'),
+        'niche': 'ai_technology',
+        'script_data': json.dumps({'script': {'hook': 'quantum widgets', 'main_content': '', 'call_to_action': ''}}),
+        'views_24h': 0,
+        'revenue_24h': revenue,
+        'last_updated': datetime.now()
+    }
+
+def tracker_with(content, fake_redis, rows):
+    tracker = content.TrendingKeywordTracker({}, fake_redis)
+    database = FakeDatabase(lambda query, params: [{'now': datetime.now()}] if 'NOW()' in query else list(rows))
+    tracker.connect_database = database.connect
+    return tracker, database
+
+def test_tracker_counts_only_growth_of_updated_rows(content, fake_redis):
+    rows = [analytics_row('v1', 10.0)]
+    tracker, _ = tracker_with(content, fake_redis, rows)
+
+    tracker.refresh(force=True)
+    assert tracker.candidates['ai_technology']['quantum'] == pytest.approx(10.0, rel=1e-3)
+
+    rows[0] = analytics_row('v1', 15.0)
+    tracker.refresh(force=True)
+    tracker.refresh(force=True)
+    assert tracker.candidates['ai_technology']['quantum'] == pytest.approx(15.0, rel=1e-3)
+    assert tracker.lookup('ai_technology')[0] in ('quantum', 'widgets', 'quantum widgets')
+
+def test_tracker_forgets_videos_past_the_history_window(content, fake_redis):
+    tracker, database = tracker_with(content, fake_redis, [])
+    old = (datetime.now() - timedelta(days=tracker.history_days + 1)).strftime('%Y-%m-%d')
+    recent = datetime.now().strftime('%Y-%m-%d')
+    tracker.folded = {'old': (5.0, old), 'recent': (5.0, recent)}
+
+    tracker.refresh(force=True)
+
+    assert set(tracker.folded) == {'recent'}
+    cutoff = database.queries[-1][1][1]
+    assert old < cutoff <= recent
+
+def test_tracker_cache_keeps_folded_weights(content, fake_redis):
+    tracker, _ = tracker_with(content, fake_redis, [analytics_row('v1', 10.0)])
+    tracker.refresh(force=True)
+
+    restarted = content.TrendingKeywordTracker({}, fake_redis)
+    assert restarted.folded['v1'][0] == 10.0
+    assert restarted.lookup('ai_technology') == tracker.lookup('ai_technology')